@@ -1,59 +1,37 @@
-import json
-from datetime import datetime
-import re
-
-JAHR = 2025
-INPUT_FILE = "kalender_roh.txt"
-BEREINIGT_FILE = "kalender_bereinigt.txt"
-OUTPUT_FILE = "anlass_kalender.json"
-
-# === Schritt 1: Bereinige Textdatei ===
-with open(INPUT_FILE, encoding="utf-8") as f:
-    lines = [line.strip() for line in f if line.strip()]
-
-bereinigt = []
-for line in lines:
-    if re.match(r"^\d{1,2} [A-Za-zäöüÄÖÜ]+", line):
-        print(f"📅 Neue Zeile erkannt: {line}")
-        bereinigt.append(line)
-    elif bereinigt:
-        print(f"↪️  An vorherige Zeile anhängen: {line}")
-        bereinigt[-1] += ", " + line  # an letzte Zeile anhängen
-    else:
-        print(f"⚠️  Zeile übersprungen (keine vorherige Zeile zum Anhängen): {line}")
-
-# Speichern für Debug
-with open(BEREINIGT_FILE, "w", encoding="utf-8") as f:
-    for line in bereinigt:
-        f.write(line + "\n")
-
-# === Schritt 2: Erzeuge JSON ===
-monatsnamen = {
-    "Januar": "01", "Februar": "02", "März": "03", "April": "04",
-    "Mai": "05", "Juni": "06", "Juli": "07", "August": "08",
-    "September": "09", "Oktober": "10", "November": "11", "Dezember": "12"
-}
-
-anlaesse = {}
-for line in bereinigt:
-    match = re.match(r"^(\d{1,2}) ([A-Za-zäöüÄÖÜ]+)\s+(.*)", line)
-    if match:
-        tag, monat, text = match.groups()
-        monat = monat.strip()
-        if monat in monatsnamen:
-            datum = f"{JAHR}-{monatsnamen[monat]}-{int(tag):02d}"
-            anlaesse[datum] = {
-                "beschreibung": text.strip(),
-                "kategorie": "Sonstiges"
-            }
-            print(f"✅ {datum}: {text.strip()}")
-        else:
-            print(f"❌ Unbekannter Monatsname: {monat}")
-    else:
-        print(f"❌ Kein gültiges Datumsformat gefunden in Zeile: {line}")
-
-with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-    json.dump(anlaesse, f, indent=2, ensure_ascii=False)
-
-print(f"✅ Bereinigt gespeichert in {BEREINIGT_FILE}")
-print(f"✅ Anlasskalender gespeichert in {OUTPUT_FILE} mit {len(anlaesse)} Einträgen.")
+"""
+Bereinigt kalender_roh.txt (Debug-Ausgabe kalender_bereinigt.txt) und kompiliert
+den Anlass-Store für die angegebenen Jahre.
+
+    python data/clean_calender.py            # aktuelles + nächstes Jahr
+    python data/clean_calender.py 2025 2027  # Jahre 2025–2027
+
+anlass_kalender.json wird NICHT mehr überschrieben – dort liegen nur noch kuratierte
+Einträge ("MM-DD" jährlich, "YYYY-MM-DD" exakt). Bewegliche Termine: anlass_regeln.json.
+"""
+import os, sys
+from datetime import date
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, os.path.join(HERE.parent, "src"))
+
+from social_post.constants import ANLASS_RAW_FILE, ANLASS_STORE_FILE
+from social_post.occasions import clean_raw_lines, load_occasions
+
+BEREINIGT_FILE = HERE / "kalender_bereinigt.txt"
+
+def main(argv):
+    years = [int(a) for a in argv[:2]]
+    first = years[0] if years else date.today().year
+    last = years[1] if len(years) > 1 else (first if years else first + 1)
+
+    lines = ANLASS_RAW_FILE.read_text(encoding="utf-8").splitlines()
+    bereinigt = clean_raw_lines(lines)
+    BEREINIGT_FILE.write_text("".join(line + "\n" for line in bereinigt), encoding="utf-8")
+    print(f"✅ Bereinigt gespeichert in {BEREINIGT_FILE} ({len(bereinigt)} Zeilen)")
+
+    store = load_occasions(first, last, force=True, verbose=True)
+    print(f"✅ Anlass-Store gespeichert in {ANLASS_STORE_FILE} mit {len(store)} Einträgen ({first}–{last}).")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
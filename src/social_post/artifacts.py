@@ -0,0 +1,132 @@
+# src/social_post/artifacts.py
+"""
+Abhängigkeitsgraph der abgeleiteten Daten (data/artifact_graph.json).
+
+Knoten (Schlüssel "art:name"):
+    dish:<kategorie>/<gericht>   Beschreibung aus menu.json (Quelle)
+    tokens:<kategorie>/<gericht> extrahierte Zutaten eines Gerichts    ← dish
+    examples:<zutat>             Menü-Beispiele einer Zutat
+    fact:<zutat>                 verwendeter Fakt (Overrides/Anreicherung) ← examples
+    anlass:<YYYY-MM-DD>          Kalender-Eintrag
+    post:<YYYY-MM-DD>:<typ>      generierter Post ← dish | fact + examples | anlass
+
+Jeder Knoten merkt sich den Inhalts-Hash seines Werts, die Hashes seiner Eingänge
+zum Zeitpunkt der Erzeugung und eine Version (Prompt bzw. Extraktionsregeln).
+Veraltet ist ein Knoten, sobald ein Eingang heute einen anderen Hash hat oder die
+Version nicht mehr passt. Eine geänderte Gerichtsbeschreibung trifft damit nur die
+Zutaten, Beispiele, Fakten und Posts, die tatsächlich davon abhängen.
+"""
+import hashlib, json
+from datetime import datetime
+
+from .io_utils import read_json, write_json
+from .constants import ARTIFACT_GRAPH_FILE
+
+def content_hash(value) -> str:
+    """Stabiler Hash für Strings/Listen/dicts (Whitespace in Strings normalisiert)."""
+    if isinstance(value, str):
+        blob = " ".join(value.split())
+    else:
+        blob = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+class ArtifactGraph:
+    def __init__(self, path=ARTIFACT_GRAPH_FILE):
+        self.path = path
+        self.nodes: dict[str, dict] = (read_json(path, {}) or {}).get("nodes", {})
+        self.changed: set[str] = set()   # Knoten, deren Hash sich in diesem Lauf geändert hat
+        self._dirty = False
+
+    # -----------------------------
+    # Lesen
+    # -----------------------------
+    def hash_of(self, key: str) -> str | None:
+        node = self.nodes.get(key)
+        return node.get("hash") if node else None
+
+    def data(self, key: str, default=None):
+        return (self.nodes.get(key) or {}).get("data", default)
+
+    def keys(self, prefix: str) -> list[str]:
+        return [k for k in self.nodes if k.startswith(prefix)]
+
+    def is_stale(self, key: str, version: str | tuple | None = None) -> bool:
+        """
+        True, wenn der Knoten fehlt, ein Eingang sich seit der Erzeugung geändert hat
+        oder (falls angegeben) die Version nicht passt. version darf ein Tupel
+        gültiger Versionen sein.
+        """
+        node = self.nodes.get(key)
+        if node is None:
+            return True
+        if version is not None:
+            allowed = version if isinstance(version, tuple) else (version,)
+            if node.get("version", "") not in allowed:
+                return True
+        return any(self.hash_of(dep) != h for dep, h in (node.get("inputs") or {}).items())
+
+    def stale_inputs(self, key: str) -> list[str]:
+        """Eingänge, die sich seit der Erzeugung geändert haben (für Berichte)."""
+        node = self.nodes.get(key) or {}
+        return [dep for dep, h in (node.get("inputs") or {}).items() if self.hash_of(dep) != h]
+
+    def dependents(self, keys) -> set[str]:
+        """Alle Knoten, die (transitiv) von keys abhängen."""
+        rev: dict[str, list[str]] = {}
+        for k, node in self.nodes.items():
+            for dep in node.get("inputs") or {}:
+                rev.setdefault(dep, []).append(k)
+        out, todo = set(), list(keys)
+        while todo:
+            for k in rev.get(todo.pop(), []):
+                if k not in out:
+                    out.add(k)
+                    todo.append(k)
+        return out
+
+    # -----------------------------
+    # Schreiben
+    # -----------------------------
+    def put(self, key: str, value, inputs: list[str] | None = None, version: str = "", data=None) -> bool:
+        """
+        Setzt Wert-Hash, aktuelle Eingangs-Hashes und Version eines Knotens.
+        data (optional) wird mitgespeichert (z. B. Token-Liste). True = Hash geändert.
+        """
+        h = content_hash(value)
+        old = self.nodes.get(key)
+        node = {"hash": h, "inputs": {dep: self.hash_of(dep) for dep in inputs or []}, "version": version}
+        if data is not None:
+            node["data"] = data
+        changed = old is None or old.get("hash") != h
+        if changed:
+            self.changed.add(key)
+        if old is None or any(old.get(k) != v for k, v in node.items()):
+            node["at"] = datetime.now().isoformat(timespec="seconds")
+            self.nodes[key] = node
+            self._dirty = True
+        return changed
+
+    def remove(self, key: str):
+        if self.nodes.pop(key, None) is not None:
+            self.changed.add(key)
+            self._dirty = True
+
+    def rename(self, key: str, new_key: str):
+        """Knoten unter neuem Schlüssel weiterführen (z. B. Post auf anderen Tag verschoben)."""
+        node = self.nodes.pop(key, None)
+        if node is not None:
+            self.nodes[new_key] = node
+            self._dirty = True
+
+    def prune(self, prefix: str, keep) -> list[str]:
+        """Entfernt Knoten mit prefix, die nicht in keep sind (z. B. gelöschte Gerichte)."""
+        gone = [k for k in self.keys(prefix) if k not in keep]
+        for k in gone:
+            self.remove(k)
+        return gone
+
+    def save(self):
+        if not self._dirty:
+            return
+        write_json(self.path, {"nodes": self.nodes}, lock=True)
+        self._dirty = False
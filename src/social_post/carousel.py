@@ -1,6 +1,6 @@
 # src/social_post/carousel.py
-import json, re
-from .openai_client import call_openai
+import hashlib, json, re
+from .routing import call_route
 
 CAROUSEL_SYS = (
     "Du bist Social-Media-Redakteur:in. Erstelle faktenbasierte, knappe IG-Karussell-Texte in Deutsch. "
@@ -23,7 +23,7 @@ def _build_carousel_prompt(ingredient_name: str, fact_text: str, menu_example: s
     """
     guide = (
         "Erzeuge ein JSON-Objekt mit genau diesen Feldern:\n"
-        '{ "slides": [ { "heading": "", "caption": "", "visual_idea": "", "alt_text": "" } , ... ], "hashtags": "" }\n'
+        '{ "slides": [ { "heading": "", "caption": "", "visual_idea": "", "alt_text": "" } , ... ] }\n'
         "Regeln:\n"
         f"- Anzahl Slides: {num_slides}\n"
         "- Slide 1 = Serien-Stil:\n"
@@ -42,7 +42,7 @@ def _build_carousel_prompt(ingredient_name: str, fact_text: str, menu_example: s
         "- Jede 'caption' 120–180 Zeichen, sachlich.\n"
         "- 'visual_idea': präzises Fotobriefing (inkl. 1024x1024, Farben, Regeln oben).\n"
         "- 'alt_text': max. 140 Zeichen, klare Bildbeschreibung.\n"
-        "- 'hashtags': 5–8 relevante Hashtags. Keine Emojis, kein Markdown.\n"
+        "- Keine Hashtags, keine Emojis, kein Markdown.\n"
     )
     context = (
         f"Zutat: {ingredient_name}\n"
@@ -51,6 +51,11 @@ def _build_carousel_prompt(ingredient_name: str, fact_text: str, menu_example: s
     )
     return context + "\n" + guide
 
+# Ändert sich System-Prompt oder Prompt-Vorlage, ändert sich die Version → Plan-Cache wird neu befüllt
+CAROUSEL_PROMPT_VERSION = hashlib.sha1(
+    (CAROUSEL_SYS + _build_carousel_prompt("{zutat}", "{fakt}", "{beispiel}", 0)).encode("utf-8")
+).hexdigest()[:10]
+
 def _parse_json(s: str):
     s = (s or "").strip()
     try:
@@ -64,20 +69,24 @@ def _parse_json(s: str):
                 pass
     return {"slides": [], "hashtags": ""}
 
-def generate_carousel_plan(ingredient_name: str, fact_text: str, menu_example: str = "", num_slides: int = 6, temperature: float = 0.4):
+def generate_carousel_plan(ingredient_name: str, fact_text: str, menu_example: str = "", num_slides: int = 6, temperature: float | None = None):
     """
     Ruft das LLM auf und liefert einen strukturierten Karussell-Plan:
-    { "slides": [ {heading, caption, visual_idea, alt_text}, ... ], "hashtags": "..." }
+    { "slides": [ {heading, caption, visual_idea, alt_text}, ... ], "hashtags": "" }
+    Hashtags kommen aus hashtags.HashtagBank (rebuild.carousel_for), nicht vom Modell.
     """
-    content = call_openai(
-        messages=[
+    def _valid(s: str) -> bool:
+        return len(_parse_json(s).get("slides") or []) >= min(3, num_slides)
+
+    content = call_route(
+        "carousel",
+        [
             {"role": "system", "content": CAROUSEL_SYS},
             {"role": "user", "content": _build_carousel_prompt(ingredient_name, fact_text, menu_example, num_slides)},
         ],
-        retries=3,
-        backoff=2.0,
         temperature=temperature,
-    )
+        validate=_valid,
+    )[0]
     obj = _parse_json(content)
     # Guards: Kappen & säubern
     slides = []
@@ -0,0 +1,103 @@
+# src/social_post/carousel_store.py
+"""
+Wiederverwendbare Karussell-Pläne.
+
+Schlüssel: (Zutat, Hash aus Fakt + Menübeispiel, Anzahl Slides, Prompt-Version).
+Ein Plan wird nur neu generiert, wenn sich einer dieser Werte ändert oder die
+optionale Refresh-Policy greift (nach N Verwendungen bzw. D Tagen). Dazwischen wird
+der Plan leicht variiert (Reihenfolge der Fakten-Slides, Hashtag-Auswahl).
+"""
+import hashlib, random
+from datetime import datetime, timedelta
+
+from .io_utils import read_json, write_json
+from .constants import CAROUSEL_PLANS_FILE
+from .carousel import CAROUSEL_PROMPT_VERSION
+from .profiling import staged
+
+def _norm(n: str) -> str:
+    return (n or "").strip().lower()
+
+def fact_hash(fact_text: str, menu_example: str = "") -> str:
+    blob = " ".join((fact_text or "").split()) + "\n" + (menu_example or "").strip()
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+def plan_key(ingredient: str, fact_text: str, menu_example: str, num_slides: int) -> str:
+    return f"{_norm(ingredient)}|{fact_hash(fact_text, menu_example)}|{int(num_slides)}|{CAROUSEL_PROMPT_VERSION}"
+
+def vary_plan(plan: dict, seed: int) -> dict:
+    """
+    Leichte Variation ohne LLM: Fakten-Slides (zwischen Hook und den letzten zwei Slides)
+    werden rotiert, Hashtags gemischt (erster Tag bleibt vorne). seed=0 → Original.
+    """
+    if not seed:
+        return plan
+    rnd = random.Random(seed)
+    slides = [dict(s) for s in plan.get("slides", [])]
+    if len(slides) > 4:
+        mid = slides[1:-2]
+        k = seed % len(mid)
+        slides = slides[:1] + mid[k:] + mid[:k] + slides[-2:]
+    tags = (plan.get("hashtags") or "").split()
+    if len(tags) > 2:
+        head, rest = tags[:1], tags[1:]
+        rnd.shuffle(rest)
+        tags = head + rest
+    return {"slides": slides, "hashtags": " ".join(tags)}
+
+class CarouselPlanStore:
+    def __init__(self, path=CAROUSEL_PLANS_FILE, refresh_uses: int = 0, refresh_days: int = 0):
+        self.path = path
+        self.refresh_uses = max(0, int(refresh_uses or 0))
+        self.refresh_days = max(0, int(refresh_days or 0))
+        data = read_json(path, {}) or {}
+        self.plans: dict[str, dict] = data.get("plans", {})
+        self.hits = self.misses = 0
+
+    def _expired(self, entry: dict, now: datetime) -> bool:
+        if self.refresh_uses and int(entry.get("uses", 0)) >= self.refresh_uses:
+            return True
+        if self.refresh_days:
+            try:
+                created = datetime.fromisoformat(entry.get("created_at", ""))
+            except ValueError:
+                return True
+            return now - created >= timedelta(days=self.refresh_days)
+        return False
+
+    @staged("carousel")
+    def get_plan(self, ingredient: str, fact_text: str, menu_example: str, num_slides: int, generate) -> dict:
+        """
+        Liefert einen (ggf. variierten) Plan aus dem Store oder ruft generate() auf
+        und legt das Ergebnis ab. generate: () -> {"slides": [...], "hashtags": "..."}
+        """
+        key = plan_key(ingredient, fact_text, menu_example, num_slides)
+        now = datetime.now()
+        entry = self.plans.get(key)
+        if entry and entry.get("plan", {}).get("slides") and not self._expired(entry, now):
+            self.hits += 1
+            seed = int(entry.get("uses", 0))
+            entry["uses"] = seed + 1
+            entry["last_used"] = now.isoformat(timespec="seconds")
+            self.save()
+            return vary_plan(entry["plan"], seed)
+
+        self.misses += 1
+        plan = generate()
+        if plan.get("slides"):
+            # ältere Versionen derselben Zutat entfernen
+            prefix = f"{_norm(ingredient)}|"
+            for k in [k for k in self.plans if k.startswith(prefix)]:
+                del self.plans[k]
+            self.plans[key] = {
+                "ingredient": ingredient,
+                "plan": plan,
+                "created_at": now.isoformat(timespec="seconds"),
+                "last_used": now.isoformat(timespec="seconds"),
+                "uses": 1,
+            }
+            self.save()
+        return plan
+
+    def save(self):
+        write_json(self.path, {"prompt_version": CAROUSEL_PROMPT_VERSION, "plans": self.plans}, lock=True)
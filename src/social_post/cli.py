@@ -2,32 +2,56 @@
 import argparse, datetime, re
 from dateutil.rrule import rrule, DAILY
 
-from .io_utils import read_json, write_json, test_database_connection
+from .io_utils import read_json, test_database_connection
 from .constants import (
-    ANLASS_FILE, QUOTES_FILE, USED_FILE,
-    FEED_PATTERN, FEED_PATTERN_CLOSED, CAT_CYCLE,
+    QUOTES_FILE,
+    FEED_PATTERN, FEED_PATTERN_CLOSED,
     DRIVE_PARENT_FOLDER_ID, GOOGLE_DRIVE_SA_FILE
 )
-from .menu import load_menu, get_next_product, find_menu_examples_for_ingredient
-from .notion_client import create_notion_entry
-from .posts import generate_post_content, load_quotes, build_short_fact
+from .menu import load_menu
+from .notion_client import update_notion_post
+from .sinks import PostRecord, SinkStream, build_sinks
+from .posts import generate_post_content, load_quotes, build_placeholder_post, POST_PROMPT_VERSION
 from .ingredients.overrides import load_ingredients_overrides, save_ingredients_overrides
 from .ingredients.auto import ensure_auto_ingredients
 from .ingredients.merge import merge_auto_with_overrides
-from .ingredients.enrich import enrich_overrides
+from .ingredients.enrich import run_enrichment_job
 from .schedule import compute_scheduled_datetime
-from .carousel import generate_carousel_plan, build_placeholder_carousel
+from .carousel_store import CarouselPlanStore
 from .notion_schema import ensure_notion_schema
+from .occasions import load_occasions
+from .history import HistoryStore
+from .sync import sync_from_notion
+from .publisher import run_autopost, PLATFORM_CLIENTS
+from .media_crawl import refresh_media_status, refresh_changed_media
+from .reschedule import reschedule, fixed_time
+from .media_prep import prepare_months, have_pillow, VARIANTS
+from .openai_client import reset_usage, get_usage, get_hedge_stats
+from .config import OPENAI_HEDGE
+from .routing import route_stats, route_stats_summary
+from .dedupe import SimilarityIndex, post_text
+from .artifacts import ArtifactGraph
+from .hashtags import HashtagBank
+from .watch import PlanWatcher
+from .service import PlanService, serve
+from .guardrails import guard_local
+from .rebuild import (PlanContext, ingredient_inputs, stale_facts, record_facts, record_occasions,
+                      occasion_extras, plan_subject, carousel_for, rebuild_stale_posts, record_post_node,
+                      guard_item, guard_posts, PLACEHOLDER_VERSION)
+from .templates import best_template_post, supports as template_supports, TEMPLATE_VERSION
+from .profiling import profile_run, stage, staged
 
 # ✅ optionaler, fehlertoleranter Import für Klassifizierung (z. B. Getränke)
 try:
-    from .ingredients.classify import load_meta, classify_name, allow_ingredient_post
+    from .ingredients.classify import get_classifier
     _HAS_CLASSIFY = True
 except Exception:
     _HAS_CLASSIFY = False
-    def load_meta(): return {}
-    def classify_name(name, meta): return {"category": "food", "cookable": True, "allow_ingredient_post": True}
-    def allow_ingredient_post(name, meta): return True
+    class _NoClassifier:
+        def classify(self, name): return {"category": "food", "cookable": True, "allow_ingredient_post": True}
+        def classify_many(self, names): return {n: self.classify(n) for n in names}
+        def filter_allowed(self, names): return list(names)
+    def get_classifier(meta=None): return _NoClassifier()
 
 # ✅ Drive lazy import (damit --setup-notion-fields auch ohne Google-Libs läuft)
 def _lazy_drive():
@@ -41,12 +65,6 @@ def _lazy_drive():
         print(f"⚠️ Drive deaktiviert: {e}")
         return None, None
 
-def load_used():
-    return read_json(USED_FILE, {"speisen": {}, "getränke": {}, "desserts": {}})
-
-def save_used(data):
-    write_json(USED_FILE, data)
-
 def _to_str(x) -> str:
     if isinstance(x, str):
         return x
@@ -63,26 +81,6 @@ def _slug(s: str) -> str:
     s = re.sub(r"\s+", "-", s).strip("-")
     return s
 
-def _build_placeholder_post(date, titel, beschreibung, post_type):
-    title_in = _to_str(titel)
-    desc_in  = _to_str(beschreibung)
-    title = (title_in or (post_type.title() if isinstance(post_type, str) else "Post")).strip()[:120]
-    text  = (desc_in or title).strip()[:300]
-    return {
-        "title": title or "Idee für den Tag",
-        "text": text,
-        "hashtags": "",
-        "platform_suggestion": "Instagram Post",
-        "media_type": "Bild",
-        "image_idea": "",
-        # Platzhalter — wird unten (nach evtl. Carousel-Plan) überschrieben
-        "platform_targets": [
-            {"name": "Instagram Post"},
-            {"name": "Facebook"},
-            {"name": "Google Business Profile"},
-        ],
-    }
-
 # ✅ Hilfsfunktion: Plattform korrekt für Carousel/Nicht-Carousel setzen
 def _platform_targets_for(has_carousel: bool, extra: list[str] | None = None):
     """
@@ -98,13 +96,41 @@ def _platform_targets_for(has_carousel: bool, extra: list[str] | None = None):
                 targets.append({"name": x})
     return targets
 
-def _generate_with_fallback(date, gericht, beschreibung, post_type, extras=None):
+@staged("generate")
+def _generate_with_fallback(date, gericht, beschreibung, post_type, extras=None, **kw):
     try:
-        return generate_post_content(date, gericht, beschreibung, post_type, extras=extras)
+        return generate_post_content(date, gericht, beschreibung, post_type, extras=extras, **kw)
     except TypeError:
         # falls posts.generate_post_content noch keine extras unterstützt
         return generate_post_content(date, gericht, beschreibung, post_type)
 
+def _use_alternate(spec: str, dry_run=False):
+    """'YYYY-MM-DD[:IDX]' → gespeicherte Alternative wählen und in Notion übernehmen."""
+    date_str, _, idx = spec.partition(":")
+    history = HistoryStore()
+    post = history.latest_post_on(date_str)
+    if not post:
+        raise SystemExit(f"❌ Kein Post für {date_str} in der Historie.")
+    cand = history.choose_candidate(post["id"], int(idx) if idx else None)
+    if not cand:
+        raise SystemExit(f"❌ Keine (weitere) Alternative für {date_str} gespeichert.")
+    # gespeicherte Alternativen stammen evtl. aus der Zeit vor den Guardrails → lokal prüfen/korrigieren
+    extras = {}
+    if post["post_type"] == "anlass":
+        extras = {"anlass_name": post["subject"]}
+    elif post["post_type"] == "ingredient_fact":
+        c = get_classifier().classify(post["subject"] or "")
+        extras = {"category": c.get("category"), "cookable": c.get("cookable", True)}
+    item = {"obj": cand, "post_type": post["post_type"], "extras": extras,
+            "fallback": post["text"] or "", "title": post["subject"] or ""}
+    if guard_local([item]):
+        history.update_post(post["id"], title=cand.get("title"), text=cand.get("text"), hashtags=cand.get("hashtags"))
+        print(f"🩹 {date_str}: Alternative an die Guardrails angepasst")
+    print(f"🔁 {date_str}: {cand.get('title')} — {(cand.get('text') or '')[:120]}")
+    if post["notion_page_id"] and not dry_run:
+        update_notion_post(post["notion_page_id"], cand)
+        print(f"✅ Notion aktualisiert: {post['notion_page_id']}")
+
 # ✅ Neu: nie zwei Tage hintereinander derselbe Posttyp
 def pick_from_pool(pool, idx, prev_type):
     """
@@ -130,88 +156,268 @@ def main():
     parser.add_argument("--start", required=False, help="Startdatum YYYY-MM-DD")
     parser.add_argument("--days", type=int, default=30, help="Anzahl Tage (Standard 30)")
     parser.add_argument("--dry-run", action="store_true", help="Nur erzeugen, nicht in Notion schreiben")
+    parser.add_argument("--sink", default="notion",
+                        help="Ausgabeziele, kommagetrennt: notion, jsonl, csv, sqlite (Standard: notion).")
+    parser.add_argument("--sink-dir", default="out",
+                        help="Zielordner für jsonl/csv/sqlite-Sinks (Standard: out/).")
+    parser.add_argument("--sink-batch", type=int, default=10,
+                        help="Batchgröße der Sinks; max. 2×Batch Posts warten auf das Schreiben.")
+    parser.add_argument("--guard-window", type=int, default=14,
+                        help="Posts pro Guardrail-Pass: gemeinsam geprüft, Verstöße gezielt neu generiert, "
+                             "erst danach an die Sinks (0 = alle Posts des Laufs).")
     parser.add_argument("--regen-auto-ingredients", action="store_true",
                         help="Auto-Zutaten aus Karte neu generieren (auch wenn Menü unverändert)")
     parser.add_argument("--export-auto-ingredients", action="store_true",
                         help="Nur Auto-Zutaten erzeugen/aktualisieren und dann beenden")
     parser.add_argument("--verbose", action="store_true", help="Mehr Fortschrittsausgaben")
+    parser.add_argument("--dedupe-threshold", type=float, default=0.6,
+                        help="Ähnlichkeit (0–1) zu früheren Posts, ab der neu generiert wird (0 = aus).")
+    parser.add_argument("--dedupe-retries", type=int, default=2,
+                        help="Max. Neu-Generierungen pro Post bei zu hoher Ähnlichkeit.")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Kandidaten pro Post in einem Request (n>1); der beste wird lokal gewählt, "
+                             "die übrigen als Alternativen in der Historie gespeichert.")
+    parser.add_argument("--use-alternate", metavar="YYYY-MM-DD[:IDX]",
+                        help="Für den Post dieses Datums auf eine gespeicherte Alternative wechseln "
+                             "(ohne IDX: nächstbeste) – ohne neuen LLM-Aufruf – und beenden.")
+    parser.add_argument("--rebuild-occasions", action="store_true",
+                        help="Anlass-Kalender (data/anlass_store.json) neu kompilieren, auch wenn Quellen unverändert.")
 
     # Ingredient-Enrichment & Kontrolle
     parser.add_argument("--enrich-ingredients", action="store_true",
                         help="Approved Zutaten mit KI anreichern (nur zu kurze/fehlende 'fact'-Texte).")
     parser.add_argument("--enrich-only", action="store_true",
                         help="Nur Zutaten anreichern und beenden (keine Posts erzeugen).")
-    parser.add_argument("--enrich-limit", type=int, default=8,
+    parser.add_argument("--enrich-limit", type=int, default=0,
                         help="Max. Anzahl Zutaten für KI-Anreicherung in diesem Lauf (0 = unbegrenzt).")
+    parser.add_argument("--enrich-workers", type=int, default=6,
+                        help="Parallele Anreicherungs-Jobs (zusätzlich begrenzt durch OPENAI_MAX_CONCURRENCY).")
     parser.add_argument("--skip-ai", action="store_true",
                         help="Keine OpenAI-Aufrufe (schneller Testlauf mit Platzhalter-Posts).")
+    parser.add_argument("--rebuild-stale", nargs="?", const=datetime.date.today().isoformat(), metavar="YYYY-MM-DD",
+                        help="Nur Posts ab Datum (Standard: heute, Horizont 366 Tage) neu erzeugen, deren Gericht/Fakt/Anlass/Prompt "
+                             "sich seit der Generierung geändert hat; aktualisiert Historie und Notion.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Prozess warm halten: Daten-Dateien (Menü, Anlässe, Zutaten, Zitate) beobachten und "
+                             "betroffene Tage ab heute (--days) neu planen/erzeugen und in Notion aktualisieren.")
+    parser.add_argument("--watch-interval", type=float, default=2.0,
+                        help="Prüfintervall für --watch in Sekunden (Standard 2).")
+    parser.add_argument("--serve", nargs="?", const="127.0.0.1:8765", metavar="[HOST:]PORT",
+                        help="Lokalen HTTP-Dienst starten (Standard 127.0.0.1:8765): /plan, /generate-day, "
+                             "/regenerate-post, /enrich-ingredient – Kontext bleibt geladen.")
+    parser.add_argument("--serve-concurrency", type=int, default=4,
+                        help="Max. parallele LLM-Anfragen im Dienst (Standard 4).")
+    parser.add_argument("--template-posts", choices=["fallback", "always", "off"], default="fallback",
+                        help="Zitat-/Anlass-Posts aus lokalen Vorlagen: 'always' = nie OpenAI für diese Typen, "
+                             "'fallback' = bei --skip-ai oder OpenAI-Fehler (Standard), 'off' = nie.")
     parser.add_argument("--write-enriched-overrides", action="store_true",
-                        help="Angereicherte Texte dauerhaft in data/ingredients_overrides.json speichern.")
+                        help="(Veraltet) Angereicherte Texte werden jetzt immer sofort atomar gespeichert.")
 
     # Carousel
     parser.add_argument("--carousel-ingredients", action="store_true",
                         help="Ingredient-Posts als Instagram-Karussell planen (Carousel-Plan enthält Slide-Plan).")
     parser.add_argument("--carousel-slides", type=int, default=6,
                         help="Anzahl Slides pro Ingredient-Karussell (z. B. 5–7).")
+    parser.add_argument("--carousel-refresh-uses", type=int, default=0,
+                        help="Gespeicherten Karussell-Plan nach N Verwendungen neu generieren (0 = nie).")
+    parser.add_argument("--carousel-refresh-days", type=int, default=0,
+                        help="Gespeicherten Karussell-Plan nach D Tagen neu generieren (0 = nie).")
+
+    # Notion → Historie
+    parser.add_argument("--sync", action="store_true",
+                        help="Seit dem letzten Sync geänderte Notion-Seiten (Status, Texte, Post-ID, Fehler) "
+                             "in die lokale Historie übernehmen und beenden.")
+    parser.add_argument("--sync-since", metavar="ISO",
+                        help="Cursor für --sync überschreiben (z. B. 2025-01-01T00:00:00Z).")
+
+    # Auto-Posting
+    parser.add_argument("--autopost", action="store_true",
+                        help="Worker starten: Seiten mit 'Automatisch posten' zum geplanten Zeitpunkt veröffentlichen.")
+    parser.add_argument("--autopost-client", default="local", choices=sorted(PLATFORM_CLIENTS),
+                        help="Plattform-Client für --autopost (Standard: local = nur out/published.jsonl).")
+    parser.add_argument("--autopost-refresh", type=int, default=900,
+                        help="Sekunden zwischen Notion-Refreshes der Queue (nur geänderte Seiten, Standard 900).")
+    parser.add_argument("--autopost-once", action="store_true",
+                        help="Nur aktuell fällige Posts veröffentlichen und beenden (z. B. für Cron).")
+
+    # Bestehende Entwürfe neu terminieren
+    parser.add_argument("--reschedule", metavar="YYYY-MM-DD",
+                        help="Zeitpunkte der Notion-Entwürfe ab Datum (--days Tage) neu berechnen und nur das "
+                             "Datumsfeld abweichender Seiten patchen (mit --dry-run: nur Differenz), dann beenden.")
+    parser.add_argument("--reschedule-shift", type=int, default=0, metavar="TAGE",
+                        help="Entwürfe dabei um N Tage verschieben (Anlass-Posts bleiben, belegte Tage werden "
+                             "übersprungen).")
+    parser.add_argument("--reschedule-time", metavar="HH:MM",
+                        help="Feste Uhrzeit statt der Wochentag/Post-Typ-Strategie aus schedule.py.")
+
+    # Medien aus Drive einsammeln
+    parser.add_argument("--crawl-media", metavar="YYYY-MM[,YYYY-MM]",
+                        help="Drive-Monatsordner crawlen und Primary/Carousel FileIds + Media Status in Notion "
+                             "abgleichen, dann beenden.")
+
+    parser.add_argument("--media-sync", action="store_true",
+                        help="Nur Drive-Änderungen seit dem letzten Aufruf (Changes-Feed) in Notion übernehmen, "
+                             "dann beenden. Beim ersten Mal wird der Ordnerbaum einmal vollständig gelesen.")
+    parser.add_argument("--prepare-media", metavar="YYYY-MM[,YYYY-MM]",
+                        help="Bilder der Post-Ordner in Plattform-Varianten umrechnen und neben die Originale "
+                             "hochladen (benötigt Pillow), dann beenden.")
+    parser.add_argument("--media-variants", default=",".join(VARIANTS),
+                        help=f"Varianten für --prepare-media (Standard: {','.join(VARIANTS)}).")
+    parser.add_argument("--media-workers", type=int, default=0,
+                        help="Prozesse für die Bildaufbereitung (0 = Anzahl CPU-Kerne).")
 
     # Notion-Felder automatisch anlegen/ergänzen
     parser.add_argument("--setup-notion-fields", action="store_true",
                         help="Fehlende Notion-Properties & Select-Optionen automatisch anlegen/ergänzen und beenden.")
 
-    args = parser.parse_args()
+    # Profiling
+    parser.add_argument("--profile", nargs="?", const="out/profile", metavar="ORDNER",
+                        help="Lauf profilieren: Zeit je Stage (Wall/CPU/Warten), Sampling-Profil als "
+                             "Collapsed-Stack-Datei (Flamegraph) + Top-N-Bericht (Standard: out/profile).")
+    parser.add_argument("--profile-interval", type=float, default=5.0,
+                        help="Sampling-Intervall in Millisekunden (Standard 5).")
+    parser.add_argument("--profile-top", type=int, default=25,
+                        help="Anzahl Funktionen im Top-N-Bericht (Standard 25).")
 
-    # Notion erreichbar?
-    test_database_connection()
+    args = parser.parse_args()
+    if args.profile:
+        with profile_run(args.profile, interval_ms=args.profile_interval, top=args.profile_top):
+            return _run(args, parser)
+    return _run(args, parser)
+
+def _run(args, parser):
+    # Notion erreichbar? (nur wenn Notion gebraucht wird)
+    needs_notion = ("notion" in args.sink.lower() or args.setup_notion_fields or args.use_alternate or args.sync
+                    or args.autopost or args.crawl_media or args.media_sync or args.reschedule)
+    if needs_notion:
+        test_database_connection()
 
     # Optionaler Schema-Setup-Modus (früh raus)
     if args.setup_notion_fields:
         ensure_notion_schema(verbose=True)
         return
 
+    # Alternative aus der Historie übernehmen (früh raus)
+    if args.use_alternate:
+        _use_alternate(args.use_alternate, dry_run=args.dry_run)
+        return
+
+    # Notion-Änderungen zurückholen (früh raus)
+    if args.sync:
+        history = HistoryStore()
+        stats = sync_from_notion(history, since=args.sync_since, verbose=args.verbose)
+        print(f"🔄 Sync: {stats['seen']} geänderte Seiten – {stats['updated']} aktualisiert, "
+              f"{stats['inserted']} neu, {stats['unchanged']} unverändert. Cursor: {stats['cursor'] or '-'}")
+        return
+
+    # Entwürfe neu terminieren – nur Notion-Datumsfeld + Historie, keine LLM-Aufrufe (früh raus)
+    if args.reschedule:
+        since = datetime.date.fromisoformat(args.reschedule)
+        try:
+            strategy = fixed_time(args.reschedule_time) if args.reschedule_time else None
+        except ValueError:
+            parser.error(f"--reschedule-time erwartet HH:MM, nicht {args.reschedule_time!r}.")
+        stats = reschedule(since, since + datetime.timedelta(days=args.days - 1), HistoryStore(), ArtifactGraph(),
+                           shift_days=args.reschedule_shift, strategy=strategy,
+                           dry_run=args.dry_run, verbose=args.verbose)
+        print(f"🕒 Neu terminiert: {stats['changed']} von {stats['pages']} Entwürfen geändert"
+              + (" (Dry-Run)" if args.dry_run else f" – {stats['updated']} aktualisiert, {stats['failed']} Fehler")
+              + f", {stats['unchanged']} unverändert, {stats['skipped']} übersprungen.")
+        return
+
+    # Auto-Posting-Worker (früh raus)
+    if args.autopost:
+        poster = run_autopost(args.autopost_client, refresh_interval=args.autopost_refresh,
+                              once=args.autopost_once, dry_run=args.dry_run,
+                              history=HistoryStore(), verbose=args.verbose)
+        print(f"📊 Auto-Posting: {poster.published} veröffentlicht, {poster.failed} fehlgeschlagen.")
+        return
+
+    # Medien-Status für ganze Monate (früh raus)
+    if args.crawl_media:
+        drive_service, _ = _lazy_drive()
+        if not drive_service:
+            raise SystemExit("❌ --crawl-media benötigt DRIVE_PARENT_FOLDER_ID und GOOGLE_DRIVE_SA_FILE.")
+        months = [m.strip() for m in args.crawl_media.split(",") if m.strip()]
+        stats = refresh_media_status(drive_service, DRIVE_PARENT_FOLDER_ID, months,
+                                     dry_run=args.dry_run, verbose=args.verbose)
+        print(f"🖼️ Medien: {stats['folders']} Ordner, {stats['pages']} Seiten – "
+              f"{stats['updated']} aktualisiert, {stats['failed']} Fehler.")
+        return
+
+    if args.media_sync:
+        drive_service, _ = _lazy_drive()
+        if not drive_service:
+            raise SystemExit("❌ --media-sync benötigt DRIVE_PARENT_FOLDER_ID und GOOGLE_DRIVE_SA_FILE.")
+        stats = refresh_changed_media(drive_service, DRIVE_PARENT_FOLDER_ID, dry_run=args.dry_run, verbose=args.verbose)
+        print(f"🖼️ Medien (Änderungen): {stats['pages']} Seiten geprüft – "
+              f"{stats['updated']} aktualisiert, {stats['failed']} Fehler.")
+        return
+
+    # Bildvarianten rechnen (früh raus)
+    if args.prepare_media:
+        if not have_pillow():
+            raise SystemExit("❌ --prepare-media benötigt Pillow (pip install Pillow).")
+        drive_service, _ = _lazy_drive()
+        if not drive_service:
+            raise SystemExit("❌ --prepare-media benötigt DRIVE_PARENT_FOLDER_ID und GOOGLE_DRIVE_SA_FILE.")
+        names = [v.strip() for v in args.media_variants.split(",") if v.strip()]
+        unknown = [v for v in names if v not in VARIANTS]
+        if unknown:
+            parser.error(f"Unbekannte Variante(n): {', '.join(unknown)} (erlaubt: {', '.join(VARIANTS)})")
+        months = [m.strip() for m in args.prepare_media.split(",") if m.strip()]
+        stats = prepare_months(drive_service, DRIVE_PARENT_FOLDER_ID, months,
+                               variants={v: VARIANTS[v] for v in names}, workers=args.media_workers,
+                               dry_run=args.dry_run, verbose=args.verbose)
+        print(f"🖼️ Bilder: {stats['originals']} Originale – {stats['rendered']} aufbereitet, "
+              f"{stats['cached']} unverändert, {stats['failed']} Fehler.")
+        if stats["skipped"]:
+            print(f"⏭️ {stats['skipped']} HEIC/HEIF-Fotos übersprungen (pip install pillow-heif).")
+        return
+
     # Startdatum nur in normalen Modi erforderlich
-    if not args.start and not args.export_auto_ingredients and not args.enrich_only:
-        parser.error("--start ist erforderlich (außer bei --setup-notion-fields, --export-auto-ingredients oder --enrich-only).")
+    if (not args.start and not args.export_auto_ingredients and not args.enrich_only and not args.rebuild_stale
+            and not args.watch and not args.serve):
+        parser.error("--start ist erforderlich (außer bei --setup-notion-fields, --export-auto-ingredients, --enrich-only, "
+                     "--rebuild-stale, --watch oder --serve).")
 
     # Menü laden
     sp, gt, ds = load_menu()
 
+    # Abhängigkeiten abgeleiteter Daten (Gerichte → Zutaten → Beispiele/Fakten → Posts)
+    graph = ArtifactGraph()
+
     # Zutaten-Workflow (Auto & Overrides)
     overrides_by_name = load_ingredients_overrides()
     auto_payload = ensure_auto_ingredients(
         sp, gt, ds,
         force=args.regen_auto_ingredients,
-        verbose=args.verbose
+        verbose=args.verbose,
+        graph=graph,
     )
 
     if args.export_auto_ingredients:
+        graph.save()
         print("📦 Auto-Zutaten exportiert (für Review): data/ingredients_auto.json")
         return
 
-    approved_auto_names = [it["name"] for it in auto_payload.get("ingredients", []) if it.get("approved")]
-
-    # (optional) Klassifizierung laden & filtern (z. B. Getränke nicht als Ingredient-Post)
-    meta = load_meta()
-    approved_auto_names = [n for n in approved_auto_names if allow_ingredient_post(n, meta)]
+    # Freigegebene Zutaten (Klassifizierung filtert z. B. Getränke) + Menü-Beispiele je Zutat
+    classifier = get_classifier()
+    approved_auto_names, menu_examples_map = ingredient_inputs(sp, gt, ds, auto_payload, classifier, graph)
 
-    # Menü-Beispiele je Zutat
-    menu_examples_map = {}
-    for nm in approved_auto_names:
-        key = (nm or "").strip().lower()
-        menu_examples_map[key] = find_menu_examples_for_ingredient(nm, sp, gt, ds)
-
-    # Optional: KI-Anreicherung (RAM)
+    # Optional: KI-Anreicherung (parallel, Fortschritt in data/enrich_job.json, Ergebnisse sofort gespeichert)
+    refreshed = []
     if args.enrich_ingredients and not args.skip_ai:
-        enrich_targets = approved_auto_names
-        if args.enrich_limit and args.enrich_limit > 0:
-            enrich_targets = enrich_targets[:args.enrich_limit]
         if args.verbose:
-            print(f"🧠 Anreicherung starten: {len(enrich_targets)} Zutaten (Limit={args.enrich_limit})")
-        overrides_by_name = enrich_overrides(
-            enrich_targets, overrides_by_name, menu_examples_map, min_chars=100
+            print(f"🧠 Anreicherung starten: {len(approved_auto_names)} Zutaten (Limit={args.enrich_limit}, Worker={args.enrich_workers})")
+        counts = run_enrichment_job(
+            approved_auto_names, overrides_by_name, menu_examples_map,
+            min_chars=100, workers=args.enrich_workers, limit=args.enrich_limit,
+            persist=save_ingredients_overrides, refresh=stale_facts(graph, menu_examples_map), verbose=args.verbose,
         )
-        if args.write_enriched_overrides:
-            path = save_ingredients_overrides(overrides_by_name)
-            print(f"💾 Overrides aktualisiert: {path}")
+        print(f"💾 Anreicherung: {counts['done']} fertig, {counts['failed']} fehlgeschlagen, "
+              f"{counts['skipped']} übersprungen → data/ingredients_overrides.json")
+        refreshed = counts["refreshed"]
     elif args.enrich_ingredients and args.skip_ai and args.verbose:
         print("🧠 Anreicherung übersprungen (--skip-ai aktiv).")
 
@@ -227,18 +433,131 @@ def main():
 
     # Merge: Nur approved Auto-Zutaten + passende Overrides (die im Menü vorkommen)
     INGREDIENTS = merge_auto_with_overrides(approved_auto_names, overrides_by_name, max_items=60)
+    record_facts(graph, INGREDIENTS, refreshed=set(refreshed))
+    if args.verbose:
+        changed = sorted({k.split(":", 1)[0] for k in graph.changed})
+        if graph.changed:
+            print(f"🔗 Artefakt-Graph: {len(graph.changed)} geänderte Knoten ({', '.join(changed)})")
 
     QUOTES = load_quotes(read_json, QUOTES_FILE)
-    anlass = read_json(ANLASS_FILE, {})
-    used = load_used()
+    # Content-Historie (SQLite) – Quelle für alle Rotationen
+    history = HistoryStore()
+    history.start_run(dry_run=args.dry_run, args=vars(args))
+
+    start_date = datetime.datetime.strptime(args.start or args.rebuild_stale or datetime.date.today().isoformat(),
+                                            "%Y-%m-%d")
+    end_exclusive = start_date + datetime.timedelta(days=args.days if args.start or args.watch else 366)
+    if args.serve:
+        end_exclusive = max(end_exclusive, start_date + datetime.timedelta(days=366))
+
+    # Anlässe für alle Jahre des Planungshorizonts (kompiliert & gecacht)
+    first_year, last_year = start_date.year, (end_exclusive - datetime.timedelta(days=1)).year
+    anlass = load_occasions(first_year, last_year, force=args.rebuild_occasions, verbose=args.verbose)
+    record_occasions(graph, anlass, first_year, last_year)
+
+    # Karussell-Pläne werden pro Zutat/Fakt wiederverwendet (data/carousel_plans.json)
+    carousel_store = CarouselPlanStore(refresh_uses=args.carousel_refresh_uses,
+                                       refresh_days=args.carousel_refresh_days)
+
+    ctx = PlanContext(sp, gt, ds, INGREDIENTS, classifier, menu_examples_map, anlass, history, graph,
+                      quotes=QUOTES, carousel_store=carousel_store,
+                      carousel_ingredients=args.carousel_ingredients, carousel_slides=args.carousel_slides,
+                      skip_ai=args.skip_ai, template_posts=args.template_posts,
+                      hashtags=HashtagBank(history))
+
+    # Bestehende Notion-Seiten nach Neu-Generierung/Neuplanung aktualisieren
+    push = "notion" in args.sink.lower()
+    def _push_update(row, obj):
+        if row["notion_page_id"]:
+            update_notion_post(row["notion_page_id"], obj)
+    def _push_replan(row, obj, post_type, scheduled_dt):
+        if row["notion_page_id"]:
+            update_notion_post(row["notion_page_id"], obj, post_type=post_type, datetime=scheduled_dt)
+
+    # Nur veraltete zukünftige Posts neu erzeugen (früh raus)
+    if args.rebuild_stale:
+        # gleicher Horizont wie die geladenen Anlässe – spätere Anlass-Posts wären sonst "ohne Thema"
+        until = (end_exclusive - datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        stats = rebuild_stale_posts(
+            ctx, args.rebuild_stale, until, workers=args.enrich_workers, dry_run=args.dry_run, verbose=args.verbose,
+            on_update=_push_update if push else None,
+        )
+        print(f"♻️ Neu-Generierung: {stats['rebuilt']} von {stats['stale']} veralteten Posts erneuert, "
+              f"{stats['fresh']} aktuell, {stats['gone']} ohne Thema, {stats['failed']} Fehler"
+              + (f", {stats['unknown']} ohne Abhängigkeitsdaten" if stats["unknown"] else "") + ".")
+        return
+
+    # Watch-Modus: Kontext bleibt geladen, Änderungen an den Daten-Dateien → betroffene Tage (früh raus)
+    if args.watch:
+        watcher = PlanWatcher(ctx, args.days, interval=args.watch_interval, workers=args.enrich_workers,
+                              dry_run=args.dry_run, verbose=args.verbose,
+                              on_update=_push_update if push else None,
+                              on_replan=_push_replan if push else None)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print(f"👋 Watch beendet ({watcher.cycles} Abgleiche).")
+        return
+
+    # HTTP-Dienst: Kontext bleibt geladen, einzelne Tage/Posts/Zutaten auf Anfrage (früh raus)
+    if args.serve:
+        host, _, port = args.serve.rpartition(":")
+        service = PlanService(ctx, build_sinks(args.sink, args.sink_dir, dry_run=args.dry_run),
+                              max_concurrency=args.serve_concurrency, dry_run=args.dry_run, verbose=args.verbose,
+                              push=push, years=(first_year, last_year))
+        serve(service, host or "127.0.0.1", int(port))
+        return
+
+    # Ähnlichkeitsindex über alle bisher generierten Posts (data/post_similarity.json)
+    sim_index = SimilarityIndex()
 
-    start_date = datetime.datetime.strptime(args.start, "%Y-%m-%d")
-    end_exclusive = start_date + datetime.timedelta(days=args.days)
+    # Ausgabe: Sinks laufen in einem Writer-Thread (Batches + Backpressure)
+    def _on_written(rec, results, error):
+        page_id = results.get("notion")
+        if error is not None:
+            status = "failed"
+        elif args.dry_run:
+            status = "dry_run"
+        else:
+            status = "draft" if page_id else "exported"
+        history.update_post(rec.meta["history_id"], status=status, notion_page_id=page_id)
+
+    stream = SinkStream(build_sinks(args.sink, args.sink_dir, dry_run=args.dry_run),
+                        batch_size=args.sink_batch, max_pending=2 * args.sink_batch, on_result=_on_written)
+
+    # Guardrails: Posts fensterweise sammeln, gemeinsam prüfen, erst danach an die Sinks
+    pending: list[tuple[PostRecord, dict]] = []
+    guard_stats = {"checked": 0, "failed": 0, "regenerated": 0, "fixed": 0, "remaining": 0}
+
+    def _flush_pending():
+        if not pending:
+            return
+        with stage("guardrails"):
+            stats = guard_posts(ctx, [g for _, g in pending], workers=args.enrich_workers, verbose=args.verbose)
+        for k, v in stats.items():
+            guard_stats[k] += v
+        # gespeicherte Alternativen (--use-alternate) nur lokal korrigieren – kein Modell-Aufruf
+        guard_local([{**g, "obj": alt} for _, g in pending for alt in g["alternates"]])
+        for rec, g in pending:
+            if g.get("changed"):
+                d, subject = rec.date.strftime("%Y-%m-%d"), rec.meta["subject"]
+                history.update_post(rec.meta["history_id"], title=rec.obj.get("title"), text=rec.obj.get("text"),
+                                    hashtags=rec.obj.get("hashtags"))
+                record_post_node(graph, d, rec.post_type, rec.obj, subject, g["content"]["category"],
+                                 rec.meta["history_id"], g["version"])
+                if g["indexed"]:
+                    sim_index.add(f"{d}:{rec.post_type}", post_text(rec.obj), date=d,
+                                  post_type=rec.post_type, subject=subject)
+            if g["alternates"]:
+                history.record_candidates(rec.meta["history_id"], [{**rec.obj, "score": g["score"]}] + g["alternates"])
+            with stage("sinks"):   # blockiert, wenn die Sinks im Rückstand sind
+                stream.put(rec)
+        pending.clear()
 
     # Drive vorbereiten (falls konfiguriert)
     drive_service, ensure_folder_path = _lazy_drive()
 
-    i_open = i_closed = i_quotes = i_ingredients = 0
+    i_open = i_closed = 0
     # ⬇️ Neu: wir merken uns den Posttyp von gestern
     prev_post_type = None
 
@@ -252,36 +571,16 @@ def main():
         beschreibung = ""
         extras = {}
         carousel_plan = None
+        ref = category = ""
+        reset_usage()
 
         # Vorrang: Anlass
         if datum_str in anlass:
             post_type = "anlass"
-            ev = anlass[datum_str]
-            anlass_name = ""
-            anlass_cat  = ""
-            hashtags_override = ""
-            image_idea_override = ""
-            cta_override = ""
-
-            if isinstance(ev, dict):
-                anlass_name = (ev.get("beschreibung") or ev.get("titel") or "").strip()
-                anlass_cat  = (ev.get("kategorie") or "").strip()
-                hashtags_override = (ev.get("hashtags") or "").strip()
-                image_idea_override = (ev.get("image_idea") or "").strip()
-                cta_override = (ev.get("cta") or "").strip()
-            else:
-                anlass_name = str(ev).strip()
-
-            gericht = anlass_name or "Besonderer Anlass"
+            anlass_name, anlass_cat, extras = occasion_extras(anlass[datum_str])
+            gericht = ref = anlass_name or "Besonderer Anlass"
+            category = anlass_cat
             beschreibung = f"Heute ist ein besonderer Tag: {gericht}"
-            extras = {
-                **extras,
-                "anlass_name": anlass_name,
-                "anlass_cat": anlass_cat,
-                "hashtags_override": hashtags_override,
-                "image_idea_override": image_idea_override,
-                "cta_override": cta_override,
-            }
 
         # Ruhetage (kein Produkt)
         elif ruhetag:
@@ -290,32 +589,8 @@ def main():
             if args.verbose:
                 print(f"📅 {dt.date()} (Ruhetag) → {post_type}")
 
-            if post_type == "zitat":
-                quotes = QUOTES or [{"author": "Kaspio", "quote": "Gutes Essen. Guter Tag.", "source": "Hauszitat"}]
-                q = quotes[i_quotes % len(quotes)]; i_quotes += 1
-                gericht = q["author"]
-                beschreibung = f'{q["quote"]} — {q["source"]}'
-            else:  # ingredient_fact
-                if INGREDIENTS:
-                    ing = INGREDIENTS[i_ingredients % len(INGREDIENTS)]; i_ingredients += 1
-                    gericht = ing["name"]
-                    beschreibung = build_short_fact(ing, max_chars=420)
-                    c = classify_name(gericht, meta)
-                    ex = menu_examples_map.get(gericht.strip().lower()) or []
-                    example = ex[0] if ex else ""
-                    extras = {
-                        "menu_example": example,
-                        "category": c.get("category"),
-                        "cookable": c.get("cookable", True),
-                    }
-                    if args.carousel_ingredients:
-                        if args.skip_ai:
-                            carousel_plan = build_placeholder_carousel(gericht, beschreibung, example, num_slides=args.carousel_slides)
-                        else:
-                            carousel_plan = generate_carousel_plan(gericht, beschreibung, example, num_slides=args.carousel_slides)
-                else:
-                    gericht = "Frische Zutat"
-                    beschreibung = "Kurz & knackig zubereitet schmeckt’s am besten."
+            subj = plan_subject(ctx, dt, post_type)
+            carousel_plan = carousel_for(ctx, subj)
 
         # Normale (offene) Tage
         else:
@@ -324,49 +599,69 @@ def main():
             if args.verbose:
                 print(f"📅 {dt.date()} → {post_type}")
 
-            if post_type == "produkt":
-                cat_name = CAT_CYCLE[dt.day % 3]
-                prod_dict = sp if cat_name == "speisen" else gt if cat_name == "getränke" else ds
-                gericht = get_next_product(used, prod_dict, cat_name, dt)
-                beschreibung = (prod_dict.get(gericht, "") or "").strip()
-
-            elif post_type == "zitat":
-                quotes = QUOTES or [{"author": "Kaspio", "quote": "Gutes Essen. Guter Tag.", "source": "Hauszitat"}]
-                q = quotes[i_quotes % len(quotes)]; i_quotes += 1
-                gericht = q["author"]
-                beschreibung = f'{q["quote"]} — {q["source"]}'
-
-            else:  # ingredient_fact
-                if INGREDIENTS:
-                    ing = INGREDIENTS[i_ingredients % len(INGREDIENTS)]; i_ingredients += 1
-                    gericht = ing["name"]
-                    beschreibung = build_short_fact(ing, max_chars=420)
-                    c = classify_name(gericht, meta)
-                    ex = menu_examples_map.get(gericht.strip().lower()) or []
-                    example = ex[0] if ex else ""
-                    extras = {
-                        "menu_example": example,
-                        "category": c.get("category"),
-                        "cookable": c.get("cookable", True),
-                    }
-                    if args.carousel_ingredients:
-                        if args.skip_ai:
-                            carousel_plan = build_placeholder_carousel(gericht, beschreibung, example, num_slides=args.carousel_slides)
-                        else:
-                            carousel_plan = generate_carousel_plan(gericht, beschreibung, example, num_slides=args.carousel_slides)
-                else:
-                    gericht = "Frische Zutat"
-                    beschreibung = "Kurz & knackig zubereitet schmeckt’s am besten."
+            subj = plan_subject(ctx, dt, post_type)
+            carousel_plan = carousel_for(ctx, subj)
+
+        if post_type != "anlass":
+            gericht, ref, category = subj["gericht"], subj["ref"], subj["category"]
+            beschreibung, extras = subj["beschreibung"], subj["extras"]
 
         # --- String-Normalisierung (sicher gegen dict/None) ---
         gericht_str = _to_str(gericht)
         beschreibung_str = _to_str(beschreibung)
 
         # --- Inhalt erzeugen ---
-        if args.skip_ai:
-            obj = _build_placeholder_post(dt, gericht_str or (post_type.title() if isinstance(post_type, str) else "Post"), beschreibung_str, post_type)
-        else:
-            obj = _generate_with_fallback(dt, gericht_str, beschreibung_str, post_type, extras=extras)
+        own_id = f"{datum_str}:{post_type}"  # eigener Post aus einem früheren Lauf zählt nicht als Duplikat
+        use_template = template_supports(post_type) and (
+            args.template_posts == "always" or (args.skip_ai and args.template_posts == "fallback"))
+        obj = None
+        if use_template:
+            obj = best_template_post(dt, gericht_str, beschreibung_str, post_type, extras,
+                                     sim_index=sim_index, own_id=own_id)
+            use_template = obj is not None
+            post_version = TEMPLATE_VERSION
+            if use_template and args.verbose:
+                print(f"🧩 {dt.date()} {post_type} aus Vorlage (0 Tokens)")
+        if obj is None and args.skip_ai:
+            post_version = PLACEHOLDER_VERSION
+            obj = build_placeholder_post(dt, gericht_str or (post_type.title() if isinstance(post_type, str) else "Post"), beschreibung_str, post_type)
+        elif obj is None:
+            post_version = POST_PROMPT_VERSION
+            gen_kw = {"candidates": args.candidates, "sim_index": sim_index} if args.candidates > 1 else {}
+            try:
+                obj = _generate_with_fallback(dt, gericht_str, beschreibung_str, post_type,
+                                              extras={**extras, "own_id": own_id}, **gen_kw)
+            except Exception as e:
+                # Zitat/Anlass: lieber ein Vorlagen-Post als ein Abbruch
+                if args.template_posts == "off" or not template_supports(post_type):
+                    raise
+                obj = best_template_post(dt, gericht_str, beschreibung_str, post_type, extras,
+                                         sim_index=sim_index, own_id=own_id)
+                if obj is None:
+                    raise
+                use_template, post_version = True, TEMPLATE_VERSION
+                print(f"{dt.date()} ⚠️ OpenAI fehlgeschlagen ({e}) → {post_type} aus Vorlage")
+            # Near-Duplicate zu früheren Posts? → gezielt neu generieren, den unähnlichsten behalten
+            if args.dedupe_threshold > 0 and not use_template:
+                sim, dup_id = sim_index.query(post_text(obj), exclude=own_id)
+                tries = 0
+                while sim >= args.dedupe_threshold and tries < args.dedupe_retries:
+                    tries += 1
+                    if args.verbose:
+                        print(f"♻️ {dt.date()} ähnlich zu {dup_id} ({sim:.2f}) → Neu-Generierung {tries}")
+                    alt = _generate_with_fallback(dt, gericht_str, beschreibung_str, post_type,
+                                                  extras={**extras, "own_id": own_id, "avoid_text": obj.get("text", "")},
+                                                  **gen_kw)
+                    alt_sim, alt_id = sim_index.query(post_text(alt), exclude=own_id)
+                    if alt_sim < sim:
+                        obj, sim, dup_id = alt, alt_sim, alt_id
+
+        alternates = obj.pop("alternates", [])
+        chosen_score = obj.pop("chosen_score", None)
+
+        # Hashtags aus der lokalen Bank (Thema, Kategorie, Anlass, Historie; divers zu den Vortagen)
+        for o in [obj] + alternates:
+            ctx.hashtags.apply(o, post_type, datum_str, gericht_str, category, extras)
 
         # Wenn wir ein Karussell haben: Plan dazu packen
         if carousel_plan:
@@ -399,22 +694,59 @@ def main():
             except Exception as e:
                 print(f"{dt.date()} ⚠️ Drive-Ordner konnte nicht erstellt werden: {e}")
 
-        # --- Nach Notion (oder Dry-Run) ---
-        try:
-            create_notion_entry(
-                dt, obj, post_type,
-                dry_run=args.dry_run,
-                scheduled_dt=scheduled_dt,
-                media_folder_name=media_folder_name,
-                media_link=media_link
-            )
-        except Exception as e:
-            print(dt.date(), f"❌ Notion Fehler:", e)
+        # --- Historie (Status/Page-ID ergänzt der Sink-Writer) ---
+        usage = get_usage()
+        post_id = history.record_post(
+            date=datum_str, post_type=post_type, subject=gericht_str, ref=ref, category=category,
+            status="dry_run" if args.dry_run else "generated",
+            title=obj.get("title"), text=obj.get("text"), hashtags=obj.get("hashtags"),
+            carousel=carousel_plan, scheduled_at=scheduled_dt.isoformat(timespec="seconds"),
+            drive_folder=media_folder_name, drive_link=media_link,
+            tokens=usage["tokens"], latency_ms=usage["latency_ms"],
+        )
+
+        record_post_node(graph, datum_str, post_type, obj, gericht_str, category, post_id, post_version)
+
+        indexed = not args.skip_ai or use_template
+        if indexed:
+            sim_index.add(f"{datum_str}:{post_type}", post_text(obj), date=datum_str,
+                          post_type=post_type, subject=gericht_str)
+
+        # --- Guardrails (fensterweise), danach an die Sinks (Notion / JSONL / CSV / SQLite) ---
+        content = {"gericht": gericht_str, "beschreibung": beschreibung_str, "category": category,
+                   "extras": {**extras, "own_id": own_id}}
+        pending.append((PostRecord(
+            date=dt, post_type=post_type, obj=obj, scheduled_dt=scheduled_dt,
+            media_folder_name=media_folder_name, media_link=media_link,
+            meta={"history_id": post_id, "subject": gericht_str},
+        ), {**guard_item(dt, post_type, content, obj, post_version), "indexed": indexed,
+            "alternates": alternates, "score": chosen_score}))
+        if args.guard_window > 0 and len(pending) >= args.guard_window:
+            _flush_pending()
 
         # ⬇️ Gestern merken, um doppelte Typen zu vermeiden
         prev_post_type = post_type
 
-    write_json(USED_FILE, used)
+    _flush_pending()
+    with stage("sinks"):
+        stream.close()
+    graph.save()
+    if guard_stats["failed"] or args.verbose:
+        print(f"🛡️ Guardrails: {guard_stats['checked']} Posts geprüft, {guard_stats['failed']} mit Verstößen – "
+              f"{guard_stats['regenerated']} neu generiert, {guard_stats['fixed']} lokal korrigiert"
+              + (f", {guard_stats['remaining']} offen" if guard_stats["remaining"] else ""))
+    if args.verbose:
+        print(f"📤 Sinks ({args.sink}): {stream.written} geschrieben, {stream.failed} fehlgeschlagen")
+    if not args.skip_ai or args.template_posts != "off":
+        sim_index.save()
+    if args.verbose and args.carousel_ingredients and not args.skip_ai:
+        print(f"🎠 Karussell-Pläne: {carousel_store.hits} wiederverwendet, {carousel_store.misses} neu generiert")
+    if args.verbose and not args.skip_ai and route_stats():
+        print("🧭 Modell-Routing:\n" + route_stats_summary())
+    if args.verbose and OPENAI_HEDGE and not args.skip_ai:
+        h = get_hedge_stats()
+        print(f"🏁 Hedging: {h['hedged']}/{h['calls']} Requests dupliziert, {h['hedge_wins']} vom Duplikat gewonnen, "
+              f"{h['wasted_tokens']} Tokens verworfen")
 
 if __name__ == "__main__":
     main()
@@ -6,11 +6,18 @@ OPENAI_API_KEY       = os.getenv("OPENAI_API_KEY")
 NOTION_TOKEN         = os.getenv("NOTION_TOKEN")
 NOTION_DATABASE_ID   = os.getenv("NOTION_DATABASE_ID")
 OPENAI_MODEL         = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_MODEL_FAST    = os.getenv("OPENAI_MODEL_FAST", OPENAI_MODEL)        # kurze Posts (Zitat, Anlass, Anreicherung)
+OPENAI_MODEL_STRONG  = os.getenv("OPENAI_MODEL_STRONG", "gpt-4o")          # Eskalation bei ungültiger Ausgabe
 NOTION_VERSION       = os.getenv("NOTION_VERSION", "2022-06-28")
 POST_TIME_HOUR       = int(os.getenv("POST_TIME_HOUR", "10"))
 REGION_TZ            = os.getenv("REGION_TZ", "Europe/Berlin")
 AUTO_POST_TIME       = bool(int(os.getenv("AUTO_POST_TIME", "1")))       # 1=auto, 0=fixed
 POST_JITTER_MINUTES  = int(os.getenv("POST_JITTER_MINUTES", "17"))       # ±Jitter in Minuten
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "6"))   # parallele Requests (gesamt)
+OPENAI_RPM             = int(os.getenv("OPENAI_RPM", "0"))               # Requests/Minute, 0 = unbegrenzt
+OPENAI_HEDGE           = bool(int(os.getenv("OPENAI_HEDGE", "0")))       # 1 = langsame Requests doppelt absetzen
+OPENAI_HEDGE_PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "90"))  # ab dieser Latenz-Perzentile
+OPENAI_HEDGE_MAX_EXTRA  = float(os.getenv("OPENAI_HEDGE_MAX_EXTRA", "0.1"))  # max. Anteil zusätzlicher Requests
 
 
 # Hinweis: Validierung erfolgt zur Laufzeit (CLI).
@@ -19,6 +19,8 @@ if not DATA_DIR.exists():
 NOTION_TOKEN       = os.getenv("NOTION_TOKEN", "").strip()
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID", "").strip()
 NOTION_VERSION     = os.getenv("NOTION_VERSION", "2022-06-28").strip()
+NOTION_RPS         = float(os.getenv("NOTION_RPS", "3"))             # Notion-Limit: ~3 Requests/Sekunde
+NOTION_MAX_CONCURRENCY = int(os.getenv("NOTION_MAX_CONCURRENCY", "3"))
 
 # ---- Scheduling / Region ----
 POST_TIME_HOUR = int(os.getenv("POST_TIME_HOUR", "10"))
@@ -32,13 +34,26 @@ DRIVE_MAKE_PUBLIC      = os.getenv("DRIVE_MAKE_PUBLIC", "false").strip().lower()
 # ---- Dateien ----
 MENU_FILE         = DATA_DIR / "menu.json"
 ANLASS_FILE       = DATA_DIR / "anlass_kalender.json"
+ANLASS_RAW_FILE   = DATA_DIR / "kalender_roh.txt"
+ANLASS_RULES_FILE = DATA_DIR / "anlass_regeln.json"
+ANLASS_STORE_FILE = DATA_DIR / "anlass_store.json"     # kompiliert, wird automatisch neu gebaut
 QUOTES_FILE       = DATA_DIR / "quotes.json"
-USED_FILE         = PROJECT_ROOT / "used_products.json"
+USED_FILE         = PROJECT_ROOT / "used_products.json"   # Legacy – wird einmalig in die Historie importiert
+HISTORY_DB_FILE   = DATA_DIR / "history.sqlite3"
 
 # Zutaten-Dateien
 ING_OVERRIDES_FILE = DATA_DIR / "ingredients_overrides.json"   # bevorzugter Name
 ING_AUTO_FILE      = DATA_DIR / "ingredients_auto.json"
 ING_META_FILE      = DATA_DIR / "ingredients_meta.json"
+ENRICH_JOB_FILE    = DATA_DIR / "enrich_job.json"              # Fortschritt der KI-Anreicherung
+CAROUSEL_PLANS_FILE = DATA_DIR / "carousel_plans.json"         # wiederverwendbare Karussell-Pläne
+SIMILARITY_INDEX_FILE = DATA_DIR / "post_similarity.json"      # MinHash-Signaturen generierter Posts
+MEDIA_VARIANTS_FILE = DATA_DIR / "media_variants.json"         # Cache: Original-Hash → hochgeladene Varianten
+DRIVE_INDEX_FILE    = DATA_DIR / "drive_index.json"            # Ordner-/Datei-Index + Token des Drive-Changes-Feeds
+MODEL_ROUTES_FILE   = DATA_DIR / "model_routes.json"           # optional: Modell-Routing überschreiben
+ARTIFACT_GRAPH_FILE = DATA_DIR / "artifact_graph.json"         # Abhängigkeiten abgeleiteter Daten (Hashes/Versionen)
+ING_MERGES_FILE     = DATA_DIR / "ingredient_merges.json"       # Review: automatisch zusammengeführte Zutaten-Varianten
+AUTOPOST_LEDGER_FILE = DATA_DIR / "autopost_ledger.json"       # Notion-Seite → Plattform-Post-ID (gegen Doppel-Posts)
 
 # Backwards-Compat (ältere Module nutzten teilweise diese Namen)
 ING_OVERRIDES = ING_OVERRIDES_FILE
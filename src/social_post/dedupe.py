@@ -0,0 +1,119 @@
+# src/social_post/dedupe.py
+"""
+Near-Duplicate-Erkennung für generierte Posts.
+
+- Shingles: Zeichen-5-Gramme über normalisierten Titel + Text
+- Signatur: One-Permutation-MinHash (ein CRC32 pro Shingle, 64 Bins, Rotations-Densifizierung)
+  → O(Shingles) statt O(Shingles × Permutationen)
+- LSH: 16 Bänder à 4 Bins; nur Posts mit mindestens einem gleichen Band werden verglichen
+  → Abfrage unabhängig von der Größe der Historie
+
+Persistiert werden nur die Signaturen (data/post_similarity.json); die Band-Buckets
+werden beim Laden im Speicher aufgebaut.
+"""
+import re, zlib
+
+from .io_utils import read_json, write_json
+from .constants import SIMILARITY_INDEX_FILE
+from .profiling import staged
+
+NUM_BINS = 64
+BANDS = 16
+ROWS = NUM_BINS // BANDS
+SHINGLE = 5
+_EMPTY = 0xFFFFFFFF
+_BIN_BITS = NUM_BINS.bit_length() - 1
+
+def _normalize(text: str) -> str:
+    text = (text or "").lower()
+    text = re.sub(r"#\w+", " ", text)          # Hashtags zählen nicht zur Ähnlichkeit
+    text = re.sub(r"[^\wäöüß]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def shingles(text: str) -> set[str]:
+    t = _normalize(text)
+    if len(t) <= SHINGLE:
+        return {t} if t else set()
+    return {t[i:i + SHINGLE] for i in range(len(t) - SHINGLE + 1)}
+
+def signature(text: str) -> list[int]:
+    bins = [_EMPTY] * NUM_BINS
+    for sh in shingles(text):
+        h = zlib.crc32(sh.encode("utf-8"))
+        b = h & (NUM_BINS - 1)
+        v = h >> _BIN_BITS
+        if v < bins[b]:
+            bins[b] = v
+    if all(v == _EMPTY for v in bins):
+        return bins
+    # Densifizierung: leere Bins übernehmen den nächsten befüllten Bin rechts (zyklisch) + Offset
+    out = list(bins)
+    for i in range(NUM_BINS):
+        if bins[i] != _EMPTY:
+            continue
+        for step in range(1, NUM_BINS):
+            j = (i + step) % NUM_BINS
+            if bins[j] != _EMPTY:
+                out[i] = bins[j] + step * (1 << (32 - _BIN_BITS))
+                break
+    return out
+
+def estimate_similarity(a: list[int], b: list[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+def _band_keys(sig: list[int]):
+    for band in range(BANDS):
+        yield band, tuple(sig[band * ROWS:(band + 1) * ROWS])
+
+def post_text(obj: dict) -> str:
+    return f"{(obj or {}).get('title') or ''}\n{(obj or {}).get('text') or ''}"
+
+class SimilarityIndex:
+    def __init__(self, path=SIMILARITY_INDEX_FILE):
+        self.path = path
+        self.docs: dict[str, dict] = {}
+        self.buckets: dict[tuple, list[str]] = {}
+        data = read_json(path, {}) or {}
+        if data.get("num_bins") == NUM_BINS:
+            for doc_id, d in (data.get("docs") or {}).items():
+                self._index(doc_id, d)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _index(self, doc_id: str, d: dict):
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        self.docs[doc_id] = d
+        for band, key in _band_keys(d["sig"]):
+            self.buckets.setdefault((band,) + key, []).append(doc_id)
+
+    def remove(self, doc_id: str):
+        d = self.docs.pop(doc_id, None)
+        if not d:
+            return
+        for band, key in _band_keys(d["sig"]):
+            ids = self.buckets.get((band,) + key)
+            if ids and doc_id in ids:
+                ids.remove(doc_id)
+
+    @staged("dedupe")
+    def query(self, text: str, exclude: str | None = None) -> tuple[float, str | None]:
+        """Höchste geschätzte Jaccard-Ähnlichkeit zu einem bekannten Post (0.0 wenn keiner)."""
+        sig = signature(text)
+        cands = set()
+        for band, key in _band_keys(sig):
+            cands.update(self.buckets.get((band,) + key, ()))
+        cands.discard(exclude)
+        best, best_id = 0.0, None
+        for doc_id in cands:
+            s = estimate_similarity(sig, self.docs[doc_id]["sig"])
+            if s > best:
+                best, best_id = s, doc_id
+        return best, best_id
+
+    def add(self, doc_id: str, text: str, **meta):
+        self._index(doc_id, {"sig": signature(text), **meta})
+
+    def save(self):
+        write_json(self.path, {"num_bins": NUM_BINS, "docs": self.docs}, compact=True)
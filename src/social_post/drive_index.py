@@ -0,0 +1,170 @@
+# src/social_post/drive_index.py
+"""
+Lokaler Index des Drive-Medienbaums (data/drive_index.json).
+
+    DRIVE_PARENT_FOLDER_ID / YYYY-MM / <post-ordner> / <dateien>
+
+Beim ersten Aufruf wird der Baum einmal gecrawlt (gebündelte Queries, siehe
+google_drive.list_children_batched) und der startPageToken des Changes-Feeds
+gespeichert. Danach liefert refresh() nur noch die Änderungen seit dem letzten
+Token – neue/umbenannte/verschobene/gelöschte Ordner und Dateien – und wendet sie
+auf den Index an. Der Aufwand hängt damit von der Zahl der Änderungen ab, nicht
+von der Zahl der Post-Ordner.
+"""
+from datetime import datetime
+
+from .io_utils import read_json, write_json
+from .constants import DRIVE_INDEX_FILE
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+_FILE_KEYS = ("name", "mimeType", "parents", "md5Checksum", "appProperties", "modifiedTime")
+
+class DriveIndex:
+    def __init__(self, root_id: str, path=DRIVE_INDEX_FILE):
+        self.root_id = root_id
+        self.path = path
+        data = read_json(path, {}) or {}
+        if data.get("root_id") != root_id:
+            data = {}   # anderer Wurzelordner → neu aufbauen
+        self.token: str | None = data.get("page_token")
+        self.folders: dict[str, dict] = data.get("folders", {})   # id → {name, parent}
+        self.files: dict[str, dict] = data.get("files", {})       # id → Drive-Metadaten (Auszug)
+
+    # -----------------------------
+    # Pfade & Abfragen
+    # -----------------------------
+    def folder_path(self, folder_id: str) -> str | None:
+        """Pfad relativ zur Wurzel ("2025-12/2025-12-01_produkt_x"); None, wenn außerhalb."""
+        parts = []
+        cur = folder_id
+        for _ in range(16):
+            if cur == self.root_id:
+                return "/".join(reversed(parts))
+            f = self.folders.get(cur)
+            if not f:
+                return None
+            parts.append(f["name"])
+            cur = f.get("parent")
+        return None
+
+    def media_index(self, months: list[str] | None = None) -> dict[str, list[dict]]:
+        """Gleiche Form wie media_crawl.crawl_months: {"YYYY-MM/<ordner>": [Dateien…]}."""
+        paths = {}
+        for fid in self.folders:
+            p = self.folder_path(fid)
+            if p and p.count("/") == 1 and (months is None or p.split("/", 1)[0] in months):
+                paths[fid] = p
+        index: dict[str, list[dict]] = {p: [] for p in paths.values()}
+        for file_id, f in self.files.items():
+            for parent in f.get("parents") or []:
+                if parent in paths:
+                    index[paths[parent]].append({"id": file_id, **f})
+        return index
+
+    def _known(self, folder_id: str) -> bool:
+        return folder_id == self.root_id or folder_id in self.folders
+
+    # -----------------------------
+    # Aufbau & Änderungen
+    # -----------------------------
+    def bootstrap(self, service):
+        """Voll-Crawl (Token vorher holen, damit nichts zwischen Crawl und Feed verloren geht)."""
+        from .google_drive import get_start_page_token, list_children_batched
+        token = get_start_page_token(service)
+        self.folders, self.files = {}, {}
+        level = [self.root_id]
+        while level:
+            children = list_children_batched(service, level, fields="id," + ",".join(_FILE_KEYS))
+            level = []
+            for f in children:
+                parent = next((p for p in f.get("parents", []) if self._known(p)), None)
+                if f.get("mimeType") == FOLDER_MIME:
+                    self.folders[f["id"]] = {"name": f["name"], "parent": parent}
+                    level.append(f["id"])
+                else:
+                    self.files[f["id"]] = {k: f.get(k) for k in _FILE_KEYS}
+        self.token = token
+        self.save()
+
+    def _remove_folder(self, folder_id: str, changed: set):
+        path = self.folder_path(folder_id)
+        if path:
+            changed.add(path)
+        self.folders.pop(folder_id, None)
+        for sub in [k for k, v in self.folders.items() if v.get("parent") == folder_id]:
+            self._remove_folder(sub, changed)
+        for fid in [k for k, v in self.files.items() if folder_id in (v.get("parents") or [])]:
+            self.files.pop(fid, None)
+
+    def _touch_file(self, f: dict | None, changed: set):
+        for parent in (f or {}).get("parents") or []:
+            path = self.folder_path(parent)
+            if path:
+                changed.add(path)
+
+    def apply_changes(self, changes: list[dict]) -> set[str]:
+        """Wendet Changes-Feed-Einträge an; Rückgabe: betroffene Ordnerpfade."""
+        changed: set[str] = set()
+        # Ordner zuerst (mehrere Runden, falls ein Unterordner vor seinem Elternordner kommt)
+        folders = [c for c in changes if (c.get("file") or {}).get("mimeType") == FOLDER_MIME]
+        progress = True
+        while folders and progress:
+            progress, rest = False, []
+            for c in folders:
+                f = c["file"]
+                parent = next((p for p in f.get("parents") or [] if self._known(p)), None)
+                if c.get("removed") or f.get("trashed"):
+                    if f["id"] in self.folders:
+                        self._remove_folder(f["id"], changed)
+                    progress = True
+                elif parent:
+                    old = self.folder_path(f["id"])
+                    if old:
+                        changed.add(old)
+                    self.folders[f["id"]] = {"name": f["name"], "parent": parent}
+                    changed.add(self.folder_path(f["id"]) or "")
+                    progress = True
+                else:
+                    rest.append(c)
+            folders = rest
+        for c in folders:   # außerhalb des Baums (oder hinausverschoben)
+            if c["file"]["id"] in self.folders:
+                self._remove_folder(c["file"]["id"], changed)
+
+        for c in changes:
+            f = c.get("file")
+            if f and f.get("mimeType") == FOLDER_MIME:
+                continue
+            fid = c.get("fileId") or (f or {}).get("id")
+            if c.get("removed") and fid in self.folders:
+                self._remove_folder(fid, changed)
+                continue
+            old = self.files.get(fid)
+            inside = f and not f.get("trashed") and not c.get("removed") and any(
+                p in self.folders for p in f.get("parents") or [])
+            if inside:
+                self.files[fid] = {k: f.get(k) for k in _FILE_KEYS}
+                self._touch_file(old, changed)
+                self._touch_file(f, changed)
+            elif old:
+                self._touch_file(old, changed)
+                self.files.pop(fid, None)
+        changed.discard("")
+        return changed
+
+    def refresh(self, service) -> set[str]:
+        """Baut bei Bedarf auf, sonst nur Changes-Feed. Rückgabe: geänderte Ordnerpfade."""
+        from .google_drive import list_changes
+        if not self.token:
+            self.bootstrap(service)
+            return {p for p in (self.folder_path(fid) for fid in self.folders) if p}
+        changes, token = list_changes(service, self.token)
+        changed = self.apply_changes(changes)
+        self.token = token
+        self.save()
+        return changed
+
+    def save(self):
+        write_json(self.path, {"root_id": self.root_id, "page_token": self.token,
+                               "updated_at": datetime.now().isoformat(timespec="seconds"),
+                               "folders": self.folders, "files": self.files}, lock=True)
@@ -5,6 +5,7 @@ from typing import List, Tuple, Optional
 
 from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
+from .profiling import staged
 
 # Scopes: Vollzugriff auf Drive-Inhalte (für Ordner anlegen, Permissions setzen)
 SCOPES = ["https://www.googleapis.com/auth/drive"]
@@ -154,3 +155,100 @@ def revoke_public(service, file_id: str) -> None:
                 permissionId=p["id"],
                 supportsAllDrives=True,
             ).execute()
+
+@staged("drive")
+def _list_query(service, q: str, fields: str) -> List[dict]:
+    results: List[dict] = []
+    page_token = None
+    while True:
+        resp = service.files().list(
+            q=q,
+            spaces="drive",
+            fields=f"nextPageToken, files({fields})",
+            pageSize=1000,
+            pageToken=page_token,
+            includeItemsFromAllDrives=True,
+            supportsAllDrives=True,
+            corpora="allDrives",
+        ).execute()
+        results.extend(resp.get("files", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            break
+    return results
+
+def list_children_batched(service, parent_ids: List[str], folders: Optional[bool] = None,
+                          batch: int = 40, fields: str = "id,name,mimeType,parents,modifiedTime,md5Checksum,size,appProperties") -> List[dict]:
+    """
+    Listet die Kinder vieler Ordner mit wenigen Requests:
+    ('a' in parents or 'b' in parents …) – `batch` Ordner pro Query.
+    folders=True → nur Ordner, False → nur Dateien, None → beides.
+    """
+    mime = ""
+    if folders is True:
+        mime = " and mimeType='application/vnd.google-apps.folder'"
+    elif folders is False:
+        mime = " and mimeType!='application/vnd.google-apps.folder'"
+    results: List[dict] = []
+    ids = [i for i in dict.fromkeys(parent_ids) if i]
+    for i in range(0, len(ids), batch):
+        parents = " or ".join(f"'{pid}' in parents" for pid in ids[i:i + batch])
+        results.extend(_list_query(service, f"trashed=false{mime} and ({parents})", fields))
+    return results
+
+@staged("drive")
+def download_file(service, file_id: str) -> bytes:
+    """Lädt den Inhalt einer Datei komplett in den Speicher."""
+    import io
+    from googleapiclient.http import MediaIoBaseDownload
+    buf = io.BytesIO()
+    req = service.files().get_media(fileId=file_id, supportsAllDrives=True)
+    dl = MediaIoBaseDownload(buf, req, chunksize=8 * 1024 * 1024)
+    done = False
+    while not done:
+        _, done = dl.next_chunk()
+    return buf.getvalue()
+
+@staged("drive")
+def upload_bytes(service, folder_id: str, name: str, data: bytes, mime: str = "image/jpeg",
+                 app_properties: Optional[dict] = None) -> str:
+    """Lädt Bytes als neue Datei in folder_id hoch. Gibt die File-ID zurück."""
+    import io
+    from googleapiclient.http import MediaIoBaseUpload
+    body = {"name": name, "parents": [folder_id]}
+    if app_properties:
+        body["appProperties"] = app_properties
+    media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mime, resumable=len(data) > 5 * 1024 * 1024)
+    f = service.files().create(body=body, media_body=media, fields="id", supportsAllDrives=True).execute()
+    return f["id"]
+
+def trash_file(service, file_id: str) -> None:
+    service.files().update(fileId=file_id, body={"trashed": True}, supportsAllDrives=True).execute()
+
+CHANGE_FIELDS = "fileId,removed,file(id,name,mimeType,parents,trashed,md5Checksum,appProperties,modifiedTime)"
+
+def get_start_page_token(service) -> str:
+    """Token für den Changes-Feed ab 'jetzt'."""
+    return service.changes().getStartPageToken(supportsAllDrives=True).execute()["startPageToken"]
+
+def list_changes(service, page_token: str) -> Tuple[List[dict], str]:
+    """
+    Alle Änderungen seit page_token (paginiert).
+    Gibt (changes, newStartPageToken) zurück – den neuen Token für den nächsten Aufruf speichern.
+    """
+    changes: List[dict] = []
+    token = page_token
+    while True:
+        resp = service.changes().list(
+            pageToken=token,
+            spaces="drive",
+            pageSize=1000,
+            fields=f"nextPageToken, newStartPageToken, changes({CHANGE_FIELDS})",
+            includeItemsFromAllDrives=True,
+            supportsAllDrives=True,
+            includeRemoved=True,
+        ).execute()
+        changes.extend(resp.get("changes", []))
+        if resp.get("newStartPageToken"):
+            return changes, resp["newStartPageToken"]
+        token = resp.get("nextPageToken")
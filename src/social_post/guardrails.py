@@ -0,0 +1,258 @@
+# src/social_post/guardrails.py
+"""
+Guardrails als eigene Stufe nach der Generierung (statt verstreuter Inline-Checks).
+
+Ein Regelsatz für alle Posts eines Laufs:
+- forbidden_claim     unbelegte Werbeaussagen ("garantiert", "Nr. 1", "beste … der Stadt")
+- health_promise      Heils-/Gesundheitsversprechen ("heilt", "stärkt das Immunsystem", "Detox")
+- cooking_claim       Koch-/Zubereitungsaussagen bei Getränken bzw. nicht kochbaren Zutaten
+- brand_spelling      Markenname falsch geschrieben ("Kapsio", "KASPIO")
+- brand_tag           #kaspio fehlt in den Hashtags (z. B. bei Kalender-Overrides)
+- duplicate_hashtags  derselbe Hashtag mehrfach
+- too_long            Text > 300 Zeichen (wird NICHT mehr stillschweigend abgeschnitten)
+- missing_anlass      Anlass-Post ohne den Namen des Anlasses im Text
+- empty_text          leerer Text
+
+Die Text-Regeln sind EIN kompiliertes Pattern mit benannten Gruppen und laufen in
+einem Durchgang über alle Posts (Texte verkettet, Treffer per Offset zugeordnet);
+die strukturellen Regeln sind einfache Vergleiche.
+
+guard_batch():
+1) lokal reparierbare Verstöße (Marke, Hashtags) sofort beheben
+2) übrige Verstöße → nur diese Posts neu generieren, parallel, mit den Verstößen
+   als Hinweis im Prompt; neue Fassung nur übernehmen, wenn sie besser ist
+3) was dann noch verstößt, wird sichtbar lokal korrigiert: betroffene Sätze raus,
+   Kürzen an Satz-/Wortgrenze, Anlass-Name voran
+"""
+import bisect, re
+from concurrent.futures import ThreadPoolExecutor
+
+from .posts import COOKING_CLAIM_PATTERN, _to_str
+from .templates import MAX_TEXT, shorten
+from .hashtags import HASHTAGS_BASE, split_tags
+
+BRAND = "Kaspio"
+BRAND_TAG = HASHTAGS_BASE[0]
+
+# Text-Regeln: Name → Muster (Kleinschreibung egal)
+TEXT_RULES: dict[str, list[str]] = {
+    "forbidden_claim": [
+        r"\bgarantiert\w*", r"\b100\s?%", r"\bnr\.?\s?1\b", r"\bnummer\s+(?:1|eins)\b", r"\bpreisgekrönt\w*",
+        r"\btestsieger\w*", r"\bweltbeste\w*", r"\bbeste\w*\s+(?:\w+\s+)?(?:der|in der|von)\s+(?:stadt|welt|region)\b",
+    ],
+    "health_promise": [
+        r"\bheil(?:t|en|end\w*|wirkung\w*)\b", r"\bgesund\s+machen\b", r"\bimmunsystem\w*\s+(?:zu\s+)?stärk\w*",
+        r"\bstärk\w*\s+(?:\w+\s+)?immunsystem\w*", r"\bentgifte\w*", r"\bdetox\w*", r"\bfatburner\w*",
+        r"\bschlank\s+machen\b", r"\bwundermittel\w*", r"\bsenkt\s+(?:den\s+|das\s+)?(?:blutdruck|cholesterin\w*)",
+        r"\bgegen\s+(?:krebs|erkältung\w*|grippe)\b",
+    ],
+    "cooking_claim": [COOKING_CLAIM_PATTERN],
+    "brand_spelling": [r"(?<!#)\bk[ae]s{1,2}p[iy]{1,2}o\b", r"(?<!#)\bkapsio\b"],
+}
+# Regeln, die nur für bestimmte Posts gelten
+_ONLY = {"cooking_claim": lambda post_type, extras: _non_cookable(extras)}
+
+# Rückmeldung an das Modell bei der gezielten Neu-Generierung
+FEEDBACK = {
+    "forbidden_claim": "keine unbelegten Superlative oder Garantien ({})",
+    "health_promise": "keine Heils- oder Gesundheitsversprechen ({})",
+    "cooking_claim": "keine Aussagen übers Kochen/Zubereiten – es ist ein Getränk ({})",
+    "brand_spelling": f"Markenname exakt „{BRAND}“ schreiben ({{}})",
+    "too_long": f"Text höchstens {MAX_TEXT} Zeichen (war {{}})",
+    "missing_anlass": "den Anlass „{}“ wörtlich im Text nennen",
+    "empty_text": "Text darf nicht leer sein",
+}
+# Ohne Modell-Aufruf reparierbar
+LOCAL_RULES = ("brand_spelling", "brand_tag", "duplicate_hashtags")
+
+_SEP = "\x00"
+_SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+
+def _compile(rules: dict[str, list[str]]) -> re.Pattern:
+    return re.compile("|".join(f"(?P<{name}>{'|'.join(f'(?:{p})' for p in patterns)})"
+                               for name, patterns in rules.items()), re.IGNORECASE)
+
+_PATTERN = _compile(TEXT_RULES)
+
+def _non_cookable(extras: dict) -> bool:
+    return (_to_str(extras.get("category")) or "").lower() == "beverage" or not bool(extras.get("cookable", True))
+
+def _body(obj: dict) -> str:
+    return f"{_to_str(obj.get('title'))}\n{_to_str(obj.get('text'))}".replace(_SEP, " ")
+
+# -----------------------------
+# Prüfen (ein Durchgang über alle Posts)
+# -----------------------------
+def check_posts(items: list[dict]) -> list[list[tuple[str, str]]]:
+    """
+    items: [{"obj", "post_type", "extras"}] → je Post [(regel, detail)], gleiche Reihenfolge.
+    """
+    found: list[list[tuple[str, str]]] = [[] for _ in items]
+    bodies = [_body(it["obj"]) for it in items]
+    starts, pos = [], 0
+    for b in bodies:
+        starts.append(pos)
+        pos += len(b) + 1
+    for m in _PATTERN.finditer(_SEP.join(bodies)):
+        idx = bisect.bisect_right(starts, m.start()) - 1
+        rule, hit = m.lastgroup, m.group()
+        it = items[idx]
+        only = _ONLY.get(rule)
+        if only and not only(it["post_type"], it.get("extras") or {}):
+            continue
+        if rule == "brand_spelling" and hit == BRAND:
+            continue
+        if (rule, hit) not in found[idx]:
+            found[idx].append((rule, hit))
+
+    for idx, it in enumerate(items):
+        obj, extras = it["obj"], it.get("extras") or {}
+        text = _to_str(obj.get("text")).strip()
+        if not text:
+            found[idx].append(("empty_text", ""))
+        elif len(text) > MAX_TEXT:
+            found[idx].append(("too_long", f"{len(text)} Zeichen"))
+        anlass = _to_str(extras.get("anlass_name")).strip()
+        if it["post_type"] == "anlass" and anlass and anlass.lower() not in text.lower():
+            found[idx].append(("missing_anlass", anlass))
+        tags = split_tags(_to_str(obj.get("hashtags")))
+        if tags and BRAND_TAG not in tags:
+            found[idx].append(("brand_tag", BRAND_TAG))
+        dupes = sorted({t for t in tags if tags.count(t) > 1})
+        if dupes:
+            found[idx].append(("duplicate_hashtags", " ".join(dupes)))
+    return found
+
+def feedback(violations: list[tuple[str, str]]) -> str:
+    return "\n".join(f"- {FEEDBACK[rule].format(detail)}" for rule, detail in violations if rule in FEEDBACK)
+
+# -----------------------------
+# Lokale Korrekturen
+# -----------------------------
+def fit_length(text: str, limit: int = MAX_TEXT) -> str:
+    """Ganze Sätze behalten, solange sie passen; sonst an der Wortgrenze kürzen."""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    if len(text) <= limit:
+        return text
+    out = ""
+    for s in _SENTENCE_RE.split(text):
+        cand = f"{out} {s}".strip()
+        if len(cand) > limit:
+            break
+        out = cand
+    return out or shorten(text, limit)
+
+def _dedupe_tags(hashtags: str) -> str:
+    seen, out = set(), []
+    for t in split_tags(hashtags):
+        if t not in seen:
+            seen.add(t)
+            out.append(t)
+    if out and BRAND_TAG not in seen:
+        out.insert(0, BRAND_TAG)
+    return " ".join(out)
+
+def fix_local(obj: dict, violations: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    """Behebt Marken-/Hashtag-Verstöße in obj (in place); Rückgabe: die übrigen Verstöße."""
+    rest = []
+    for rule, detail in violations:
+        if rule not in LOCAL_RULES:
+            rest.append((rule, detail))
+        elif rule == "brand_spelling":
+            for key in ("title", "text"):
+                obj[key] = re.sub(rf"(?<!#)\b{re.escape(detail)}\b", BRAND, _to_str(obj.get(key)))
+        else:
+            obj["hashtags"] = _dedupe_tags(_to_str(obj.get("hashtags")))
+    return rest
+
+def fix_fallback(obj: dict, violations: list[tuple[str, str]], fallback: str = "", title: str = "") -> None:
+    """Letzte Stufe (in place): Sätze mit Verstößen entfernen, Anlass voranstellen, Länge einhalten."""
+    text = _to_str(obj.get("text")).strip()
+    hits = [detail.lower() for rule, detail in violations if rule in TEXT_RULES and detail]
+    if hits:
+        if any(h in _to_str(obj.get("title")).lower() for h in hits):
+            obj["title"] = (title or "Idee für den Tag")[:120]
+        text = " ".join(s for s in _SENTENCE_RE.split(text) if not any(h in s.lower() for h in hits))
+    if not text.strip():
+        text = fallback
+    anlass = next((detail for rule, detail in violations if rule == "missing_anlass"), "")
+    if anlass and anlass.lower() not in text.lower():
+        text = f"Heute ist {anlass}! {text}"
+    obj["text"] = fit_length(text)
+
+def guard_local(items: list[dict]) -> int:
+    """
+    Nur lokale Korrekturen, ohne Neu-Generierung (z. B. gespeicherte Alternativen):
+    items wie bei guard_batch, obj in place. Rückgabe: Anzahl korrigierter Posts.
+    """
+    fixed = 0
+    for it, violations in zip(items, check_posts(items)):
+        if not violations:
+            continue
+        rest = fix_local(it["obj"], violations)
+        if rest:
+            fix_fallback(it["obj"], rest, _to_str(it.get("fallback")), _to_str(it.get("title")))
+        it["changed"] = True
+        fixed += 1
+    return fixed
+
+# -----------------------------
+# Batch: prüfen → gezielt neu generieren → lokal korrigieren
+# -----------------------------
+def guard_batch(items: list[dict], regenerate=None, *, workers: int = 4, verbose=False) -> dict:
+    """
+    items: [{"obj", "post_type", "extras", "label", "llm": bool, "fallback": str, "title": str}];
+    obj wird in place aktualisiert, geänderte Posts bekommen item["changed"] = True.
+    regenerate(item, hinweis) → neues obj (nur für llm-Posts; None = keine Modell-Aufrufe).
+    """
+    stats = {"checked": len(items), "failed": 0, "regenerated": 0, "fixed": 0, "remaining": 0}
+    if not items:
+        return stats
+    pending: dict[int, list[tuple[str, str]]] = {}
+    for idx, violations in enumerate(check_posts(items)):
+        if not violations:
+            continue
+        stats["failed"] += 1
+        it = items[idx]
+        if verbose:
+            print(f"🛡️ {it.get('label', idx)}: {', '.join(f'{r} ({d})' if d else r for r, d in violations)}")
+        rest = fix_local(it["obj"], violations)
+        if len(rest) < len(violations):
+            it["changed"] = True
+        if rest:
+            pending[idx] = rest
+
+    # 2) Nur die betroffenen Posts neu generieren (parallel)
+    retry = [idx for idx in pending if regenerate is not None and items[idx].get("llm")]
+    if retry:
+        def _regen(idx):
+            try:
+                return regenerate(items[idx], feedback(pending[idx]))
+            except Exception as e:
+                print(f"⚠️ {items[idx].get('label', idx)}: Neu-Generierung fehlgeschlagen ({e})")
+                return None
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(retry)))) as pool:
+            fresh = dict(zip(retry, pool.map(_regen, retry)))
+        cands = [(idx, obj) for idx, obj in fresh.items() if obj]
+        checked = check_posts([{**items[idx], "obj": obj} for idx, obj in cands])
+        for (idx, obj), violations in zip(cands, checked):
+            rest = fix_local(obj, violations)
+            if len(rest) < len(pending[idx]):
+                items[idx]["obj"].update({k: obj[k] for k in ("title", "text", "hashtags", "image_idea") if k in obj})
+                items[idx]["changed"] = True
+                stats["regenerated"] += 1
+                if rest:
+                    pending[idx] = rest
+                else:
+                    del pending[idx]
+
+    # 3) Rest sichtbar lokal korrigieren
+    for idx, violations in pending.items():
+        it = items[idx]
+        fix_fallback(it["obj"], violations, _to_str(it.get("fallback")), _to_str(it.get("title")))
+        it["changed"] = True
+        stats["fixed"] += 1
+        if verbose:
+            print(f"🩹 {it.get('label', idx)}: lokal korrigiert → {it['obj'].get('text', '')[:80]}")
+    stats["remaining"] = sum(1 for v in check_posts([items[idx] for idx in pending]) if v)
+    return stats
@@ -0,0 +1,142 @@
+# src/social_post/hashtags.py
+"""
+Hashtag-Bank mit lokalem Ranking (statt vom Modell erfundener Hashtags).
+
+Kandidaten je Post:
+- Marke/Ort (immer vorne):          #kaspio #stade #restaurantstade
+- Thema:                            Gericht/Zutat/Anlass als eigener Tag (#buddhabowl)
+- Menü-Kategorie (produkt):         speisen | getränke | desserts
+- Zutaten-Klasse (ingredient_fact): beverage | food + Hinweise (dairy, nuts)
+- Anlass-Kategorie (anlass):        feiertag | familie
+- Post-Typ:                         feste Liste je Typ
+- Historie:                         Tags, die frühere Posts desselben Typs zu
+                                    mehreren Themen hatten (Notion-Sync, ältere LLM-Posts)
+Ranking: Gewicht der Quelle minus Diversitätsabzug für Tags, die in den Posts der
+letzten RECENT_DAYS Tage schon vorkamen (jüngere zählen stärker). Gleichstände
+werden deterministisch pro Datum + Thema aufgelöst. Ein Hashtag-Override aus dem
+Anlass-Kalender hat Vorrang.
+
+Ergebnis landet nach der Generierung in obj["hashtags"] – die Prompts fragen keine
+Hashtags mehr ab (weniger Output-Tokens, einheitliche Tags).
+"""
+import datetime, random, re
+from collections import Counter, defaultdict
+
+MAX_HASHTAGS = 6
+RECENT_DAYS = 7
+MIN_HISTORY_SUBJECTS = 2   # Tag nur übernehmen, wenn er bei so vielen Themen vorkam (sonst Thema-Tag)
+
+HASHTAGS_BASE = ["#kaspio", "#stade", "#restaurantstade"]
+HASHTAGS_TYPE: dict[str, list[str]] = {
+    "produkt": ["#essengehen", "#foodstade", "#frischgekocht", "#lecker", "#genussmoment"],
+    "ingredient_fact": ["#zutatenwissen", "#foodfacts", "#frischezutaten", "#wissen", "#genuss"],
+    "zitat": ["#zitat", "#gedankenzumtag", "#genuss", "#motivation", "#essengehen"],
+    "anlass": ["#feiertage", "#essengehen", "#genussmoment", "#gemeinsamessen", "#heuteist"],
+}
+HASHTAGS_MENU: dict[str, list[str]] = {
+    "speisen": ["#mittagstisch", "#abendessen", "#foodlover"],
+    "getränke": ["#drinks", "#aperitivo", "#cheers"],
+    "desserts": ["#dessert", "#nachtisch", "#süßes"],
+}
+HASHTAGS_CLASS: dict[str, list[str]] = {
+    "beverage": ["#drinks", "#aperitivo", "#barstade"],
+    "food": ["#kochen", "#frischeküche"],
+    "dairy": ["#käseliebe"],
+    "nuts": ["#nüsse"],
+}
+HASHTAGS_OCCASION: dict[str, list[str]] = {
+    "feiertag": ["#feiertag", "#festtagsessen"],
+    "familie": ["#familienzeit", "#familienessen"],
+}
+
+# Gewicht je Quelle (höher = wichtiger)
+WEIGHTS = {"subject": 3.0, "occasion": 2.5, "menu": 2.0, "class": 2.0, "type": 1.5, "history": 1.0}
+RECENT_PENALTY = 1.5
+
+_TAG_RE = re.compile(r"#[\wäöüß]{2,40}")
+
+def to_hashtag(name: str) -> str:
+    """"Tag des deutschen Apfels" → "#tagdesdeutschenapfels" (nur Buchstaben/Ziffern)."""
+    tag = re.sub(r"[^\wäöüß]", "", (name or "").lower())
+    return f"#{tag}" if 3 <= len(tag) <= 30 else ""
+
+def split_tags(text: str) -> list[str]:
+    return [t.lower() for t in _TAG_RE.findall(text or "")]
+
+class HashtagBank:
+    def __init__(self, history=None, limit: int = MAX_HASHTAGS):
+        self.history = history
+        self.limit = limit
+        self.learned: dict[str, Counter] = defaultdict(Counter)   # post_type → {tag: Anzahl Themen}
+        if history is not None:
+            seen = set()
+            for row in history.query("SELECT post_type, subject, hashtags FROM posts "
+                                     "WHERE hashtags IS NOT NULL AND hashtags != ''"):
+                for t in split_tags(row["hashtags"]):
+                    key = (row["post_type"] or "", t, (row["subject"] or "").lower())
+                    if key not in seen:
+                        seen.add(key)
+                        self.learned[key[0]][t] += 1
+
+    def candidates(self, post_type: str, subject: str = "", category: str = "", extras: dict | None = None) -> dict[str, float]:
+        """{tag: gewicht} ohne Marken-Tags."""
+        extras = extras or {}
+        out: dict[str, float] = {}
+        def add(tags, source, scale=1.0):
+            for t in tags:
+                if t and t not in HASHTAGS_BASE:
+                    out[t] = max(out.get(t, 0.0), WEIGHTS[source] * scale)
+
+        if post_type == "anlass":
+            add([to_hashtag(extras.get("anlass_name") or subject)], "subject")
+            add(HASHTAGS_OCCASION.get((extras.get("anlass_cat") or category or "").lower(), []), "occasion")
+        elif post_type == "zitat":
+            pass   # Autor als Hashtag wäre meist Rauschen
+        else:
+            add([to_hashtag(subject)], "subject")
+        if post_type == "produkt":
+            add(HASHTAGS_MENU.get((category or "").lower(), []), "menu")
+        if post_type == "ingredient_fact":
+            add(HASHTAGS_CLASS.get((extras.get("category") or "food").lower(), []), "class")
+            for hint in extras.get("allergens") or []:
+                add(HASHTAGS_CLASS.get(hint, []), "class", 0.8)
+        add(HASHTAGS_TYPE.get(post_type, []), "type")
+        learned = self.learned.get(post_type) or Counter()
+        top = max(learned.values(), default=0)
+        for t, n in learned.most_common(20):
+            if n >= MIN_HISTORY_SUBJECTS:
+                add([t], "history", n / top)
+        return out
+
+    def recent(self, date_str: str) -> dict[str, float]:
+        """Tags der Posts vor date_str (RECENT_DAYS Tage), gewichtet nach Abstand."""
+        if self.history is None or not date_str:
+            return {}
+        d = datetime.date.fromisoformat(date_str)
+        since = (d - datetime.timedelta(days=RECENT_DAYS)).isoformat()
+        until = (d - datetime.timedelta(days=1)).isoformat()
+        latest = {row["date"]: row for row in self.history.posts_between(since, until)}
+        out: dict[str, float] = defaultdict(float)
+        for day, row in latest.items():
+            age = (d - datetime.date.fromisoformat(day)).days
+            for t in split_tags(row["hashtags"]):
+                out[t] += 1 - (age - 1) / RECENT_DAYS
+        return out
+
+    def pick(self, post_type: str, date_str: str = "", subject: str = "", category: str = "",
+             extras: dict | None = None) -> str:
+        extras = extras or {}
+        override = (extras.get("hashtags_override") or "").strip()
+        if override:
+            return override[:300]
+        cands = self.candidates(post_type, subject, category, extras)
+        recent = self.recent(date_str)
+        rng = random.Random(f"{date_str}|{post_type}|{subject.lower()}")
+        ranked = sorted(cands, key=lambda t: (-(cands[t] - RECENT_PENALTY * recent.get(t, 0.0)), rng.random()))
+        tags = HASHTAGS_BASE + ranked
+        return " ".join(tags[:self.limit])
+
+    def apply(self, obj: dict, post_type: str, date_str: str = "", subject: str = "", category: str = "",
+              extras: dict | None = None) -> dict:
+        obj["hashtags"] = self.pick(post_type, date_str, subject, category, extras)
+        return obj
@@ -0,0 +1,249 @@
+# src/social_post/history.py
+"""
+Lokale Content-Historie (SQLite, WAL-Modus).
+
+Jeder geplante/generierte Post landet als Zeile in `posts` – inkl. Text, Hashtags,
+Karussell, Notion-Page-ID, Drive-Ordner, Tokens und Latenz. Die Rotationen
+(Produkte, Zitate, Zutaten) fragen hier nach, wann ein Eintrag zuletzt dran war.
+Ersetzt used_products.json (wird beim ersten Öffnen einmalig importiert).
+"""
+import json, sqlite3, threading
+from datetime import datetime
+
+from .io_utils import read_json
+from .constants import HISTORY_DB_FILE, USED_FILE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  TEXT NOT NULL,
+    dry_run     INTEGER NOT NULL DEFAULT 0,
+    args        TEXT
+);
+CREATE TABLE IF NOT EXISTS posts (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id          INTEGER REFERENCES runs(id),
+    date            TEXT NOT NULL,              -- YYYY-MM-DD
+    post_type       TEXT NOT NULL,
+    subject         TEXT NOT NULL DEFAULT '',   -- Produkt / Zutat / Autor / Anlass
+    ref             TEXT NOT NULL DEFAULT '',   -- Rotations-Schlüssel (Produkt, Zutat, Zitat)
+    category        TEXT NOT NULL DEFAULT '',   -- z. B. speisen / getränke / desserts
+    status          TEXT NOT NULL DEFAULT 'generated',
+    title           TEXT,
+    text            TEXT,
+    hashtags        TEXT,
+    carousel_json   TEXT,
+    scheduled_at    TEXT,
+    notion_page_id  TEXT,
+    drive_folder    TEXT,
+    drive_link      TEXT,
+    external_post_id TEXT,                      -- Post-ID der Plattform (aus Notion)
+    posted_at       TEXT,
+    error           TEXT,
+    edited_at       TEXT,                       -- last_edited_time der Notion-Seite
+    tokens          INTEGER,
+    latency_ms      REAL,
+    created_at      TEXT NOT NULL,
+    updated_at      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_date    ON posts(date);
+CREATE INDEX IF NOT EXISTS idx_posts_type    ON posts(post_type, date);
+CREATE INDEX IF NOT EXISTS idx_posts_subject ON posts(subject);
+CREATE INDEX IF NOT EXISTS idx_posts_ref     ON posts(post_type, ref, date);
+CREATE INDEX IF NOT EXISTS idx_posts_page    ON posts(notion_page_id);
+CREATE TABLE IF NOT EXISTS candidates (
+    post_id     INTEGER NOT NULL REFERENCES posts(id),
+    idx         INTEGER NOT NULL,               -- 0 = ursprünglich gewählt, 1.. = Alternativen
+    chosen      INTEGER NOT NULL DEFAULT 0,
+    score       REAL,
+    title       TEXT,
+    text        TEXT,
+    hashtags    TEXT,
+    json        TEXT,
+    PRIMARY KEY (post_id, idx)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Einträge mit diesem Status zählen nicht für die Rotation (außer im eigenen Lauf)
+_NOT_ROTATING = ("failed", "dry_run")
+
+_POST_FIELDS = (
+    "run_id", "date", "post_type", "subject", "ref", "category", "status", "title", "text",
+    "hashtags", "carousel_json", "scheduled_at", "notion_page_id", "drive_folder", "drive_link",
+    "external_post_id", "posted_at", "error", "edited_at", "tokens", "latency_ms",
+)
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_DB_FILE, import_used=True):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")      # parallele Leser, ein Schreiber
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self.run_id = None
+        if import_used:
+            self._import_used_products()
+
+    # -----------------------------
+    # Basis
+    # -----------------------------
+    def execute(self, sql: str, params=()):
+        with self._lock:
+            cur = self._conn.execute(sql, params)
+            self._conn.commit()
+            return cur
+
+    def query(self, sql: str, params=()) -> list[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get_meta(self, key: str, default=None):
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else default
+
+    def set_meta(self, key: str, value: str):
+        self.execute("INSERT INTO meta(key, value) VALUES(?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # -----------------------------
+    # Läufe & Posts
+    # -----------------------------
+    def start_run(self, dry_run=False, args: dict | None = None) -> int:
+        cur = self.execute("INSERT INTO runs(started_at, dry_run, args) VALUES(?, ?, ?)",
+                           (_now(), int(bool(dry_run)), json.dumps(args or {}, ensure_ascii=False, default=str)))
+        self.run_id = cur.lastrowid
+        return self.run_id
+
+    def record_post(self, **fields) -> int:
+        """Legt einen Post an. carousel (dict) wird als JSON gespeichert."""
+        carousel = fields.pop("carousel", None)
+        if carousel is not None and "carousel_json" not in fields:
+            fields["carousel_json"] = json.dumps(carousel, ensure_ascii=False)
+        fields.setdefault("run_id", self.run_id)
+        cols = [k for k in _POST_FIELDS if k in fields]
+        ts = _now()
+        sql = (f"INSERT INTO posts({', '.join(cols)}, created_at, updated_at) "
+               f"VALUES({', '.join('?' for _ in cols)}, ?, ?)")
+        cur = self.execute(sql, [fields[k] for k in cols] + [ts, ts])
+        return cur.lastrowid
+
+    def update_post(self, post_id: int, **fields):
+        carousel = fields.pop("carousel", None)
+        if carousel is not None:
+            fields["carousel_json"] = json.dumps(carousel, ensure_ascii=False)
+        cols = [k for k in _POST_FIELDS if k in fields]
+        if not cols:
+            return
+        sql = f"UPDATE posts SET {', '.join(f'{k} = ?' for k in cols)}, updated_at = ? WHERE id = ?"
+        self.execute(sql, [fields[k] for k in cols] + [_now(), post_id])
+
+    def record_candidates(self, post_id: int, candidates: list[dict]):
+        """Speichert alle Kandidaten eines Posts; candidates[0] ist der gewählte."""
+        with self._lock:
+            for idx, c in enumerate(candidates):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO candidates(post_id, idx, chosen, score, title, text, hashtags, json) "
+                    "VALUES(?, ?, ?, ?, ?, ?, ?, ?)",
+                    (post_id, idx, int(idx == 0), c.get("score"), c.get("title"), c.get("text"), c.get("hashtags"),
+                     json.dumps({k: v for k, v in c.items() if k not in ("alternates", "score")}, ensure_ascii=False)),
+                )
+            self._conn.commit()
+
+    def get_candidates(self, post_id: int) -> list[sqlite3.Row]:
+        return self.query("SELECT * FROM candidates WHERE post_id = ? ORDER BY idx", (post_id,))
+
+    def choose_candidate(self, post_id: int, idx: int | None = None) -> dict | None:
+        """
+        Setzt einen anderen Kandidaten als gewählt (idx=None → nächstbester noch nicht gewählter)
+        und übernimmt Titel/Text/Hashtags in den Post. Rückgabe: Kandidat als dict.
+        """
+        cands = self.get_candidates(post_id)
+        if not cands:
+            return None
+        if idx is None:
+            current = next((c["idx"] for c in cands if c["chosen"]), 0)
+            rest = [c for c in cands if c["idx"] > current]
+            if not rest:
+                return None
+            pick = rest[0]
+        else:
+            pick = next((c for c in cands if c["idx"] == idx), None)
+            if pick is None:
+                return None
+        with self._lock:
+            self._conn.execute("UPDATE candidates SET chosen = (idx = ?) WHERE post_id = ?", (pick["idx"], post_id))
+            self._conn.commit()
+        self.update_post(post_id, title=pick["title"], text=pick["text"], hashtags=pick["hashtags"])
+        return json.loads(pick["json"] or "{}")
+
+    def latest_post_on(self, date: str) -> sqlite3.Row | None:
+        rows = self.query("SELECT * FROM posts WHERE date = ? AND status NOT IN ('failed', 'imported') "
+                          "ORDER BY id DESC LIMIT 1", (date,))
+        return rows[0] if rows else None
+
+    def post_by_page(self, page_id: str) -> sqlite3.Row | None:
+        rows = self.query("SELECT * FROM posts WHERE notion_page_id = ? ORDER BY id DESC LIMIT 1", (page_id,))
+        return rows[0] if rows else None
+
+    def posts_between(self, start: str, end: str, post_type: str | None = None) -> list[sqlite3.Row]:
+        sql = "SELECT * FROM posts WHERE date >= ? AND date <= ?"
+        params = [start, end]
+        if post_type:
+            sql += " AND post_type = ?"
+            params.append(post_type)
+        return self.query(sql + " ORDER BY date, id", params)
+
+    # -----------------------------
+    # Rotationen
+    # -----------------------------
+    def last_used(self, post_type: str, category: str | None = None) -> dict[str, str]:
+        """{ref: letztes Datum} – ignoriert fehlgeschlagene Posts und Dry-Runs anderer Läufe."""
+        sql = (f"SELECT ref, MAX(date) AS last FROM posts WHERE post_type = ? AND ref != '' "
+               f"AND (status NOT IN ({', '.join('?' for _ in _NOT_ROTATING)}) OR run_id = ?)")
+        params = [post_type, *_NOT_ROTATING, self.run_id or -1]
+        if category is not None:
+            sql += " AND category = ?"
+            params.append(category)
+        return {r["ref"]: r["last"] for r in self.query(sql + " GROUP BY ref", params)}
+
+    def least_recent(self, post_type: str, candidates: list[str], category: str | None = None) -> str | None:
+        """Erster nie verwendeter Kandidat (Reihenfolge bleibt), sonst der am längsten nicht verwendete."""
+        if not candidates:
+            return None
+        last = self.last_used(post_type, category)
+        for c in candidates:
+            if c not in last:
+                return c
+        return min(candidates, key=lambda c: last[c])
+
+    # -----------------------------
+    # Migration
+    # -----------------------------
+    def _import_used_products(self):
+        if self.get_meta("imported_used_products"):
+            return
+        used = read_json(USED_FILE, {}) or {}
+        n = 0
+        for cat, items in used.items():
+            for name, date in (items or {}).items():
+                self.record_post(date=date, post_type="produkt", subject=name, ref=name,
+                                 category=cat, status="imported", run_id=None)
+                n += 1
+        self.set_meta("imported_used_products", _now())
+        if n:
+            print(f"📚 {n} Einträge aus {USED_FILE.name} in die Historie übernommen.")
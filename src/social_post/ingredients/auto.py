@@ -3,64 +3,196 @@ from collections import Counter
 from datetime import datetime
 from ..io_utils import read_json, write_json
 from ..constants import STOPWORDS, NON_INGREDIENTS, REPLACEMENTS, ING_AUTO_FILE
+from ..profiling import staged
+from .fuzzy import get_index, cluster_tokens, write_merge_report
 
-def _norm_ing(nm: str) -> str:
+_SYNONYMS = {"alioli": "aioli", "allioli": "aioli"}
+
+def _norm_ing(nm: str, index=None) -> str:
+    """
+    Exakte Ersetzungen (Synonyme, REPLACEMENTS); mit index (fuzzy.FuzzyIndex) zusätzlich
+    Plural-/Schreibvarianten → bekannter Name ("tomaten" → "tomate", "mozarella" → "mozzarella").
+    """
     nm = (nm or "").strip().lower()
-    synonyms = {"alioli": "aioli", "allioli": "aioli"}
-    nm = synonyms.get(nm, nm)
+    nm = _SYNONYMS.get(nm, nm)
     nm = REPLACEMENTS.get(nm, nm)
+    if index is not None:
+        nm = index.canonical(nm)
     return nm
 
+# Ändern sich die Heuristiken, sind alle gemerkten Token-Listen (Artefakt-Graph) veraltet
+EXTRACT_VERSION = hashlib.sha1(
+    repr((sorted(STOPWORDS), sorted(NON_INGREDIENTS), sorted(REPLACEMENTS.items()), sorted(_SYNONYMS.items())))
+    .encode("utf-8")
+).hexdigest()[:10]
+
 def compute_menu_signature(sp: dict, gt: dict, ds: dict) -> str:
     base = {"speisen": sp, "getränke": gt, "desserts": ds}
     blob = re.sub(r"\s+", " ", str(sorted(base.items())))
     return hashlib.sha256(blob.encode("utf-8")).hexdigest()
 
-def extract_ingredients_with_counts(sp: dict, gt: dict, ds: dict):
+def dish_tokens(descr: str) -> list[str]:
+    """Zutaten-Tokens einer Gerichtsbeschreibung (normalisiert, in Reihenfolge, mit Wiederholungen)."""
     tokens = []
-    for menu in (sp, gt, ds):
-        for descr in (menu or {}).values():
-            if not descr: continue
-            parts = re.split(r"[,\u2022;/]| und | mit ", (descr or "").lower())
-            for p in parts:
-                t = re.sub(r"[^a-zäöüß\- ]", "", p).strip()
-                t = re.sub(r"\s+", " ", t)
-                if not t: continue
-                for w in t.split():
-                    if len(w) < 3: continue
-                    if w in STOPWORDS: continue
-                    w2 = _norm_ing(w)
-                    if w2 in NON_INGREDIENTS: continue
-                    tokens.append(w2)
-    counts = Counter(tokens)
+    parts = re.split(r"[,\u2022;/]| und | mit ", (descr or "").lower())
+    for p in parts:
+        t = re.sub(r"[^a-zäöüß\- ]", "", p).strip()
+        t = re.sub(r"\s+", " ", t)
+        if not t: continue
+        for w in t.split():
+            if len(w) < 3: continue
+            if w in STOPWORDS: continue
+            w2 = _norm_ing(w)
+            if w2 in NON_INGREDIENTS: continue
+            tokens.append(w2)
+    return tokens
+
+def _items_from_tokens(tokens, index=None, merges=None) -> list[dict]:
+    """
+    Zählt Tokens zu Zutaten. Mit index werden Varianten auf bekannte Namen abgebildet und
+    unbekannte Varianten untereinander gebündelt; merges (dict) sammelt die Zusammenführungen.
+    """
+    if index is None:
+        counts = Counter(tokens)
+    else:
+        mapped = []
+        for tok in tokens:
+            name, method, dist = index.match(tok)
+            if method in ("fold", "fuzzy") and merges is not None:
+                m = merges.setdefault(tok, {"canonical": name, "method": method, "distance": dist, "count": 0})
+                m["count"] += 1
+            mapped.append(name)
+        counts, clustered = cluster_tokens(mapped)
+        if merges is not None:
+            raw = Counter(mapped)
+            for tok, head in clustered.items():
+                merges[tok] = {"canonical": head, "method": "cluster", "distance": 0, "count": raw[tok]}
     items = []
     for w, c in counts.most_common():
         name = w[:1].upper() + w[1:]
         items.append({"name": name, "count": int(c), "approved": False, "note": ""})
     return items
 
+def _merge_items(items: list[dict], index, merges: dict) -> list[dict]:
+    """
+    Führt Varianten in einer bestehenden (ggf. von Hand gepflegten) Liste zusammen:
+    Anzahl summiert, Freigabe/Notiz übernommen. Nicht betroffene Einträge bleiben unverändert.
+    """
+    mapped = {}
+    for it in items:
+        key = (it.get("name") or "").strip().lower()
+        name, method, dist = index.match(key)
+        if method in ("fold", "fuzzy"):
+            merges[key] = {"canonical": name, "method": method, "distance": dist, "count": int(it.get("count", 0))}
+        mapped[key] = name
+    _, clustered = cluster_tokens(list(mapped.values()))
+    for key, name in mapped.items():
+        if name in clustered:
+            merges.setdefault(key, {"canonical": clustered[name], "method": "cluster", "distance": 0,
+                                    "count": 0})["canonical"] = clustered[name]
+            mapped[key] = clustered[name]
+    out: dict[str, dict] = {}
+    for it in items:
+        key = (it.get("name") or "").strip().lower()
+        target = mapped[key]
+        if target == key and target not in out:
+            out[target] = dict(it)
+            continue
+        head = out.setdefault(target, {"name": target[:1].upper() + target[1:], "count": 0,
+                                       "approved": False, "note": ""})
+        if target == key:   # Sammelname steht erst nach einer Variante in der Liste
+            head["name"] = it.get("name") or head["name"]
+        head["count"] = int(head.get("count", 0)) + int(it.get("count", 0))
+        head["approved"] = bool(head.get("approved")) or bool(it.get("approved"))
+        head["note"] = head.get("note") or it.get("note", "")
+    return sorted(out.values(), key=lambda x: -int(x.get("count", 0)))
+
+def extract_ingredients_with_counts(sp: dict, gt: dict, ds: dict, index=None, merges=None):
+    tokens = []
+    for menu in (sp, gt, ds):
+        for descr in (menu or {}).values():
+            if not descr: continue
+            tokens.extend(dish_tokens(descr))
+    return _items_from_tokens(tokens, index, merges)
+
+def _tokens_incremental(sp: dict, gt: dict, ds: dict, graph, force=False) -> list[str]:
+    """
+    Wie extract_ingredients_with_counts, aber Token-Listen pro Gericht kommen aus dem
+    Artefakt-Graph; neu zerlegt werden nur geänderte Gerichte. Entfernte Gerichte
+    werden aus dem Graph gelöscht (→ abhängige Posts gelten als veraltet).
+    """
+    tokens, keep = [], set()
+    for cat, menu in (("speisen", sp), ("getränke", gt), ("desserts", ds)):
+        for dish, descr in (menu or {}).items():
+            dkey, tkey = f"dish:{cat}/{dish}", f"tokens:{cat}/{dish}"
+            keep.update((dkey, tkey))
+            graph.put(dkey, descr or "")
+            cached = graph.data(tkey)
+            if force or cached is None or graph.is_stale(tkey, EXTRACT_VERSION):
+                cached = dish_tokens(descr) if descr else []
+                graph.put(tkey, cached, inputs=[dkey], version=EXTRACT_VERSION, data=cached)
+            tokens.extend(cached)
+    graph.prune("dish:", keep)
+    graph.prune("tokens:", keep)
+    return tokens
+
 def load_auto_ingredients():
     return read_json(ING_AUTO_FILE, {"menu_signature":"", "generated_at":"", "ingredients":[]})
 
 def save_auto_ingredients(payload: dict):
-    write_json(ING_AUTO_FILE, payload)
+    write_json(ING_AUTO_FILE, payload, lock=True)
 
-def ensure_auto_ingredients(sp: dict, gt: dict, ds: dict, *, force=False, verbose=False) -> dict:
+@staged("extract")
+def ensure_auto_ingredients(sp: dict, gt: dict, ds: dict, *, force=False, verbose=False, graph=None) -> dict:
+    """
+    graph (artifacts.ArtifactGraph, optional): Gerichte/Token-Listen werden dort
+    mitgeführt, damit nachgelagerte Artefakte gezielt invalidiert werden können.
+    """
     sig = compute_menu_signature(sp, gt, ds)
+    index = get_index()   # bekannte Namen (Overrides + Meta) → Varianten zusammenführen
     existing = load_auto_ingredients()
+    tokens = _tokens_incremental(sp, gt, ds, graph, force=force) if graph is not None else None
+    merges: dict[str, dict] = {}
     if not force and existing.get("menu_signature") == sig and existing.get("ingredients"):
-        if verbose: print("📄 Menü unverändert – verwende vorhandene auto-Zutaten.", flush=True)
+        if existing.get("vocab_signature") == index.signature:
+            if verbose: print("📄 Menü unverändert – verwende vorhandene auto-Zutaten.", flush=True)
+            return existing
+        # nur bekannte Namen geändert → bestehende Liste zusammenführen (Handpflege bleibt erhalten)
+        existing = {**existing, "vocab_signature": index.signature,
+                    "ingredients": _merge_items(existing["ingredients"], index, merges)}
+        save_auto_ingredients(existing)
+        write_merge_report(merges)
+        if verbose:
+            print(f"🔗 Bekannte Zutaten geändert – {len(merges)} Varianten zusammengeführt "
+                  f"→ data/ingredient_merges.json (bitte prüfen)", flush=True)
         return existing
 
-    new_items = extract_ingredients_with_counts(sp, gt, ds)
+    new_items = (_items_from_tokens(tokens, index, merges) if tokens is not None
+                 else extract_ingredients_with_counts(sp, gt, ds, index, merges))
     prev = { (it.get("name") or "").strip().lower(): it for it in existing.get("ingredients", []) }
+    variants: dict[str, list[str]] = {}
+    for tok, m in merges.items():
+        variants.setdefault(m["canonical"], []).append(tok)
     for it in new_items:
         key = (it["name"] or "").strip().lower()
         if key in prev:
             it["approved"] = bool(prev[key].get("approved", False))
             it["note"] = prev[key].get("note", "")
+        # Freigabe einer bisher separat geführten Variante ("Walnüsse") gilt für den Sammelnamen
+        olds = [prev[v] for v in variants.get(key, []) if v in prev]
+        if olds and not it["approved"]:
+            it["approved"] = any(o.get("approved") for o in olds)
+            it["note"] = it["note"] or next((o.get("note") for o in olds if o.get("note")), "")
 
-    payload = {"menu_signature": sig, "generated_at": datetime.now().strftime("%Y-%m-%d"), "ingredients": new_items}
+    payload = {"menu_signature": sig, "vocab_signature": index.signature,
+               "generated_at": datetime.now().strftime("%Y-%m-%d"), "ingredients": new_items}
     save_auto_ingredients(payload)
-    if verbose: print(f"📝 Auto-Zutaten aktualisiert: {ING_AUTO_FILE}", flush=True)
-    return payload
\ No newline at end of file
+    write_merge_report(merges)
+    if verbose:
+        dishes = len([k for k in (graph.changed if graph is not None else ()) if k.startswith("tokens:")])
+        print(f"📝 Auto-Zutaten aktualisiert: {ING_AUTO_FILE}"
+              + (f" ({dishes} Gerichte neu zerlegt)" if graph is not None else ""), flush=True)
+        if merges:
+            print(f"🔗 {len(merges)} Zutaten-Varianten zusammengeführt → data/ingredient_merges.json (bitte prüfen)",
+                  flush=True)
+    return payload
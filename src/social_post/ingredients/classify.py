@@ -1,7 +1,22 @@
-import json, re
-from pathlib import Path
+"""
+Zutaten-Klassifizierung.
 
-META_FILE = Path("data/ingredients_meta.json")
+IngredientClassifier wird einmal pro Lauf gebaut (get_classifier()):
+- Lookup-Tabelle aus ingredients_meta.json (Name → Kategorie/Flags)
+- alle Heuristik-Regeln als EIN kompiliertes Pattern mit benannten Gruppen
+  (ein finditer-Durchlauf statt eines re.search pro Hinweis)
+- Ergebnisse werden pro Name gemerkt
+Regeln sind erweiterbar: Kategorie-Regeln (z. B. beverage) setzen Kategorie/Flags,
+Hinweis-Regeln (z. B. dairy, nuts) ergänzen nur "allergens".
+
+Die Modul-Funktionen classify_name/is_cookable/is_beverage/allow_ingredient_post
+bleiben kompatibel und nutzen intern einen gecachten Classifier.
+"""
+import re
+from ..io_utils import read_json
+from ..constants import ING_META_FILE
+
+META_FILE = ING_META_FILE  # Backwards-Compat
 
 ALCOHOL_HINTS = [
     r"\baperol\b", r"\bcampari\b", r"\bprosecco\b", r"\bgin\b", r"\brum\b",
@@ -9,10 +24,39 @@ ALCOHOL_HINTS = [
     r"\bwein\b", r"\bsekt\b", r"\bchampagner\b", r"\bgrappa\b"
 ]
 
+DEFAULT_RESULT = {"category": "food", "cookable": True, "allow_ingredient_post": True}
+
+# Kategorie-Regeln: erste passende Regel (in dieser Reihenfolge) bestimmt Kategorie/Flags
+CATEGORY_RULES: dict[str, dict] = {
+    "beverage": {
+        "patterns": ALCOHOL_HINTS,
+        "result": {"category": "beverage", "cookable": False, "allow_ingredient_post": True},
+    },
+}
+
+def _not_after(prefixes, word: str) -> str:
+    """Teilwort-Pattern, das nicht direkt hinter einem der Präfixe steht ("kokosmilch" ≠ milch)."""
+    return "".join(f"(?<!{p})" for p in prefixes) + word
+
+# Pflanzliche "Milch"/"Sahne"/"Joghurt" und Nussmus/Kakaobutter sind keine Milchprodukte;
+# Muskatnuss ist ein Gewürz, keine Nuss
+PLANT_PREFIXES = ("kokos", "hafer", "soja", "mandel", "reis", "dinkel", "erbsen", "cashew", "nuss", "lupinen")
+NUT_BUTTER_PREFIXES = ("nuss", "mandel", "cashew", "pistazien", "sesam", "kakao", "shea", "kokos")
+
+# Hinweis-Regeln: alle passenden landen in "allergens" (Teilwörter erlaubt: "Bergkäse", "Haselnusscreme")
+HINT_RULES: dict[str, list[str]] = {
+    "dairy": [_not_after(PLANT_PREFIXES, r"milch"), r"käse", _not_after(PLANT_PREFIXES, r"sahne"),
+              _not_after(NUT_BUTTER_PREFIXES, r"butter"), _not_after(PLANT_PREFIXES, r"joghurt"), r"quark",
+              r"mozzarella", r"burrata", r"parmesan", r"parmigiano", r"pecorino", r"ricotta", r"mascarpone",
+              r"gorgonzola", r"stracciatella"],
+    "nuts": [_not_after(("muskat",), r"nuss"), _not_after(("muskat",), r"nüsse"), r"mandel", r"pistazie", r"pinienkern", r"cashew",
+             r"pecan", r"macadamia"],
+}
+
 def load_meta():
-    if META_FILE.exists():
-        with META_FILE.open("r", encoding="utf-8") as f:
-            obj = json.load(f) or {}
+    obj = read_json(META_FILE, None, copy=False)
+    if obj is not None:
+        obj = obj or {}
         d = {}
         for it in obj.get("meta", []):
             nm = (it.get("name") or "").strip().lower()
@@ -25,15 +69,87 @@ def load_meta():
         return d
     return {}
 
+class IngredientClassifier:
+    """Ergebnisse sind gemerkte dicts – nur lesend verwenden."""
+
+    def __init__(self, meta: dict | None = None, category_rules: dict | None = None, hint_rules: dict | None = None):
+        self.meta = meta if meta is not None else load_meta()
+        self.category_rules = dict(CATEGORY_RULES if category_rules is None else category_rules)
+        self.hint_rules = dict(HINT_RULES if hint_rules is None else hint_rules)
+        self._compile()
+
+    def _compile(self):
+        self._groups: dict[str, tuple[str, str]] = {}   # Gruppenname → (Art, Regelname)
+        parts = []
+        for kind, rules in (("cat", {k: v["patterns"] for k, v in self.category_rules.items()}),
+                            ("hint", self.hint_rules)):
+            for name, patterns in rules.items():
+                if not patterns:
+                    continue
+                g = f"g{len(self._groups)}"
+                self._groups[g] = (kind, name)
+                parts.append(f"(?P<{g}>{'|'.join(f'(?:{p})' for p in patterns)})")
+        self._pattern = re.compile("|".join(parts)) if parts else None
+        self._cache: dict[str, dict] = {}
+
+    def add_rule(self, name: str, patterns: list[str], result: dict | None = None):
+        """Neue Regel: mit result → Kategorie-Regel, sonst Hinweis-Regel (allergens)."""
+        if result is not None:
+            self.category_rules[name] = {"patterns": list(patterns), "result": dict(result)}
+        else:
+            self.hint_rules[name] = list(patterns)
+        self._compile()
+
+    def _matches(self, key: str) -> tuple[str | None, list[str]]:
+        if self._pattern is None:
+            return None, []
+        cats, hints = set(), []
+        for m in self._pattern.finditer(key):   # z. B. "walnuss-käse" → dairy + nuts
+            kind, name = self._groups[m.lastgroup]
+            if kind == "cat":
+                cats.add(name)
+            elif name not in hints:
+                hints.append(name)
+        cat = next((c for c in self.category_rules if c in cats), None)
+        return cat, sorted(hints, key=list(self.hint_rules).index)
+
+    def classify(self, name: str) -> dict:
+        key = (name or "").strip().lower()
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+        cat, hints = self._matches(key)
+        if key in self.meta:
+            res = dict(self.meta[key])
+        elif cat:
+            res = dict(self.category_rules[cat]["result"])
+        else:
+            res = dict(DEFAULT_RESULT)
+        res["allergens"] = hints
+        self._cache[key] = res
+        return res
+
+    def classify_many(self, names) -> dict[str, dict]:
+        return {n: self.classify(n) for n in names}
+
+    def filter_allowed(self, names) -> list[str]:
+        """Nur Zutaten, die als Ingredient-Post erlaubt sind (Reihenfolge bleibt)."""
+        return [n for n in names if self.classify(n).get("allow_ingredient_post", True)]
+
+_DEFAULT: tuple[dict | None, IngredientClassifier | None] = (None, None)
+
+def get_classifier(meta: dict | None = None) -> IngredientClassifier:
+    """Gecachter Classifier; wird nur neu gebaut, wenn sich meta inhaltlich ändert."""
+    global _DEFAULT
+    cached_meta, clf = _DEFAULT
+    if clf is not None and (meta is None or meta is cached_meta or meta == cached_meta):
+        return clf
+    clf = IngredientClassifier(meta)
+    _DEFAULT = (meta if meta is not None else clf.meta, clf)
+    return clf
+
 def classify_name(name: str, meta: dict):
-    key = (name or "").strip().lower()
-    if key in meta:
-        return meta[key]
-    # Heuristik: Alkohol?
-    if any(re.search(p, key) for p in ALCOHOL_HINTS):
-        return {"category": "beverage", "cookable": False, "allow_ingredient_post": True}
-    # Default: essbar/kochbar
-    return {"category": "food", "cookable": True, "allow_ingredient_post": True}
+    return get_classifier(meta).classify(name)
 
 def is_cookable(name: str, meta: dict) -> bool:
     return bool(classify_name(name, meta).get("cookable", True))
@@ -1,6 +1,11 @@
 # src/social_post/ingredients/enrich.py
-import re, time
-from ..openai_client import call_openai
+import hashlib, re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from ..io_utils import read_json, write_json
+from ..constants import ENRICH_JOB_FILE
+from ..routing import call_route
+from ..profiling import staged
 
 def is_too_short(text, min_chars=100):
     return not isinstance(text, str) or len(text.strip()) < min_chars
@@ -21,12 +26,18 @@ def build_ingredient_prompt(name: str, menu_examples: list[str] | None = None) -
         "Klar, sachlich, ohne Marketing. Keine Listen, nur Fließtext." + ctx
     )
 
+# Ändern sich System-Prompt oder Vorlage, gelten angereicherte Fakten als veraltet (Artefakt-Graph)
+ENRICH_PROMPT_VERSION = hashlib.sha1(
+    (ING_ENRICH_SYS + build_ingredient_prompt("{zutat}", ["{beispiel}"])).encode("utf-8")
+).hexdigest()[:10]
+
 def enrich_ingredient_with_ai(name: str, menu_examples=None) -> str:
-    content = call_openai(
+    content = call_route(
+        "enrichment",
         [{"role": "system", "content": ING_ENRICH_SYS},
          {"role": "user", "content": build_ingredient_prompt(name, menu_examples)}],
-        retries=3, backoff=2.0, temperature=0.5
-    )
+        validate=lambda t: len((t or "").strip()) >= 60,
+    )[0]
     txt = (content or "").strip()
     # Markdown/JSON-Klammern grob entfernen
     txt = re.sub(r"^[`>{\[]+|[`}\]]+$", "", txt).strip()
@@ -37,17 +48,107 @@ def enrich_overrides(approved_names: list[str], overrides_by_name: dict, menu_ex
     Ergänzt/verbessert 'fact' in overrides_by_name für approved Zutaten.
     Schreibt NICHT auf disk – Rückgabe ist das aktualisierte Dict.
     """
-    for nm in approved_names:
-        key = (nm or "").strip().lower()
-        ex = overrides_by_name.get(key, {"name": nm, "fact": ""})
-        fact = ex.get("fact", "")
-        if is_too_short(fact, min_chars=min_chars):
-            try:
-                enriched = enrich_ingredient_with_ai(ex.get("name") or nm, menu_examples_map.get(key, []))
-                if not is_too_short(enriched, min_chars=60):
-                    ex["fact"] = enriched
-                    overrides_by_name[key] = {"name": ex["name"], "fact": ex["fact"]}
-            except Exception:
-                # still keep old fact
-                pass
+    run_enrichment_job(approved_names, overrides_by_name, menu_examples_map,
+                       min_chars=min_chars, workers=1, job_file=None)
     return overrides_by_name
+
+# -----------------------------
+# Job-Runner (parallel, fortsetzbar)
+# -----------------------------
+MAX_ATTEMPTS = 3
+
+def load_enrich_job(job_file=ENRICH_JOB_FILE) -> dict:
+    return read_json(job_file, {"items": {}}) or {"items": {}}
+
+@staged("enrich")
+def run_enrichment_job(names: list[str], overrides_by_name: dict, menu_examples_map: dict[str, list[str]], *,
+                       min_chars=100, workers=6, limit=0, job_file=ENRICH_JOB_FILE,
+                       persist=None, refresh=None, verbose=False) -> dict:
+    """
+    Reichert alle Zutaten mit zu kurzem 'fact' parallel an (OpenAI-Limiter greift global).
+    Status je Zutat landet in job_file: done | skipped | failed (+ reason, attempts).
+    Bereits erledigte Zutaten werden beim nächsten Lauf übersprungen, fehlgeschlagene
+    bis MAX_ATTEMPTS erneut versucht. persist(overrides_by_name) wird nach jedem Ergebnis
+    aufgerufen (z. B. save_ingredients_overrides). refresh: Schlüssel, deren Eingänge
+    (Menü-Beispiele, Prompt) sich geändert haben – bereits angereicherte werden neu
+    angereichert, handgepflegte Fakten bleiben. Rückgabe: Status-Zähler und unter
+    "refreshed" die Schlüssel aus refresh, die in diesem Lauf neu angereichert wurden.
+    """
+    job = load_enrich_job(job_file) if job_file else {"items": {}}
+    items = job.setdefault("items", {})
+    now = lambda: datetime.now().isoformat(timespec="seconds")
+
+    def _mark(key, status, reason=""):
+        st = items.setdefault(key, {"attempts": 0})
+        st.update({"status": status, "reason": reason, "updated_at": now()})
+        if status in ("done", "failed"):
+            st["attempts"] = int(st.get("attempts", 0)) + 1
+
+    todo, refreshed = [], set()
+    for nm in names:
+        key = (nm or "").strip().lower()
+        if not key:
+            continue
+        fact = (overrides_by_name.get(key) or {}).get("fact", "")
+        if refresh and key in refresh and (items.get(key) or {}).get("status") == "done":
+            items[key]["attempts"] = 0
+            todo.append((key, (overrides_by_name.get(key) or {}).get("name") or nm))
+            continue
+        if not is_too_short(fact, min_chars=min_chars):
+            if (items.get(key) or {}).get("status") != "done":
+                _mark(key, "skipped", "fact bereits ausreichend")
+            continue
+        st = items.get(key) or {}
+        if st.get("status") == "done" and (fact or "").strip():
+            continue  # bereits angereichert (auch wenn knapp unter min_chars)
+        if st.get("status") == "failed" and int(st.get("attempts", 0)) >= MAX_ATTEMPTS:
+            continue
+        todo.append((key, (overrides_by_name.get(key) or {}).get("name") or nm))
+    if limit and limit > 0:
+        todo = todo[:limit]
+
+    if verbose:
+        print(f"🧠 Anreicherung: {len(todo)} offen, {len(names) - len(todo)} übersprungen/erledigt", flush=True)
+
+    def _work(key, name):
+        return enrich_ingredient_with_ai(name, menu_examples_map.get(key, []))
+
+    def _save():
+        if job_file:
+            write_json(job_file, job)
+        if persist:
+            persist(overrides_by_name)
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futs = {pool.submit(_work, key, name): (key, name) for key, name in todo}
+            for fut in as_completed(futs):
+                key, name = futs[fut]
+                # Ergebnisse werden nur im Haupt-Thread verarbeitet → kein Lock nötig
+                try:
+                    enriched = fut.result()
+                except Exception as e:
+                    _mark(key, "failed", f"{type(e).__name__}: {e}"[:300])
+                    if verbose:
+                        print(f"   ❌ {name}: {e}", flush=True)
+                else:
+                    if is_too_short(enriched, min_chars=60):
+                        _mark(key, "failed", f"Antwort zu kurz ({len(enriched)} Zeichen)")
+                    else:
+                        overrides_by_name[key] = {"name": name, "fact": enriched}
+                        _mark(key, "done")
+                        if refresh and key in refresh:
+                            refreshed.add(key)
+                        if verbose:
+                            print(f"   ✅ {name}", flush=True)
+                _save()
+    elif job_file:
+        write_json(job_file, job)
+
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    for nm in names:
+        st = (items.get((nm or "").strip().lower()) or {}).get("status")
+        if st in counts:
+            counts[st] += 1
+    counts["refreshed"] = sorted(refreshed)
+    return counts
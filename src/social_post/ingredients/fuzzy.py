@@ -0,0 +1,228 @@
+# src/social_post/ingredients/fuzzy.py
+"""
+Unscharfe Zutaten-Normalisierung.
+
+Bekannte Namen (ingredients_overrides.json + ingredients_meta.json) sind kanonisch.
+Ein extrahiertes Token wird in dieser Reihenfolge zugeordnet:
+1) exakt                       "mozzarella"  → mozzarella
+2) Faltung + Pluralendung (Umlaut/Akzent, eine Endung weg – beim Token oder beim Namen):
+                               "tomaten"     → tomate
+                               "walnüsse"    → walnuss
+                               "lachse"      → lachs
+3) Trigramm-Index + Editierdistanz auf dem gefalteten VOLLEN Namen (nicht auf dem
+   gekürzten Stamm – sonst wäre "lauch" nur 1 von "lach(s)" entfernt):
+                               "mozarella"   → mozzarella  (Distanz 1)
+   Kurze Wörter (< SHORT_WORD Zeichen) brauchen zusätzlich denselben Anfangsbuchstaben.
+Wörter aus FALSE_PLURALS werden nie auf ihr vermeintliches Singular gekürzt und nie
+damit verschmolzen ("rinde" bleibt Rinde und wird nicht zu "rind").
+Unbekannte Tokens bleiben, wie sie sind; Varianten untereinander werden über den
+Faltschlüssel gebündelt (cluster_tokens). Jede Zusammenführung wird für den
+Review-Bericht (data/ingredient_merges.json) festgehalten.
+
+Der Index ist invertiert (Trigramm → Namen) und nach Länge gefiltert; Distanzen
+werden nur für die wenigen Kandidaten mit genug gemeinsamen Trigrammen berechnet
+und pro Token gemerkt – auch bei großen Vokabularen (mehrere Standorte, 20k Namen)
+bleibt die Zuordnung unter einer Millisekunde pro neuem Token.
+"""
+import hashlib, unicodedata
+from collections import Counter, defaultdict
+
+from ..io_utils import read_json, write_json
+from ..constants import ING_META_FILE, ING_MERGES_FILE
+from .overrides import load_ingredients_overrides
+
+# Plural-/Flexionsendungen, die für den Faltschlüssel entfernt werden (längste zuerst);
+# der Rest muss mindestens MIN_STEM Zeichen behalten ("reis" bleibt "reis")
+PLURAL_SUFFIXES = ("en", "e", "n", "s")
+MIN_STEM = 4
+MIN_DICE = 0.45   # Mindest-Ähnlichkeit der Trigramme, bevor Distanzen berechnet werden
+SHORT_WORD = 7    # darunter nur Kandidaten mit gleichem Anfangsbuchstaben
+
+# Wörter, deren Form ohne Endung ein ANDERES Wort ist (gefaltet): Wort → verwechselbares Wort
+FALSE_PLURALS = {
+    "rinde": "rind",     # Brot-/Käserinde ≠ Rind
+    "reise": "reis",
+    "kohle": "kohl",     # Holzkohle ≠ Kohl
+    "bries": "brie",     # Kalbsbries ≠ Brie
+    "hacke": "hack",
+    "braten": "brat",
+    "wurze": "wurz",     # Würze ≠ Wurz
+}
+
+def fold(name: str) -> str:
+    """Kleinschreibung, ä→a, ß→ss, Akzente weg ("jalapeño" → "jalapeno")."""
+    s = (name or "").strip().lower().replace("ß", "ss")
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+def _strip(s: str, suf: str) -> str | None:
+    if suf == "s" and s.endswith("ss"):
+        return None   # "walnuss" ist Singular
+    if s.endswith(suf) and len(s) - len(suf) >= MIN_STEM:
+        stem = s[:-len(suf)]
+        # nicht unter ein Wort aus FALSE_PLURALS kürzen ("rinden" → rinde, aber nicht → rind)
+        if any(s.startswith(w) and len(stem) < len(w) for w in FALSE_PLURALS):
+            return None
+        return stem
+    return None
+
+def _false_friends(a: str, b: str) -> bool:
+    """True, wenn a/b Formen zweier Wörter aus FALSE_PLURALS sind ("rinde"/"rind")."""
+    return any(x.startswith(w) and y.startswith(o) and not y.startswith(w)
+               for w, o in FALSE_PLURALS.items() for x, y in ((a, b), (b, a)))
+
+def fold_key(name: str) -> str:
+    """Faltschlüssel: gefaltet + Pluralendung weg ("Walnüsse" → "walnuss", "Tomaten" → "tomat")."""
+    s = fold(name)
+    return next((k for k in (_strip(s, suf) for suf in PLURAL_SUFFIXES) if k), s)
+
+def fold_forms(name: str) -> list[str]:
+    """Gefaltet und mit je einer Pluralendung weniger ("lachse" → lachse, lachs)."""
+    s = fold(name)
+    return [s] + [k for k in (_strip(s, suf) for suf in PLURAL_SUFFIXES) if k]
+
+def trigrams(s: str) -> set[str]:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+def max_distance(n: int) -> int:
+    """Erlaubte Editierdistanz nach Wortlänge (kurze Wörter nur exakt/gefaltet)."""
+    return 0 if n < 5 else 1 if n < 9 else 2
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein mit Abbruch, sobald limit überschritten ist (Rückgabe dann limit+1)."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+class FuzzyIndex:
+    def __init__(self, names):
+        self.names: list[str] = sorted({(n or "").strip().lower() for n in names if (n or "").strip()})
+        self.exact = set(self.names)
+        self.by_fold: dict[str, str] = {}
+        self.by_key: dict[str, str] = {}
+        self.grams: dict[tuple[str, int], list[int]] = defaultdict(list)   # (Trigramm, Länge) → Namen
+        self._folded: list[str] = []
+        for i, nm in enumerate(self.names):
+            folded = fold(nm)
+            self.by_fold.setdefault(folded, nm)
+            self.by_key.setdefault(fold_key(nm), nm)
+            self._folded.append(folded)
+            for g in trigrams(folded):
+                self.grams[(g, len(folded))].append(i)
+        self.signature = hashlib.sha1("\n".join(self.names).encode("utf-8")).hexdigest()[:10]
+        self._memo: dict[str, tuple[str, str, int]] = {}
+
+    def match(self, token: str) -> tuple[str, str, int]:
+        """
+        (kanonischer Name, Methode, Distanz); Methode: exact | fold | fuzzy | none.
+
+        >>> idx = FuzzyIndex(["Lachs", "Mozzarella", "Tomate"])
+        >>> idx.match("lauch")
+        ('lauch', 'none', 0)
+        >>> idx.match("lachse")
+        ('lachs', 'fold', 0)
+        >>> idx.match("tomaten")
+        ('tomate', 'fold', 0)
+        >>> idx.match("mozarella")
+        ('mozzarella', 'fuzzy', 1)
+        >>> FuzzyIndex(["Rind"]).match("rinde")
+        ('rinde', 'none', 0)
+        """
+        token = (token or "").strip().lower()
+        hit = self._memo.get(token)
+        if hit is None:
+            hit = self._memo[token] = self._match(token)
+        return hit
+
+    def _match(self, token: str) -> tuple[str, str, int]:
+        if token in self.exact or not token:
+            return token, "exact", 0
+        forms = fold_forms(token)
+        hit = next((self.by_fold[f] for f in forms if f in self.by_fold), None)
+        if hit is None:
+            hit = self.by_key.get(fold_key(token))
+        if hit is not None:
+            return hit, "fold", 0
+        folded = forms[0]
+        limit = max_distance(len(folded))
+        if not limit:
+            return token, "none", 0
+        grams = trigrams(folded)
+        # nur Namen, deren Länge höchstens limit abweicht (mehr kann die Distanz nicht erlauben)
+        lengths = range(len(folded) - limit, len(folded) + limit + 1)
+        shared = Counter(i for g in grams for n in lengths for i in self.grams.get((g, n), ()))
+        best = None
+        for i, n in shared.most_common(8):
+            cand = self._folded[i]
+            if 2 * n / (len(grams) + len(cand) + 1) < MIN_DICE:   # len(trigrams(x)) ≤ len(x) + 1
+                break
+            if min(len(folded), len(cand)) < SHORT_WORD and folded[0] != cand[0]:
+                continue
+            if _false_friends(folded, cand):
+                continue
+            d = edit_distance(folded, cand, limit)
+            if d <= limit and (best is None or d < best[1]):
+                best = (i, d)
+        if best is None:
+            return token, "none", 0
+        return self.names[best[0]], "fuzzy", best[1]
+
+    def canonical(self, token: str) -> str:
+        return self.match(token)[0]
+
+# -----------------------------
+# Index aus Overrides + Meta (gecacht)
+# -----------------------------
+_index: FuzzyIndex | None = None
+
+def known_names() -> list[str]:
+    meta = read_json(ING_META_FILE, {}) or {}
+    names = [it.get("name") or "" for it in meta.get("meta", [])]
+    return names + [obj.get("name") or key for key, obj in load_ingredients_overrides().items()]
+
+def get_index() -> FuzzyIndex:
+    """Wird nur neu gebaut, wenn sich die bekannten Namen ändern (read_json ist mtime-gecacht)."""
+    global _index
+    names = known_names()
+    if _index is None or set(_index.names) != {n.strip().lower() for n in names if n.strip()}:
+        _index = FuzzyIndex(names)
+    return _index
+
+# -----------------------------
+# Varianten bündeln + Review-Bericht
+# -----------------------------
+def cluster_tokens(tokens) -> tuple[Counter, dict[str, str]]:
+    """
+    Bündelt Tokens mit gleichem Faltschlüssel (z. B. "tomate"/"tomaten", beide unbekannt).
+    Name des Clusters: häufigste Form, bei Gleichstand die kürzere.
+    Rückgabe: (Counter Name → Anzahl, {Variante: Name}).
+    """
+    counts = Counter(tokens)
+    groups: dict[str, list[str]] = defaultdict(list)
+    for tok in counts:
+        groups[fold_key(tok)].append(tok)
+    out, merged = Counter(), {}
+    for variants in groups.values():
+        head = min(variants, key=lambda t: (-counts[t], len(t), t))
+        out[head] = sum(counts[t] for t in variants)
+        merged.update({t: head for t in variants if t != head})
+    return out, merged
+
+def write_merge_report(merges: dict[str, dict], path=ING_MERGES_FILE):
+    """
+    merges: {variante: {"canonical", "method", "distance", "count"}} → Review-Datei,
+    sortiert nach Methode (fuzzy zuerst – die unsichersten oben).
+    """
+    order = {"fuzzy": 0, "fold": 1, "cluster": 2}
+    items = [{"variant": v, **m} for v, m in merges.items()]
+    items.sort(key=lambda it: (order.get(it["method"], 9), it["canonical"], it["variant"]))
+    write_json(path, {"merges": items}, lock=True)
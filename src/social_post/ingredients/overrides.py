@@ -13,7 +13,7 @@ def load_ingredients_overrides():
     return by_name
 
 def save_ingredients_overrides(overrides_by_name: dict) -> str:
-    """Speichert das Dict dauerhaft nach data/ingredients_overrides.json."""
+    """Speichert das Dict dauerhaft (atomar) nach data/ingredients_overrides.json."""
     items = []
     for key, obj in overrides_by_name.items():
         name = (obj.get("name") or key).strip()
@@ -22,5 +22,5 @@ def save_ingredients_overrides(overrides_by_name: dict) -> str:
             continue
         items.append({"name": name, "fact": fact})
     items.sort(key=lambda x: x["name"].lower())
-    write_json(ING_OVERRIDES, {"ingredients": items})
+    write_json(ING_OVERRIDES, {"ingredients": items}, lock=True)
     return str(ING_OVERRIDES)
@@ -1,15 +1,125 @@
-import json, requests
+import contextlib, json, os, pickle, tempfile, threading, requests
 from pathlib import Path
 from .config import NOTION_DATABASE_ID, HEADERS
+from .profiling import staged
 
-def read_json(path: Path, default=None):
-    if path.exists():
-        return json.loads(path.read_text(encoding="utf-8"))
-    return default
+# Optional: orjson (deutlich schneller bei großen Dateien), sonst Standard-json
+try:
+    import orjson as _orjson
+except Exception:
+    _orjson = None
 
-def write_json(path: Path, data):
+try:
+    import fcntl as _fcntl
+except Exception:  # z. B. Windows → Locking wird zum No-op
+    _fcntl = None
+
+# Ab dieser Größe (Bytes) wird kompakt (ohne Einrückung) geschrieben, falls nicht explizit angegeben
+COMPACT_THRESHOLD = 1_000_000
+
+# In-Process-Cache: Pfad → (mtime_ns, size, Objekt)
+_CACHE: dict[str, tuple[int, int, object]] = {}
+_CACHE_LOCK = threading.Lock()
+
+def _loads(raw: bytes):
+    if _orjson is not None:
+        return _orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+def _dumps(data, compact: bool) -> bytes:
+    if _orjson is not None:
+        try:
+            opts = _orjson.OPT_NON_STR_KEYS | (0 if compact else _orjson.OPT_INDENT_2)
+            return _orjson.dumps(data, option=opts)
+        except TypeError:
+            pass  # z. B. exotische Typen → Standard-json
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+def _copy(obj):
+    # pickle-Roundtrip ist deutlich schneller als deepcopy und als erneutes JSON-Parsen
+    return pickle.loads(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL))
+
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """Exklusiver Lock über eine Sidecar-Datei (<name>.lock); ohne fcntl ein No-op."""
+    if _fcntl is None:
+        yield
+        return
+    path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    with open(path.with_name(path.name + ".lock"), "a+") as lf:
+        _fcntl.flock(lf.fileno(), _fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            _fcntl.flock(lf.fileno(), _fcntl.LOCK_UN)
+
+@staged("json")
+def read_json(path: Path, default=None, copy=True):
+    """
+    Liest JSON mit Cache (Schlüssel: mtime + Größe). Unveränderte Dateien werden nicht
+    erneut geparst. copy=False liefert das gecachte Objekt selbst (nur lesend verwenden!).
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return default
+    key = str(path)
+    with _CACHE_LOCK:
+        hit = _CACHE.get(key)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        obj = hit[2]
+    else:
+        obj = _loads(path.read_bytes())
+        with _CACHE_LOCK:
+            _CACHE[key] = (st.st_mtime_ns, st.st_size, obj)
+    return _copy(obj) if copy else obj
+
+@staged("json")
+def write_json(path: Path, data, *, compact: bool | None = None, lock: bool = False):
+    """
+    Crash-sicheres Schreiben: Temp-Datei im selben Ordner → fsync → os.replace → fsync(Ordner).
+    compact=None: kompakt, sobald die bestehende Datei größer als COMPACT_THRESHOLD ist.
+    lock=True: exklusiver Datei-Lock gegen parallele Prozesse.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if compact is None:
+        try:
+            compact = path.stat().st_size > COMPACT_THRESHOLD
+        except FileNotFoundError:
+            compact = False
+    raw = _dumps(data, compact)
+    with (file_lock(path) if lock else contextlib.nullcontext()):
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+                st = os.fstat(f.fileno())   # unsere Datei (os.replace ändert mtime/Größe nicht)
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        # noch unter dem Lock: ein paralleler Schreiber darf nicht zwischen replace und Cache kommen
+        with _CACHE_LOCK:
+            _CACHE[str(path)] = (st.st_mtime_ns, st.st_size, _copy(data))
+        _fsync_dir(path.parent)
+
+def _fsync_dir(directory: Path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    with contextlib.suppress(OSError):
+        fd = os.open(str(directory), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
 def test_database_connection():
     url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}"
@@ -17,4 +127,4 @@ def test_database_connection():
     if r.status_code == 200:
         print("✅ Notion-Datenbank erreichbar.")
     else:
-        raise SystemExit(f"❌ Notion DB Fehler {r.status_code}: {r.text}")
\ No newline at end of file
+        raise SystemExit(f"❌ Notion DB Fehler {r.status_code}: {r.text}")
@@ -0,0 +1,135 @@
+# src/social_post/media_crawl.py
+"""
+Medien-Crawl über ganze Monate (--crawl-media 2025-12[,2026-01]).
+
+Statt list_files_in_folder() pro Post-Ordner (O(Posts) Drive-Queries) werden
+1) die Monatsordner unter DRIVE_PARENT_FOLDER_ID,
+2) alle Post-Ordner darin und
+3) alle Dateien dieser Post-Ordner
+mit gebündelten ('a' in parents or 'b' in parents …)-Queries gelesen – für einen
+Monat mit ~30 Ordnern sind das drei bis vier Requests.
+
+Zuordnung zu Notion über "Media Folder" (YYYY-MM/<ordner>). Reihenfolge der
+Dateien nach Dateiname (natürlich sortiert: 2 vor 10); Primary Image ist eine Datei
+namens cover*/primary*/titel*, sonst die erste. Geändert wird nur, was sich
+tatsächlich unterscheidet – die PATCHes laufen parallel unter NOTION_LIMITER.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from .notion_client import PROP_SYNONYMS, NOTION_LIMITER, _resolve, query_database, read_page, update_page_fields
+
+MEDIA_MIME_PREFIXES = ("image/", "video/")
+PRIMARY_PREFIXES = ("cover", "primary", "titel", "title")
+# Diese Status setzt der Crawl nicht zurück
+_FINAL_MEDIA_STATUS = ("posted", "failed")
+
+def natural_key(name: str):
+    return [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", (name or "").lower())]
+
+def order_media(files: list[dict]) -> tuple[str, list[str]]:
+    """Dateien eines Post-Ordners → (primary_id, [carousel_ids…]); nur Bilder/Videos."""
+    media = sorted((f for f in files if (f.get("mimeType") or "").startswith(MEDIA_MIME_PREFIXES)
+                    and not (f.get("appProperties") or {}).get("variant_of")),   # aufbereitete Varianten (media_prep)
+                   key=lambda f: natural_key(f.get("name", "")))
+    if not media:
+        return "", []
+    primary = next((f for f in media if f.get("name", "").lower().startswith(PRIMARY_PREFIXES)), media[0])
+    return primary["id"], [f["id"] for f in media]
+
+def crawl_months(service, parent_id: str, months: list[str], batch: int = 40) -> dict[str, list[dict]]:
+    """{"YYYY-MM/<ordner>": [Dateien…]} für alle Post-Ordner der angegebenen Monate."""
+    from .google_drive import list_children_batched
+    month_folders = {f["id"]: f["name"] for f in list_children_batched(service, [parent_id], folders=True)
+                     if f.get("name") in months}
+    if not month_folders:
+        return {}
+    post_folders = {}
+    for f in list_children_batched(service, list(month_folders), folders=True, batch=batch,
+                                   fields="id,name,parents"):
+        month = next((month_folders[p] for p in f.get("parents", []) if p in month_folders), None)
+        if month:
+            post_folders[f["id"]] = f"{month}/{f['name']}"
+    index: dict[str, list[dict]] = {name: [] for name in post_folders.values()}
+    for f in list_children_batched(service, list(post_folders), folders=False, batch=batch):
+        for p in f.get("parents", []):
+            if p in post_folders:
+                index[post_folders[p]].append(f)
+    return index
+
+def _media_pages(months: list[str] | None = None, folders: list[str] | None = None):
+    """Seiten nach Monat (starts_with) oder exaktem Ordnerpfad (equals); max. 50 Bedingungen je Query."""
+    prop = _resolve(PROP_SYNONYMS["media_folder"])
+    if not prop:
+        raise RuntimeError("Notion-Property 'Media Folder' fehlt (--setup-notion-fields).")
+    conds = [{"property": prop, "rich_text": {"starts_with": f"{m}/"}} for m in months or []]
+    conds += [{"property": prop, "rich_text": {"equals": f}} for f in folders or []]
+    for i in range(0, len(conds), 50):
+        for page in query_database({"or": conds[i:i + 50]}):
+            yield read_page(page)
+
+def _changes(props: dict, files: list[dict] | None) -> dict:
+    primary, carousel = order_media(files or [])
+    status = props.get("media_status") or ""
+    fields = {}
+    if status not in _FINAL_MEDIA_STATUS:
+        want = "ready" if primary else "todo"
+        if status != want:
+            fields["media_status"] = want
+    if (props.get("primary_id") or "") != primary:
+        fields["primary_id"] = primary
+    ids = ", ".join(carousel)
+    if (props.get("carousel_ids") or "") != ids:
+        fields["carousel_ids"] = ids
+    return fields
+
+def _apply_index(index: dict[str, list[dict]], pages: list[dict], dry_run=False, verbose=False) -> dict:
+    updates = []
+    for props in pages:
+        fields = _changes(props, index.get(props.get("media_folder") or ""))
+        if fields:
+            updates.append((props, fields))
+    stats = {"folders": len(index), "pages": len(pages), "updated": 0, "failed": 0}
+    if dry_run:
+        for props, fields in updates:
+            print(f"📝 DRY-RUN {props.get('media_folder')}: {fields}")
+        return stats
+
+    def _apply(item):
+        props, fields = item
+        update_page_fields(props["id"], **fields)
+        if verbose:
+            print(f"🖼️ {props.get('media_folder')}: {', '.join(fields)}")
+
+    with ThreadPoolExecutor(max_workers=max(1, NOTION_LIMITER.concurrency)) as ex:
+        for item, fut in [(u, ex.submit(_apply, u)) for u in updates]:
+            try:
+                fut.result()
+                stats["updated"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ {item[0].get('media_folder')}: {e}")
+    return stats
+
+def refresh_media_status(service, parent_id: str, months: list[str], dry_run=False, verbose=False) -> dict:
+    """Crawlt die Monate und gleicht Primary/Carousel FileIds + Media Status in Notion ab."""
+    index = crawl_months(service, parent_id, months)
+    return _apply_index(index, list(_media_pages(months)), dry_run=dry_run, verbose=verbose)
+
+def refresh_changed_media(service, parent_id: str, dry_run=False, verbose=False) -> dict:
+    """
+    Wie refresh_media_status, aber über den Drive-Changes-Feed (DriveIndex):
+    nur Seiten geänderter Post-Ordner werden abgefragt und abgeglichen.
+    """
+    from .drive_index import DriveIndex
+    idx = DriveIndex(parent_id)
+    changed = idx.refresh(service)
+    months = sorted({p for p in changed if "/" not in p})          # Monatsordner selbst geändert
+    folders = sorted(p for p in changed if p.count("/") == 1 and p.split("/", 1)[0] not in months)
+    if verbose:
+        print(f"🔎 Drive-Änderungen: {len(changed)} Ordner betroffen")
+    if not (months or folders):
+        return {"folders": 0, "pages": 0, "updated": 0, "failed": 0}
+    index = idx.media_index()
+    # gelöschte/umbenannte Ordner fehlen im Index → Seiten bekommen leere IDs / Status todo
+    return _apply_index(index, list(_media_pages(months, folders)), dry_run=dry_run, verbose=verbose)
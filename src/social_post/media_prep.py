@@ -0,0 +1,171 @@
+# src/social_post/media_prep.py
+"""
+Bildaufbereitung für Post- und Karussell-Medien (--prepare-media 2025-12).
+
+Pro Originalbild (Drive, Post-Ordner) entstehen Plattform-Varianten:
+    square   1080×1080  (Feed, Karussell)
+    portrait 1080×1350  (Feed 4:5)
+    story    1080×1920  (Story/Reel-Cover)
+Zuschnitt mittig (EXIF-Drehung wird vorher angewendet), JPEG progressiv.
+
+- Rendering in einem ProcessPool (CPU-lastig, skaliert mit den Kernen);
+  Download/Upload bleiben im Hauptthread, weil der Drive-Client nicht threadsicher ist.
+- Cache (data/media_variants.json) über die md5Checksum aus Drive: unveränderte
+  Originale werden weder heruntergeladen noch neu gerechnet.
+- Varianten landen neben dem Original als <name>__<variante>.jpg und tragen
+  appProperties.variant_of – der Medien-Crawl ignoriert sie daher.
+
+Pillow ist optional (nur für diesen Modus nötig). HEIC/HEIF-Fotos (iPhone) werden nur
+mit installiertem pillow-heif verarbeitet, sonst übersprungen (statt bei jedem Lauf
+erneut heruntergeladen zu werden und am Dekodieren zu scheitern).
+"""
+import hashlib, io, os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from .io_utils import read_json, write_json
+from .constants import MEDIA_VARIANTS_FILE
+from .media_crawl import crawl_months
+
+VARIANTS = {
+    "square":   (1080, 1080),
+    "portrait": (1080, 1350),
+    "story":    (1080, 1920),
+}
+JPEG_QUALITY = 88
+IMAGE_MIMES = ("image/jpeg", "image/png", "image/webp")
+HEIF_MIMES = ("image/heic", "image/heif")
+
+def have_pillow() -> bool:
+    try:
+        import PIL  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+def have_heif() -> bool:
+    """Registriert den HEIF-Opener von pillow-heif für Pillow (falls installiert)."""
+    try:
+        from pillow_heif import register_heif_opener
+    except Exception:
+        return False
+    register_heif_opener()
+    return True
+
+def spec_hash(variants: dict[str, tuple[int, int]], quality: int = JPEG_QUALITY) -> str:
+    """Ändern sich Größen/Qualität, gelten alle Cache-Einträge als veraltet."""
+    blob = ";".join(f"{k}={w}x{h}" for k, (w, h) in sorted(variants.items())) + f";q={quality}"
+    return hashlib.sha1(blob.encode()).hexdigest()[:10]
+
+def render_variants(data: bytes, variants: dict[str, tuple[int, int]], quality: int = JPEG_QUALITY) -> dict[str, bytes]:
+    """Original-Bytes → {variante: JPEG-Bytes}. Läuft im Worker-Prozess."""
+    from PIL import Image, ImageOps
+    have_heif()   # Worker-Prozess: Opener erneut registrieren (spawn erbt ihn nicht)
+    with Image.open(io.BytesIO(data)) as im:
+        im = ImageOps.exif_transpose(im)
+        if im.mode != "RGB":
+            im = im.convert("RGB")
+        # großes Original einmal grob verkleinern → alle Varianten rechnen auf weniger Pixeln
+        longest = max(max(w, h) for w, h in variants.values())
+        if max(im.size) > 2 * longest:
+            im.thumbnail((2 * longest, 2 * longest), Image.Resampling.BILINEAR)
+        out = {}
+        for name, size in variants.items():
+            v = ImageOps.fit(im, size, method=Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+            buf = io.BytesIO()
+            v.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+            out[name] = buf.getvalue()
+    return out
+
+def _variant_name(original: str, variant: str) -> str:
+    return f"{Path(original).stem}__{variant}.jpg"
+
+class MediaVariantCache:
+    """{file_id: {"md5", "spec", "variants": {name: file_id}, "at"}}"""
+    def __init__(self, path=MEDIA_VARIANTS_FILE):
+        self.path = path
+        self.entries: dict[str, dict] = (read_json(path, {}) or {}).get("files", {})
+
+    def fresh(self, f: dict, spec: str) -> bool:
+        e = self.entries.get(f["id"])
+        return bool(e and e.get("spec") == spec and e.get("md5") == (f.get("md5Checksum") or "") and e.get("variants"))
+
+    def stale_variant_ids(self, file_id: str) -> list[str]:
+        return list(((self.entries.get(file_id) or {}).get("variants") or {}).values())
+
+    def put(self, f: dict, spec: str, variant_ids: dict[str, str]):
+        self.entries[f["id"]] = {"md5": f.get("md5Checksum") or "", "spec": spec, "name": f.get("name"),
+                                 "variants": variant_ids, "at": datetime.now().isoformat(timespec="seconds")}
+
+    def save(self):
+        write_json(self.path, {"files": self.entries}, lock=True)
+
+def _originals(index: dict[str, list[dict]], mimes=IMAGE_MIMES):
+    for folder, files in index.items():
+        for f in files:
+            if (f.get("appProperties") or {}).get("variant_of"):
+                continue
+            if (f.get("mimeType") or "").lower() in mimes:
+                yield folder, f
+
+def prepare_months(service, parent_id: str, months: list[str], variants: dict | None = None,
+                   workers: int | None = None, dry_run=False, verbose=False) -> dict:
+    """Rendert und lädt fehlende/veraltete Varianten für alle Post-Ordner der Monate hoch."""
+    from .google_drive import download_file, upload_bytes, trash_file
+    variants = variants or VARIANTS
+    spec = spec_hash(variants)
+    cache = MediaVariantCache()
+    index = crawl_months(service, parent_id, months)
+    heif = have_heif()
+    mimes = IMAGE_MIMES + HEIF_MIMES if heif else IMAGE_MIMES
+    todo = [(folder, f) for folder, f in _originals(index, mimes) if not cache.fresh(f, spec)]
+    stats = {"originals": sum(1 for _ in _originals(index, mimes)), "rendered": 0, "cached": 0, "failed": 0,
+             "skipped": 0 if heif else sum(1 for _ in _originals(index, HEIF_MIMES))}
+    stats["cached"] = stats["originals"] - len(todo)
+    if dry_run or not todo:
+        for folder, f in todo:
+            print(f"📝 DRY-RUN {folder}/{f.get('name')} → {', '.join(variants)}")
+        return stats
+
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    def _finish(fut, folder, f):
+        try:
+            rendered = fut.result()
+            old = cache.stale_variant_ids(f["id"])
+            ids = {name: upload_bytes(service, f["parents"][0], _variant_name(f["name"], name), blob,
+                                      app_properties={"variant_of": f["id"], "variant": name})
+                   for name, blob in rendered.items()}
+            for vid in old:
+                try:
+                    trash_file(service, vid)
+                except Exception:
+                    pass   # bereits gelöscht o. ä.
+            cache.put(f, spec, ids)
+            cache.save()
+            stats["rendered"] += 1
+            if verbose:
+                size = sum(len(b) for b in rendered.values()) / 1024
+                print(f"🖼️ {folder}/{f['name']}: {len(ids)} Varianten ({size:.0f} KB)")
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"❌ {folder}/{f.get('name')}: {e}")
+
+    # max. 2×workers Originale gleichzeitig im Speicher (Handyfotos haben 10+ MB)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for folder, f in todo:
+            while len(pending) >= 2 * workers:
+                done = next(as_completed(pending))
+                _finish(done, *pending.pop(done))
+            try:
+                data = download_file(service, f["id"])
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ Download {folder}/{f.get('name')}: {e}")
+                continue
+            pending[pool.submit(render_variants, data, variants)] = (folder, f)
+        for done in as_completed(list(pending)):
+            _finish(done, *pending.pop(done))
+    return stats
@@ -1,5 +1,8 @@
+from functools import lru_cache
+
 from .io_utils import read_json
 from .constants import MENU_FILE
+from .ingredients.fuzzy import fold, fold_key
 
 def load_menu():
     menu = read_json(MENU_FILE)
@@ -23,24 +26,30 @@ def load_menu():
         raise SystemExit("menu.json gefunden, aber leer/ohne gültige Struktur.")
     return sp, gt, ds
 
-def get_next_product(used_dict, category_dict, cat_name, current_date):
-    unused = [p for p in category_dict if p not in used_dict[cat_name]]
-    if unused:
-        selected = sorted(unused)[0]
-    else:
-        sorted_used = sorted(used_dict[cat_name].items(), key=lambda x: x[1])
-        selected = sorted_used[0][0]
-    used_dict[cat_name][selected] = current_date.strftime("%Y-%m-%d")
-    return selected
+def get_next_product(history, category_dict, cat_name):
+    """
+    Nächstes Produkt der Kategorie: zuerst nie gepostete (alphabetisch), sonst das am
+    längsten nicht gepostete. Quelle ist die Content-Historie (history.HistoryStore).
+    """
+    return history.least_recent("produkt", sorted(category_dict), category=cat_name)
+
+@lru_cache(maxsize=4096)
+def _folded(text: str) -> str:
+    return fold(text)
+
 def find_menu_examples_for_ingredient(name: str, sp: dict, gt: dict, ds: dict, max_examples=2):
-    """Sucht Beispiel-Gerichte, deren Beschreibung die Zutat erwähnt."""
+    """
+    Sucht Beispiel-Gerichte, deren Beschreibung die Zutat erwähnt – auch als Plural/
+    Umlaut-Variante ("Walnuss" findet "Walnüsse", vgl. ingredients.fuzzy).
+    """
     out = []
     needle = (name or "").strip().lower()
     if not needle:
         return out
+    stem = fold_key(needle)
     for cat in (sp, gt, ds):
         for dish, descr in (cat or {}).items():
-            if needle in (descr or "").lower():
+            if needle in (descr or "").lower() or stem in _folded(descr or ""):
                 out.append(dish)
                 if len(out) >= max_examples:
                     return out
@@ -3,7 +3,9 @@ import json
 import datetime as _dt
 import requests
 
-from .constants import NOTION_DATABASE_ID, NOTION_TOKEN, NOTION_VERSION
+from .constants import NOTION_DATABASE_ID, NOTION_TOKEN, NOTION_VERSION, NOTION_RPS, NOTION_MAX_CONCURRENCY
+from .ratelimit import RateLimiter
+from .profiling import stage, staged
 
 HEADERS = {
     "Authorization": f"Bearer {NOTION_TOKEN}",
@@ -11,6 +13,9 @@ HEADERS = {
     "Notion-Version": NOTION_VERSION,
 }
 
+# Alle Notion-Requests des Prozesses teilen sich dieses Limit
+NOTION_LIMITER = RateLimiter(NOTION_MAX_CONCURRENCY, NOTION_RPS * 60)
+
 # ----------------------------------------
 # Hilfen
 # ----------------------------------------
@@ -31,7 +36,8 @@ def _safe_text(x, limit=1900) -> str:
 def _get_db_properties_map():
     """Liest die DB und gibt eine map lower(name)->Originalname zurück."""
     url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}"
-    r = requests.get(url, headers=HEADERS, timeout=30)
+    with NOTION_LIMITER:
+        r = requests.get(url, headers=HEADERS, timeout=30)
     r.raise_for_status()
     data = r.json()
     props = data.get("properties", {}) or {}
@@ -42,6 +48,40 @@ def _get_db_properties_map():
 
 _DB_PROPS = None
 
+# Property-Synonyme (so robust wie möglich)
+PROP_SYNONYMS = {
+    "title":        ["titel", "name"],
+    "platform":     ["plattform"],
+    "media_type":   ["medientyp"],
+    "text":         ["text", "beschreibung"],
+    "hashtags":     ["hashtags"],
+    "datetime":     ["geplanter zeitpunkt", "datum", "zeitpunkt"],
+    "status":       ["status"],
+    "post_type":    ["post-typ", "post typ", "typ"],
+    # NEU: nur den Carousel-Plan speichern (Legacy-Fallback auf frühere AI-Vorschlag-Spalte)
+    "carousel_plan": ["carousel-plan", "carousel plan", "carousel_plan",
+                      "AI-Vorschlag", "AI Vorschlag", "ai-vorschlag", "ai vorschlag", "ai"],
+    # neue Felder:
+    "auto":         ["automatisch posten", "auto posten", "autopost"],
+    "media_folder": ["media folder", "ordner", "medienordner"],
+    "media_link":   ["media link", "ordner link", "medienlink"],
+    "primary_id":   ["primary image fileid", "primary file id", "primary fileid"],
+    "carousel_ids": ["carousel fileids", "carousel files", "carousel ids"],
+    "posted_at":    ["posted at", "veröffentlicht am"],
+    "post_id":      ["post id"],
+    "error":        ["error", "fehler"],
+    "media_status": ["media status", "medienstatus"],
+}
+
+# Notion-Typ je Feld (für generisches Lesen/Schreiben)
+FIELD_TYPES = {
+    "title": "title", "platform": "multi_select", "media_type": "select", "text": "rich_text",
+    "hashtags": "rich_text", "datetime": "date", "status": "select", "post_type": "select",
+    "carousel_plan": "rich_text", "auto": "checkbox", "media_folder": "rich_text", "media_link": "url",
+    "primary_id": "rich_text", "carousel_ids": "rich_text", "posted_at": "date", "post_id": "rich_text",
+    "error": "rich_text", "media_status": "select",
+}
+
 def _resolve(name_variants: list[str]) -> str | None:
     """Findet den vorhandenen Property-Namen in der DB, case-insensitiv über Synonyme."""
     global _DB_PROPS
@@ -56,6 +96,7 @@ def _resolve(name_variants: list[str]) -> str | None:
 # ----------------------------------------
 # Öffentliche Funktion
 # ----------------------------------------
+@staged("notion")
 def create_notion_entry(
     date: _dt.datetime,
     obj: dict,
@@ -68,37 +109,14 @@ def create_notion_entry(
     """
     Legt einen Eintrag in der Notion-Datenbank an.
     Unterstützt Media Folder/Link und geplanten Zeitpunkt.
+    Rückgabe: Page-ID (None bei Dry-Run).
     """
     global _DB_PROPS
     if _DB_PROPS is None:
         _DB_PROPS = _get_db_properties_map()
 
-    # Property-Synonyme (so robust wie möglich)
-    wants = {
-        "title":        ["titel", "name"],
-        "platform":     ["plattform"],
-        "media_type":   ["medientyp"],
-        "text":         ["text", "beschreibung"],
-        "hashtags":     ["hashtags"],
-        "datetime":     ["geplanter zeitpunkt", "datum", "zeitpunkt"],
-        "status":       ["status"],
-        "post_type":    ["post-typ", "post typ", "typ"],
-        # NEU: nur den Carousel-Plan speichern (Legacy-Fallback auf frühere AI-Vorschlag-Spalte)
-        "carousel_plan": ["carousel-plan", "carousel plan", "carousel_plan",
-                          "AI-Vorschlag", "AI Vorschlag", "ai-vorschlag", "ai vorschlag", "ai"],
-        # neue Felder:
-        "auto":         ["automatisch posten", "auto posten", "autopost"],
-        "media_folder": ["media folder", "ordner", "medienordner"],
-        "media_link":   ["media link", "ordner link", "medienlink"],
-        "primary_id":   ["primary image fileid", "primary file id", "primary fileid"],
-        "carousel_ids": ["carousel fileids", "carousel files", "carousel ids"],
-        "posted_at":    ["posted at", "veröffentlicht am"],
-        "post_id":      ["post id"],
-        "error":        ["error", "fehler"],
-    }
-
     def R(key):
-        return _resolve(wants[key])
+        return _resolve(PROP_SYNONYMS[key])
 
     props = {}
 
@@ -176,9 +194,103 @@ def create_notion_entry(
                 print("   ↳ Carousel-Plan Preview:", preview[:180], "…")
             except Exception:
                 pass
-        return
+        return None
 
-    r = requests.post("https://api.notion.com/v1/pages", headers=HEADERS, json=payload, timeout=30)
+    with NOTION_LIMITER:
+        r = requests.post("https://api.notion.com/v1/pages", headers=HEADERS, json=payload, timeout=30)
     if r.status_code not in (200, 201):
         raise RuntimeError(f"Notion create page failed {r.status_code}: {r.text}")
-    print(date.date(), "✅ erstellt:", r.json().get("id"))
+    page_id = r.json().get("id")
+    print(date.date(), "✅ erstellt:", page_id)
+    return page_id
+
+def build_props(fields: dict) -> dict:
+    """{feld: wert} (Schlüssel aus PROP_SYNONYMS) → Notion-Properties; unbekannte/fehlende Spalten entfallen."""
+    props = {}
+    for key, value in fields.items():
+        p = _resolve(PROP_SYNONYMS[key])
+        if not p:
+            continue
+        typ = FIELD_TYPES[key]
+        if typ in ("title", "rich_text"):
+            props[p] = {typ: [{"type": "text", "text": {"content": _safe_text(value or "", 1900)}}]}
+        elif typ == "date":
+            iso = _to_iso(value) if isinstance(value, _dt.datetime) else value
+            props[p] = {"date": {"start": iso} if iso else None}
+        elif typ == "select":
+            props[p] = {"select": {"name": value} if value else None}
+        elif typ == "multi_select":
+            props[p] = {"multi_select": [{"name": v} if isinstance(v, str) else v for v in (value or [])]}
+        elif typ == "checkbox":
+            props[p] = {"checkbox": bool(value)}
+        elif typ == "url":
+            props[p] = {"url": value or None}
+    return props
+
+@staged("notion")
+def update_page_fields(page_id: str, **fields) -> str:
+    """PATCH nur der übergebenen Felder einer Seite (z. B. status="Gepostet", post_id="…")."""
+    props = build_props(fields)
+    with NOTION_LIMITER:
+        r = requests.patch(f"https://api.notion.com/v1/pages/{page_id}", headers=HEADERS,
+                           json={"properties": props}, timeout=30)
+    if r.status_code != 200:
+        raise RuntimeError(f"Notion update page failed {r.status_code}: {r.text}")
+    return page_id
+
+def update_notion_post(page_id: str, obj: dict, **extra):
+    """
+    Aktualisiert Titel/Text/Hashtags (+ ggf. Carousel-Plan) einer bestehenden Seite;
+    extra: weitere Felder im selben PATCH (z. B. post_type="anlass", datetime=dt).
+    """
+    fields = {**extra, "text": obj.get("text") or "", "hashtags": obj.get("hashtags") or ""}
+    if obj.get("title"):
+        fields["title"] = obj["title"]
+    if obj.get("carousel_plan"):
+        fields["carousel_plan"] = {"carousel_plan": obj["carousel_plan"]}
+    return update_page_fields(page_id, **fields)
+
+def query_database(filter_: dict | None = None, sorts: list | None = None, page_size: int = 100):
+    """Generator über alle passenden Seiten der DB (paginiert über start_cursor)."""
+    body = {"page_size": page_size}
+    if filter_:
+        body["filter"] = filter_
+    if sorts:
+        body["sorts"] = sorts
+    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
+    while True:
+        with stage("notion"), NOTION_LIMITER:
+            r = requests.post(url, headers=HEADERS, json=body, timeout=30)
+        if r.status_code != 200:
+            raise RuntimeError(f"Notion query failed {r.status_code}: {r.text}")
+        data = r.json()
+        yield from data.get("results", [])
+        if not data.get("has_more"):
+            return
+        body["start_cursor"] = data.get("next_cursor")
+
+def _plain(prop: dict):
+    typ = (prop or {}).get("type")
+    val = (prop or {}).get(typ)
+    if typ in ("title", "rich_text"):
+        return "".join(t.get("plain_text") or (t.get("text") or {}).get("content", "") for t in val or [])
+    if typ == "select":
+        return (val or {}).get("name", "")
+    if typ == "multi_select":
+        return [o.get("name", "") for o in val or []]
+    if typ == "date":
+        return (val or {}).get("start")
+    if typ in ("checkbox", "url", "number"):
+        return val
+    return val
+
+def read_page(page: dict) -> dict:
+    """Seite → {feld: wert} mit den Schlüsseln aus PROP_SYNONYMS (+ id, last_edited_time)."""
+    raw = {k.lower(): v for k, v in (page.get("properties") or {}).items()}
+    out = {"id": page.get("id"), "last_edited_time": page.get("last_edited_time")}
+    for key, variants in PROP_SYNONYMS.items():
+        for v in variants:
+            if v.lower() in raw:
+                out[key] = _plain(raw[v.lower()])
+                break
+    return out
@@ -0,0 +1,257 @@
+# src/social_post/occasions.py
+"""
+Anlass-Kalender für beliebige Jahre.
+
+Quellen (in aufsteigender Priorität):
+  1. data/kalender_roh.txt      – jährlich wiederkehrende feste Termine ("04 Januar<TAB>Tag der Spaghetti")
+  2. data/anlass_regeln.json    – Regeln: fixed / nth_weekday / weekday_before / easter (+offset)
+  3. data/anlass_kalender.json  – kuratierte Einträge; "MM-DD" = jährlich, "YYYY-MM-DD" = exakt dieses Datum
+
+Enthält anlass_kalender.json Einträge "YYYY-…" für ein Jahr, gilt dieses Jahr als fertig kuratiert:
+Rohtext und Regeln werden dann für dieses Jahr nicht verwendet.
+
+Das Ergebnis wird pro Jahr in data/anlass_store.json abgelegt und nur neu kompiliert,
+wenn sich eine Quelle ändert (SHA-256 je Datei). Lookups sind reine Dict-Zugriffe.
+"""
+import datetime as _dt
+import hashlib, re
+from dateutil.easter import easter
+
+from .io_utils import read_json, write_json
+from .constants import ANLASS_FILE, ANLASS_RAW_FILE, ANLASS_RULES_FILE, ANLASS_STORE_FILE
+from .profiling import staged
+
+STORE_VERSION = 1
+
+MONATSNAMEN = {
+    "januar": 1, "februar": 2, "märz": 3, "april": 4, "mai": 5, "juni": 6,
+    "juli": 7, "august": 8, "september": 9, "oktober": 10, "november": 11, "dezember": 12,
+}
+WOCHENTAGE = {"mo": 0, "di": 1, "mi": 2, "do": 3, "fr": 4, "sa": 5, "so": 6}
+
+_LINE_RE = re.compile(r"^(\d{1,2})\s+([A-Za-zäöüÄÖÜ]+)\s+(.*)$")
+_EXTRA_KEYS = ("hashtags", "image_idea", "cta")
+
+# -----------------------------
+# Quellen parsen
+# -----------------------------
+def _file_sha(path) -> str:
+    if not path.exists():
+        return ""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+def sources_signature() -> dict:
+    return {
+        "raw": _file_sha(ANLASS_RAW_FILE),
+        "rules": _file_sha(ANLASS_RULES_FILE),
+        "curated": _file_sha(ANLASS_FILE),
+    }
+
+def clean_raw_lines(lines) -> list[str]:
+    """Fügt Folgezeilen (ohne Datum) an die vorherige Datumszeile an – wie früher clean_calender.py."""
+    out = []
+    for line in lines:
+        line = (line or "").strip()
+        if not line:
+            continue
+        if re.match(r"^\d{1,2} [A-Za-zäöüÄÖÜ]+", line):
+            out.append(line)
+        elif out:
+            out[-1] += ", " + line
+    return out
+
+def parse_raw_calendar(text: str) -> dict[tuple[int, int], list[str]]:
+    """Liefert {(monat, tag): [name, ...]} aus dem Rohtext."""
+    out: dict[tuple[int, int], list[str]] = {}
+    for line in clean_raw_lines(text.splitlines()):
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        tag, monat, rest = m.groups()
+        mon = MONATSNAMEN.get(monat.strip().lower())
+        if not mon:
+            continue
+        names = [n.strip() for n in re.split(r"[,\t]", rest) if n.strip()]
+        out.setdefault((mon, int(tag)), []).extend(names)
+    return out
+
+def _weekday(v) -> int:
+    if isinstance(v, int):
+        return v % 7
+    return WOCHENTAGE[str(v).strip().lower()[:2]]
+
+# -----------------------------
+# Regeln auswerten
+# -----------------------------
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> _dt.date | None:
+    """n-ter Wochentag im Monat; n=-1 → letzter."""
+    if n > 0:
+        first = _dt.date(year, month, 1)
+        d = first + _dt.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+        return d if d.month == month else None
+    nxt = _dt.date(year + (month == 12), month % 12 + 1, 1)
+    last = nxt - _dt.timedelta(days=1)
+    d = last - _dt.timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+    return d if d.month == month else None
+
+def _weekday_before(year: int, month: int, day: int, weekday: int, n: int) -> _dt.date:
+    """n-ter Wochentag strikt vor dem Anker (z. B. 4. Sonntag vor dem 25.12. = 1. Advent)."""
+    anchor = _dt.date(year, month, day)
+    back = (anchor.weekday() - weekday) % 7 or 7
+    return anchor - _dt.timedelta(days=back + 7 * (n - 1))
+
+def rule_date(rule: dict, year: int) -> _dt.date | None:
+    typ = (rule.get("type") or "fixed").strip().lower()
+    try:
+        if typ == "fixed":
+            d = _dt.date(year, int(rule["month"]), int(rule["day"]))
+        elif typ == "nth_weekday":
+            d = _nth_weekday(year, int(rule["month"]), _weekday(rule["weekday"]), int(rule.get("n", 1)))
+        elif typ == "weekday_before":
+            d = _weekday_before(year, int(rule["month"]), int(rule["day"]), _weekday(rule["weekday"]), int(rule.get("n", 1)))
+        elif typ == "easter":
+            d = easter(year)
+        else:
+            return None
+    except (KeyError, ValueError):
+        return None
+    if d is None:
+        return None
+    return d + _dt.timedelta(days=int(rule.get("offset", 0) or 0))
+
+# -----------------------------
+# Kompilieren
+# -----------------------------
+def _event(name: str, kategorie: str = "Sonstiges", src: dict | None = None) -> dict:
+    ev = {"name": name.strip(), "kategorie": (kategorie or "Sonstiges").strip()}
+    for k in _EXTRA_KEYS:
+        if src and (src.get(k) or "").strip():
+            ev[k] = src[k].strip()
+    return ev
+
+def _day_entry(events: list[dict]) -> dict:
+    """Format wie anlass_kalender.json (beschreibung/kategorie + optionale Extras) plus Einzel-Events."""
+    entry = {
+        "beschreibung": ", ".join(e["name"] for e in events),
+        "kategorie": events[0]["kategorie"],
+    }
+    for k in _EXTRA_KEYS:
+        v = next((e[k] for e in events if e.get(k)), "")
+        if v:
+            entry[k] = v
+    entry["events"] = events
+    return entry
+
+def _curated_entry(v) -> dict:
+    if isinstance(v, dict):
+        return dict(v)
+    return {"beschreibung": str(v).strip(), "kategorie": "Sonstiges"}
+
+def compile_year(year: int, raw: dict, rules: list[dict], exclude: set[str], curated: dict) -> dict:
+    """Kompiliert alle Anlässe eines Jahres zu {"YYYY-MM-DD": entry}."""
+    rule_names = {(r.get("name") or "").strip().lower() for r in rules}
+    skip = rule_names | exclude
+    days: dict[str, list[dict]] = {}
+    if any(k.startswith(f"{year}-") for k in curated):
+        raw, rules = {}, []  # Jahr ist kuratiert
+
+    # 1) Rohtext (bewegliche Termine werden über Regeln berechnet → hier ignorieren)
+    for (mon, tag), names in raw.items():
+        try:
+            d = _dt.date(year, mon, tag)
+        except ValueError:
+            continue  # 29. Februar in Nicht-Schaltjahren
+        evs = [_event(n) for n in names if n.lower() not in skip]
+        if evs:
+            days.setdefault(d.isoformat(), []).extend(evs)
+
+    # 2) Regeln (vor den Rohtext-Einträgen desselben Tages)
+    for r in rules:
+        name = (r.get("name") or "").strip()
+        d = rule_date(r, year) if name else None
+        if d is None or d.year != year:
+            continue
+        key = d.isoformat()
+        days[key] = [_event(name, r.get("kategorie") or "Sonstiges", r)] + days.get(key, [])
+
+    compiled = {k: _day_entry(v) for k, v in days.items()}
+
+    # 3) Kuratierte Einträge: "MM-DD" jährlich, "YYYY-MM-DD" exakt
+    for k, v in curated.items():
+        if re.fullmatch(r"\d{2}-\d{2}", k):
+            try:
+                key = _dt.date(year, int(k[:2]), int(k[3:])).isoformat()
+            except ValueError:
+                continue
+            compiled[key] = _curated_entry(v)
+    for k, v in curated.items():
+        if re.fullmatch(r"\d{4}-\d{2}-\d{2}", k) and k.startswith(f"{year}-"):
+            compiled[k] = _curated_entry(v)
+
+    return dict(sorted(compiled.items()))
+
+class OccasionStore:
+    """Nur-Lese-Mapping Datum → Anlass-Eintrag über mehrere Jahre (O(1)-Lookup)."""
+
+    def __init__(self, by_date: dict[str, dict]):
+        self._by_date = by_date
+
+    def __contains__(self, key) -> bool:
+        return self._key(key) in self._by_date
+
+    def __getitem__(self, key) -> dict:
+        return self._by_date[self._key(key)]
+
+    def __len__(self) -> int:
+        return len(self._by_date)
+
+    def get(self, key, default=None):
+        return self._by_date.get(self._key(key), default)
+
+    def items(self):
+        return self._by_date.items()
+
+    def events_for(self, key) -> list[dict]:
+        entry = self.get(key) or {}
+        return entry.get("events") or ([{"name": entry["beschreibung"], "kategorie": entry.get("kategorie", "")}]
+                                       if entry.get("beschreibung") else [])
+
+    @staticmethod
+    def _key(key) -> str:
+        if isinstance(key, (_dt.date, _dt.datetime)):
+            return key.strftime("%Y-%m-%d")
+        return str(key)
+
+@staged("occasions")
+def load_occasions(first_year: int, last_year: int | None = None, *, force=False, verbose=False) -> OccasionStore:
+    """
+    Liefert den Anlass-Kalender für [first_year, last_year].
+    Fehlende Jahre werden kompiliert; bei geänderten Quellen wird der Store verworfen.
+    """
+    last_year = last_year or first_year
+    sig = sources_signature()
+    store = read_json(ANLASS_STORE_FILE, {}) or {}
+    if force or store.get("version") != STORE_VERSION or store.get("sources") != sig:
+        if verbose and store:
+            print("🗓️ Anlass-Quellen geändert – Kalender wird neu kompiliert.")
+        store = {"version": STORE_VERSION, "sources": sig, "years": {}}
+
+    years = store.setdefault("years", {})
+    missing = [y for y in range(first_year, last_year + 1) if str(y) not in years]
+    if missing:
+        raw_text = ANLASS_RAW_FILE.read_text(encoding="utf-8") if ANLASS_RAW_FILE.exists() else ""
+        raw = parse_raw_calendar(raw_text)
+        rules_obj = read_json(ANLASS_RULES_FILE, {}) or {}
+        rules = rules_obj.get("rules", [])
+        exclude = {(n or "").strip().lower() for n in rules_obj.get("exclude", [])}
+        curated = read_json(ANLASS_FILE, {}) or {}
+        for y in missing:
+            years[str(y)] = compile_year(y, raw, rules, exclude, curated)
+            if verbose:
+                print(f"🗓️ Anlässe {y} kompiliert: {len(years[str(y)])} Tage")
+        write_json(ANLASS_STORE_FILE, store, compact=True)
+
+    by_date: dict[str, dict] = {}
+    for y in range(first_year, last_year + 1):
+        by_date.update(years.get(str(y), {}))
+    return OccasionStore(by_date)
@@ -1,29 +1,218 @@
+import threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .config import (
+    OPENAI_API_KEY, OPENAI_MODEL, OPENAI_MAX_CONCURRENCY, OPENAI_RPM,
+    OPENAI_HEDGE, OPENAI_HEDGE_PERCENTILE, OPENAI_HEDGE_MAX_EXTRA,
+)
+from .ratelimit import RateLimiter
+from .profiling import staged
 
-import time
-from .config import OPENAI_API_KEY, OPENAI_MODEL
+# Gemeinsamer Limiter für alle OpenAI-Aufrufe des Prozesses
+LIMITER = RateLimiter(OPENAI_MAX_CONCURRENCY, OPENAI_RPM)
 
-def call_openai(messages, retries=3, backoff=2.0, temperature=0.8):
+# Verbrauch je Thread (Tokens, Latenz) – z. B. pro geplantem Tag zurücksetzen und auslesen
+_usage = threading.local()
+
+def reset_usage():
+    _usage.tokens, _usage.latency_ms, _usage.calls = 0, 0.0, 0
+
+def get_usage() -> dict:
+    return {
+        "tokens": getattr(_usage, "tokens", 0),
+        "latency_ms": round(getattr(_usage, "latency_ms", 0.0), 1),
+        "calls": getattr(_usage, "calls", 0),
+    }
+
+def _track(tokens, started: float):
+    _usage.tokens = getattr(_usage, "tokens", 0) + int(tokens or 0)
+    _usage.latency_ms = getattr(_usage, "latency_ms", 0.0) + (time.monotonic() - started) * 1000
+    _usage.calls = getattr(_usage, "calls", 0) + 1
+
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client():
+    """Ein v1-Client pro Prozess (thread-safe, hält Verbindungen offen)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+def call_openai(messages, retries=3, backoff=2.0, temperature=0.8, model=None, max_tokens=None):
     """
     Lazy-Import: Verhindert Importfehler, wenn 'openai' nicht installiert ist.
     Nutzt v1 (OpenAI) oder fällt auf v0 (openai.ChatCompletion) zurück.
+    Alle Aufrufe laufen durch den gemeinsamen LIMITER (auch aus Threads).
+    """
+    return call_openai_candidates(messages, n=1, retries=retries, backoff=backoff, temperature=temperature,
+                                  model=model, max_tokens=max_tokens)[0]
+
+def _request(messages, n, temperature, client=None, model=None, max_tokens=None) -> tuple[list[str], int]:
+    """Ein einzelner Request (unter LIMITER). Rückgabe: (Texte, Tokens)."""
+    with LIMITER:
+        return _send(messages, n, temperature, client, model=model, max_tokens=max_tokens)
+
+def _send(messages, n, temperature, client=None, model=None, max_tokens=None) -> tuple[list[str], int]:
+    """Der eigentliche API-Aufruf – der Aufrufer hält bereits einen LIMITER-Slot."""
+    opts = {"model": model or OPENAI_MODEL, "messages": messages, "temperature": temperature, "n": n}
+    if max_tokens:
+        opts["max_tokens"] = int(max_tokens)
+    try:
+        resp = (client or _get_client()).chat.completions.create(**opts)
+        return [c.message.content for c in resp.choices], (getattr(resp.usage, "total_tokens", 0) if resp.usage else 0)
+    except Exception as e1:
+        if client is not None:
+            raise
+        # Fallback auf altes SDK
+        try:
+            import openai as _openai
+            _openai.api_key = OPENAI_API_KEY
+            resp = _openai.ChatCompletion.create(**opts)
+            return [c["message"]["content"] for c in resp["choices"]], (resp.get("usage") or {}).get("total_tokens", 0)
+        except Exception as e2:
+            raise e2
+
+# -----------------------------
+# Hedging (OPENAI_HEDGE=1)
+# -----------------------------
+class HedgePolicy:
     """
+    Lernt die Latenzverteilung der letzten Requests. Ist ein Request nach der
+    p-Perzentile noch nicht zurück, wird ein Duplikat gestartet; das schnellere
+    Ergebnis gewinnt. max_extra begrenzt den Anteil zusätzlicher Requests.
+    """
+    def __init__(self, percentile=90.0, max_extra=0.1, min_samples=20, window=200):
+        self.percentile = min(99.9, max(50.0, float(percentile)))
+        self.max_extra = max(0.0, float(max_extra))
+        self.min_samples = min_samples
+        self._lat = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = self.hedged = self.hedge_wins = self.wasted_tokens = 0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._lat.append(seconds)
+
+    def threshold(self) -> float | None:
+        """Wartezeit bis zum Duplikat (None = noch zu wenige Messwerte)."""
+        with self._lock:
+            if len(self._lat) < self.min_samples:
+                return None
+            data = sorted(self._lat)
+        return data[min(len(data) - 1, int(len(data) * self.percentile / 100))]
+
+    def may_hedge(self) -> bool:
+        with self._lock:
+            return self.hedged < self.max_extra * max(1, self.calls)
+
+    def count(self, attr: str, k: int = 1):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + k)
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "hedged": self.hedged, "hedge_wins": self.hedge_wins,
+                "wasted_tokens": self.wasted_tokens, "threshold_s": self.threshold()}
+
+HEDGE = HedgePolicy(OPENAI_HEDGE_PERCENTILE, OPENAI_HEDGE_MAX_EXTRA)
+_hedge_pool = ThreadPoolExecutor(max_workers=max(2, 2 * OPENAI_MAX_CONCURRENCY), thread_name_prefix="openai-hedge")
+
+def _timed(messages, n, temperature, client=None, **opts):
+    """Request unter LIMITER; gemessen wird erst ab erhaltenem Slot (ohne Wartezeit im Limiter)."""
+    with LIMITER:
+        return _timed_send(messages, n, temperature, client, **opts)
+
+def _timed_send(messages, n, temperature, client=None, **opts):
+    t0 = time.monotonic()
+    texts, tokens = _send(messages, n, temperature, client, **opts)
+    HEDGE.observe(time.monotonic() - t0)
+    return texts, tokens
+
+def _timed_held(messages, n, temperature, client=None, **opts):
+    """Für das Duplikat: Slot wurde vorab per try_acquire() genommen und wird hier freigegeben."""
+    try:
+        return _timed_send(messages, n, temperature, client, **opts)
+    finally:
+        LIMITER.release()
+
+def _hedged_request(messages, n, temperature, **opts) -> tuple[list[str], int]:
+    """
+    Primär-Request über den gemeinsamen Client; das Duplikat bekommt einen eigenen
+    Client, der geschlossen (= abgebrochen) wird, wenn der Primär-Request gewinnt.
+    Gewinnt das Duplikat, läuft der Primär-Request im Hintergrund aus; sein Ergebnis
+    wird verworfen (Tokens zählen als wasted_tokens).
+    Warten andere Aufrufe auf den LIMITER oder ist kein Slot sofort frei, wird nicht
+    gehedgt – ein wartendes Duplikat ließe sich per close() nicht mehr abbrechen.
+    """
+    HEDGE.count("calls")
+    primary = _hedge_pool.submit(_timed, messages, n, temperature, **opts)
+    wait_s = HEDGE.threshold()
+    if wait_s is None or not HEDGE.may_hedge():
+        return primary.result()
+    done, _ = wait([primary], timeout=wait_s)
+    if done or not HEDGE.may_hedge() or LIMITER.waiting or not LIMITER.try_acquire():
+        return primary.result()
+
+    try:
+        from openai import OpenAI
+        dup_client = OpenAI(api_key=OPENAI_API_KEY)
+        duplicate = _hedge_pool.submit(_timed_held, messages, n, temperature, dup_client, **opts)
+    except Exception:
+        LIMITER.release()
+        return primary.result()
+    HEDGE.count("hedged")
+    pending = {primary, duplicate}
+    last_error = None
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if fut is duplicate:
+                    HEDGE.count("hedge_wins")
+                    primary.add_done_callback(_count_waste)
+                return result
+        raise last_error
+    finally:
+        try:
+            dup_client.close()      # bricht ein noch laufendes Duplikat ab
+        except Exception:
+            pass
+
+def _count_waste(fut):
+    try:
+        _, tokens = fut.result()
+    except Exception:
+        return
+    HEDGE.count("wasted_tokens", int(tokens or 0))
+
+def get_hedge_stats() -> dict:
+    return HEDGE.stats()
+
+@staged("openai")
+def call_openai_candidates(messages, n=1, retries=3, backoff=2.0, temperature=0.8, model=None, max_tokens=None) -> list[str]:
+    """
+    Wie call_openai, aber mit n Completions in EINEM Request (Prompt wird nur einmal bezahlt).
+    Rückgabe: Liste der n Antwort-Texte.
+    """
+    n = max(1, int(n or 1))
     last = None
     for i in range(retries):
+        started = time.monotonic()
         try:
-            try:
-                from openai import OpenAI
-                client = OpenAI(api_key=OPENAI_API_KEY)
-                resp = client.chat.completions.create(model=OPENAI_MODEL, messages=messages, temperature=temperature)
-                return resp.choices[0].message.content
-            except Exception as e1:
-                # Fallback auf altes SDK
-                try:
-                    import openai as _openai
-                    _openai.api_key = OPENAI_API_KEY
-                    resp = _openai.ChatCompletion.create(model=OPENAI_MODEL, messages=messages, temperature=temperature)
-                    return resp["choices"][0]["message"]["content"]
-                except Exception as e2:
-                    raise e2
+            if OPENAI_HEDGE:
+                texts, tokens = _hedged_request(messages, n, temperature, model=model, max_tokens=max_tokens)
+            else:
+                texts, tokens = _request(messages, n, temperature, model=model, max_tokens=max_tokens)
+            _track(tokens, started)
+            return texts
         except Exception as e:
             last = e
             time.sleep(backoff * (i+1))
@@ -1,11 +1,13 @@
-import re, json
-from .openai_client import call_openai
+import datetime, hashlib, re, json
+from .routing import call_route
+
+TEXT_HARD_LIMIT = 2000   # Notion rich_text; die 300er-Grenze setzt guardrails durch
 
 SYSTEM = (
     "Du erstellst Social-Media-Posts für ein Restaurant. "
     'Gib ausschließlich valides JSON zurück mit genau diesen Feldern: '
-    '{ "title": "", "text": "", "hashtags": "", "platform_suggestion": "", "media_type": "Bild|Video", "image_idea": "" } '
-    "Ohne Erklärtext, kein Markdown."
+    '{ "title": "", "text": "", "platform_suggestion": "", "media_type": "Bild|Video", "image_idea": "" } '
+    "Keine Hashtags (werden lokal ergänzt). Ohne Erklärtext, kein Markdown."
 )
 
 # -----------------------------
@@ -34,6 +36,11 @@ def parse_json_or_fallback(s: str):
             pass
     return {"title": "", "text": "", "hashtags": "", "platform_suggestion": "", "media_type": "", "image_idea": ""}
 
+def is_valid_post_json(s: str) -> bool:
+    """Validierung fürs Modell-Routing: JSON mit nicht-leerem Text und Titel."""
+    obj = parse_json_or_fallback(s)
+    return isinstance(obj, dict) and bool(_to_str(obj.get("text")).strip()) and bool(_to_str(obj.get("title")).strip())
+
 def get_cross_platform_targets(suggestion):
     v = (suggestion or "").lower()
     if "carousel" in v:
@@ -48,7 +55,8 @@ def _sanitize_post_obj(obj: dict) -> dict:
     """Trim, Standardwerte, Typ-Robustheit."""
     out = dict(obj or {})
     out["title"] = (_to_str(out.get("title"))).strip()[:120] or "Idee für den Tag"
-    out["text"] = (_to_str(out.get("text"))).strip()[:300]
+    # Länge > 300 wird nicht abgeschnitten, sondern von guardrails geprüft (gezielt neu generiert)
+    out["text"] = (_to_str(out.get("text"))).strip()[:TEXT_HARD_LIMIT]
     out["hashtags"] = (_to_str(out.get("hashtags"))).strip()[:300]
     out["platform_suggestion"] = (_to_str(out.get("platform_suggestion")) or "Instagram Post").strip()
     mt = (_to_str(out.get("media_type")) or "Bild").strip().lower()
@@ -84,16 +92,38 @@ def _apply_anlass_overrides(obj: dict, extras: dict | None) -> dict:
         cta = _to_str(extras.get("cta_override")).strip()
         if cta:
             base = _to_str(out.get("text")).strip()
-            out["text"] = (f"{base} {cta}".strip() if base else cta)[:300]
+            out["text"] = f"{base} {cta}".strip() if base else cta
 
     return out
 
+def build_placeholder_post(date, titel, beschreibung, post_type):
+    """Platzhalter ohne KI (--skip-ai): Titel/Beschreibung übernehmen."""
+    title_in = _to_str(titel)
+    desc_in  = _to_str(beschreibung)
+    title = (title_in or (post_type.title() if isinstance(post_type, str) else "Post")).strip()[:120]
+    text  = (desc_in or title).strip()
+    return {
+        "title": title or "Idee für den Tag",
+        "text": text,
+        "hashtags": "",
+        "platform_suggestion": "Instagram Post",
+        "media_type": "Bild",
+        "image_idea": "",
+        # Platzhalter — wird in der CLI (nach evtl. Carousel-Plan) überschrieben
+        "platform_targets": [
+            {"name": "Instagram Post"},
+            {"name": "Facebook"},
+            {"name": "Google Business Profile"},
+        ],
+    }
+
+COOKING_CLAIM_PATTERN = r"\b(?:koch\w*|brat\w*|back\w*|rezept\w*|gericht\w*|zutat\w*|zubereit\w*)\b"
+
 def _has_cooking_claims(text: str) -> bool:
     """Erkennt typische Koch-/Zutat-Behauptungen (deutsch)."""
     if not text:
         return False
-    pattern = r"\b(koch\w*|brat\w*|back\w*|rezept\w*|gericht\w*|zutat\w*|zubereit\w*)\b"
-    return re.search(pattern, text.lower()) is not None
+    return re.search(COOKING_CLAIM_PATTERN, text.lower()) is not None
 
 # -----------------------------
 # Prompt Builder (mit extras)
@@ -142,31 +172,25 @@ def build_prompt(date, gericht, beschreibung, post_type, extras=None):
         f"Beschreibung: {beschreibung or ''}. Max 300 Zeichen im Feld 'text'."
     )
 
+# Ändern sich System-Prompt oder Vorlagen, gelten generierte Posts als veraltet (Artefakt-Graph)
+POST_PROMPT_VERSION = hashlib.sha1("\n".join(
+    [SYSTEM] + [build_prompt(datetime.date(2000, 1, 1), "{gericht}", "{beschreibung}", t, {"category": c})
+                for t in ("anlass", "zitat", "ingredient_fact", "produkt") for c in ("", "beverage")]
+).encode("utf-8")).hexdigest()[:10]
+
 # -----------------------------
 # Hauptfunktion
 # -----------------------------
-def generate_post_content(date, gericht, beschreibung, post_type, extras=None):
-    content = call_openai(
-        [
-            {"role": "system", "content": SYSTEM},
-            {"role": "user", "content": build_prompt(date, gericht, beschreibung, post_type, extras=extras)},
-        ],
-        temperature=0.8,
-    )
-    obj = parse_json_or_fallback(content)
+def _finalize_post(obj: dict, gericht, beschreibung, post_type, extras=None) -> dict:
+    """Sanitizing und Anlass-Overrides auf ein geparstes Modell-Ergebnis anwenden."""
     obj = _sanitize_post_obj(obj)
 
-    
     if post_type == "anlass":
         obj = _apply_anlass_overrides(obj, extras or {})
-# 🚧 Guardrails für Getränke / nicht kochbar
+    # Getränke / nicht kochbar: Bild & Plattform anpassen (Koch-Aussagen prüft guardrails)
     cat = (_to_str((extras or {}).get("category")) or "").lower()
     cookable = bool((extras or {}).get("cookable", True))
     if cat == "beverage" or not cookable:
-        if _has_cooking_claims(obj.get("text", "")):
-            # Fallback: nutze den gegebenen beschreibungstext als sicheren, kompakten Post
-            safe = build_short_fact({"fact": _to_str(beschreibung)}, max_chars=280)
-            obj["text"] = safe
         if not obj.get("image_idea"):
             obj["image_idea"] = (
                 f"Close-up von '{gericht}' im Glas mit Eis und Orangenscheibe; "
@@ -179,6 +203,68 @@ def generate_post_content(date, gericht, beschreibung, post_type, extras=None):
 
     return obj
 
+def score_candidate(raw: dict, post_type, extras=None, sim_index=None) -> float:
+    """
+    Lokale Bewertung eines (noch ungekürzten) Kandidaten – kleiner ist besser:
+    Länge > 300 Zeichen, fehlender Anlass-Name, Koch-Aussagen bei Getränken,
+    Ähnlichkeit zu früheren Posts (0–1, via dedupe.SimilarityIndex).
+    """
+    extras = extras or {}
+    text = _to_str((raw or {}).get("text")).strip()
+    score = 0.0
+    if not text:
+        return 100.0
+    if len(text) > 300:
+        score += 1.0 + (len(text) - 300) / 100
+    anlass_name = _to_str(extras.get("anlass_name")).strip().lower()
+    if post_type == "anlass" and anlass_name and anlass_name not in text.lower():
+        score += 2.0
+    cat = (_to_str(extras.get("category")) or "").lower()
+    if (cat == "beverage" or not bool(extras.get("cookable", True))) and _has_cooking_claims(text):
+        score += 3.0
+    if sim_index is not None:
+        sim, _ = sim_index.query(f"{_to_str(raw.get('title'))}\n{text}", exclude=extras.get("own_id"))
+        score += sim
+    return round(score, 4)
+
+def generate_post_content(date, gericht, beschreibung, post_type, extras=None, candidates=1, sim_index=None):
+    """
+    Erzeugt einen Post. candidates>1 → n Completions in einem Request; der beste Kandidat
+    (score_candidate) wird zurückgegeben, die übrigen landen sortiert (mit "score") in
+    obj["alternates"], der Score des gewählten in obj["chosen_score"] – beides Metadaten
+    für history.record_candidates, die der Aufrufer vor dem Schreiben entfernt.
+    """
+    prompt = build_prompt(date, gericht, beschreibung, post_type, extras=extras)
+    avoid = _to_str((extras or {}).get("avoid_text")).strip()
+    if avoid:
+        # Neu-Generierung nach Near-Duplicate: deutlich anders formulieren
+        prompt += f"\n\nFormuliere deutlich anders als dieser frühere Post (andere Einleitung, andere Wortwahl):\n{avoid[:400]}"
+    fix = _to_str((extras or {}).get("guard_feedback")).strip()
+    if fix:
+        # Neu-Generierung nach Guardrail-Verstoß (guardrails.guard_batch)
+        prompt += f"\n\nDie vorige Fassung verstieß gegen unsere Regeln. Beachte unbedingt:\n{fix}"
+    messages = [
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": prompt},
+    ]
+    if candidates <= 1:
+        content = call_route(post_type, messages, validate=is_valid_post_json)[0]
+        return _finalize_post(parse_json_or_fallback(content), gericht, beschreibung, post_type, extras)
+
+    contents = call_route(post_type, messages, n=candidates, temperature=0.9, validate=is_valid_post_json)
+    scored = []
+    for content in contents:
+        raw = parse_json_or_fallback(content)
+        score = score_candidate(raw, post_type, extras, sim_index)
+        obj = _finalize_post(raw, gericht, beschreibung, post_type, extras)
+        obj["score"] = score
+        scored.append(obj)
+    scored.sort(key=lambda o: o["score"])
+    best = scored[0]
+    best["chosen_score"] = best.pop("score")
+    best["alternates"] = scored[1:]
+    return best
+
 # -----------------------------
 # Zitate & Facts
 # -----------------------------
@@ -0,0 +1,189 @@
+# src/social_post/profiling.py
+"""
+Eingebauter Profiler (--profile [ORDNER]).
+
+Zwei Sichten auf denselben Lauf:
+1) Stages: stage("generate") / @staged("json") messen Wall-Zeit und CPU-Zeit des
+   jeweiligen Threads (time.thread_time). Differenz = Warten (Netz, Locks, Sleep).
+   Verschachtelte Stages erscheinen als Pfad ("generate/openai").
+2) Sampling: ein Hintergrund-Thread liest alle N ms die Stacks aller Threads
+   (sys._current_frames). Daraus entstehen
+   - <ordner>/profile-<zeit>.folded  (collapsed stacks → flamegraph.pl / speedscope)
+   - <ordner>/profile-<zeit>.txt     (Top-N Funktionen, Stage-Tabelle)
+   Samples, deren oberster Frame in threading/queue/socket/ssl/… blockiert,
+   zählen als "wartend".
+
+Ohne --profile sind stage()/staged() praktisch kostenlos (ein Flag-Check).
+"""
+import contextlib, functools, os, sys, threading, time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+_ACTIVE = False
+_PROFILER = None
+_STACKS: dict[int, list] = {}   # Thread-ID → [(stage, wall0, cpu0), …]
+
+# oberster Frame in diesen Modulen + Funktionen → Thread wartet (kein CPU)
+_WAIT_MODULES = ("threading.py", "queue.py", "socket.py", "ssl.py", "selectors.py", "subprocess.py",
+                 "connection.py", "client.py", "thread.py", "process.py")
+_WAIT_FUNCS = {"wait", "acquire", "sleep", "select", "poll", "recv", "recv_into", "readinto", "read",
+               "readline", "accept", "get", "join", "_wait_for_tstate_lock", "create_connection", "connect"}
+
+def _stack() -> list:
+    ident = threading.get_ident()
+    st = _STACKS.get(ident)
+    if st is None:
+        st = _STACKS[ident] = []
+    return st
+
+@contextlib.contextmanager
+def stage(name: str):
+    if not _ACTIVE:
+        yield
+        return
+    st = _stack()
+    st.append((name, time.perf_counter(), time.thread_time()))
+    try:
+        yield
+    finally:
+        _, w0, c0 = st[-1]
+        path = "/".join(s[0] for s in st)
+        st.pop()
+        if _PROFILER is not None:
+            _PROFILER.add_stage(path, time.perf_counter() - w0, time.thread_time() - c0)
+
+def staged(name: str):
+    """Decorator-Variante von stage()."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _ACTIVE:
+                return fn(*a, **kw)
+            with stage(name):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
+
+def _label(code) -> str:
+    qual = getattr(code, "co_qualname", code.co_name)
+    return f"{qual} ({os.path.basename(code.co_filename)})"
+
+class Profiler:
+    def __init__(self, interval_ms: float = 5.0):
+        self.interval = max(0.5, float(interval_ms)) / 1000.0
+        self.stages: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])   # path → [calls, wall, cpu]
+        self.folded: Counter = Counter()
+        self.self_samples: Counter = Counter()
+        self.incl_samples: Counter = Counter()
+        self.stage_samples: dict[str, Counter] = defaultdict(Counter)       # stage → {"cpu","wait"}
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self.started = self.wall = 0.0
+        self.cpu0 = 0.0
+
+    def add_stage(self, path: str, wall: float, cpu: float):
+        with self._lock:
+            s = self.stages[path]
+            s[0] += 1
+            s[1] += wall
+            s[2] += cpu
+
+    # ---- Sampling ----
+    def _sample_loop(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                self._record(names.get(ident, str(ident)), ident, frame)
+
+    def _record(self, thread_name: str, ident: int, frame):
+        codes = []
+        f = frame
+        while f is not None:
+            if f.f_code.co_filename != __file__:   # eigene Wrapper-Frames ausblenden
+                codes.append(f.f_code)
+            f = f.f_back
+        codes.reverse()
+        if not codes:
+            return
+        leaf = codes[-1]
+        waiting = leaf.co_name in _WAIT_FUNCS and os.path.basename(leaf.co_filename) in _WAIT_MODULES
+        st = [s[0] for s in (_STACKS.get(ident) or [])]
+        stage_path = "/".join(st) or "-"
+        labels = [_label(c) for c in codes]
+        key = ";".join([thread_name] + [f"[{s}]" for s in st] + labels + (["[wait]"] if waiting else []))
+        self.samples += 1
+        self.folded[key] += 1
+        self.self_samples[labels[-1]] += 1
+        for lb in set(labels):
+            self.incl_samples[lb] += 1
+        self.stage_samples[stage_path]["wait" if waiting else "cpu"] += 1
+
+    # ---- Start/Stop ----
+    def start(self):
+        global _ACTIVE, _PROFILER
+        _PROFILER = self
+        _ACTIVE = True
+        self.started = time.perf_counter()
+        self.cpu0 = time.process_time()
+        self._thread.start()
+
+    def stop(self):
+        global _ACTIVE, _PROFILER
+        self._stop.set()
+        self._thread.join()
+        self.wall = time.perf_counter() - self.started
+        self.cpu = time.process_time() - self.cpu0
+        _ACTIVE = False
+        _PROFILER = None
+
+    # ---- Ausgabe ----
+    def summary(self, top: int = 20) -> str:
+        lines = [f"Laufzeit {self.wall:.2f}s wall, {self.cpu:.2f}s CPU (Prozess), "
+                 f"{self.samples} Samples à {self.interval * 1000:.1f} ms", ""]
+        lines.append(f"{'Stage':40} {'Aufrufe':>8} {'Wall s':>9} {'CPU s':>9} {'Warten s':>9} {'Wall %':>7}")
+        for path, (calls, wall, cpu) in sorted(self.stages.items(), key=lambda kv: -kv[1][1]):
+            pct = 100 * wall / self.wall if self.wall else 0
+            lines.append(f"{path[:40]:40} {calls:8d} {wall:9.3f} {cpu:9.3f} {max(0.0, wall - cpu):9.3f} {pct:6.1f}%")
+        if self.stage_samples:
+            lines += ["", f"{'Stage (Samples)':40} {'CPU':>8} {'wartend':>8}"]
+            for path, c in sorted(self.stage_samples.items(), key=lambda kv: -sum(kv[1].values())):
+                lines.append(f"{path[:40]:40} {c['cpu']:8d} {c['wait']:8d}")
+        total = max(1, self.samples)
+        for title, counter in (("Top Self (Funktion selbst)", self.self_samples),
+                               ("Top Inklusiv (inkl. Aufgerufenes)", self.incl_samples)):
+            lines += ["", title]
+            for label, n in counter.most_common(top):
+                lines.append(f"{100 * n / total:6.1f}%  {n:7d}  {label}")
+        return "\n".join(lines)
+
+    def write(self, out_dir: Path, top: int = 20) -> tuple[Path, Path]:
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        folded = out_dir / f"profile-{stamp}.folded"
+        report = out_dir / f"profile-{stamp}.txt"
+        folded.write_text("".join(f"{k} {v}\n" for k, v in self.folded.most_common()), encoding="utf-8")
+        report.write_text(self.summary(top) + "\n", encoding="utf-8")
+        return folded, report
+
+@contextlib.contextmanager
+def profile_run(out_dir, interval_ms: float = 5.0, top: int = 20):
+    """Profiliert den Block; schreibt danach .folded + .txt und gibt die Zusammenfassung aus."""
+    prof = Profiler(interval_ms)
+    prof.start()
+    try:
+        with stage("run"):
+            yield prof
+    finally:
+        prof.stop()
+        folded, report = prof.write(out_dir, top)
+        print("\n⏱️ Profil\n" + prof.summary(min(top, 15)))
+        print(f"⏱️ Collapsed Stacks: {folded}  |  Bericht: {report}")
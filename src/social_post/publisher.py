@@ -0,0 +1,276 @@
+# src/social_post/publisher.py
+"""
+Auto-Posting-Worker (--autopost).
+
+Lädt alle Seiten mit "Automatisch posten" = ✓ und Status Bereit/Geplant einmal aus
+Notion und legt sie in einen Heap, sortiert nach "Geplanter Zeitpunkt". Der Worker
+schläft bis zum nächsten fälligen Eintrag (oder bis zum nächsten Refresh) statt zu
+pollen. Refreshes fragen nur Seiten ab, die seit dem letzten Blick bearbeitet wurden
+(last_edited_time-Cursor) – auch bei hunderten geplanten Posts bleibt das bei
+wenigen Requests pro Stunde.
+
+Beim Veröffentlichen werden die Drive-Dateien nur für die Dauer des Uploads
+öffentlich gemacht (make_file_public → publish → revoke_public). Die Post-ID landet
+sofort im lokalen Ledger (data/autopost_ledger.json), erst danach werden Status,
+Posted At, Post ID, Error und Media Status zurückgeschrieben. Scheitert das
+Rückschreiben, bleibt die Seite zwar "Bereit", wird aber nicht erneut
+veröffentlicht – beim nächsten Mal wird nur das Rückschreiben wiederholt.
+
+Die Plattform ist austauschbar (PlatformClient); LocalPlatformClient schreibt nur
+nach out/published.jsonl und dient als Stand-in für Tests.
+"""
+import hashlib, heapq, json, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from .constants import REGION_TZ, AUTOPOST_LEDGER_FILE
+from .io_utils import read_json, write_json
+from .notion_client import PROP_SYNONYMS, _resolve, query_database, read_page, update_page_fields
+
+READY_STATUSES = ("Bereit", "Geplant")
+
+# -----------------------------
+# Plattformen
+# -----------------------------
+class PlatformClient:
+    name = "platform"
+
+    def publish(self, post: dict, media_urls: list[str]) -> str:
+        """Veröffentlicht einen Post; Rückgabe: Post-ID der Plattform. Fehler → Exception."""
+        raise NotImplementedError
+
+class LocalPlatformClient(PlatformClient):
+    """Stand-in: protokolliert den Post als JSON-Zeile und liefert eine stabile Fake-ID."""
+    name = "local"
+
+    def __init__(self, path: Path = Path("out") / "published.jsonl"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def publish(self, post, media_urls):
+        post_id = "local-" + hashlib.sha1(f"{post.get('id')}|{time.time()}".encode()).hexdigest()[:12]
+        line = {"post_id": post_id, "page_id": post.get("id"), "title": post.get("title"),
+                "text": post.get("text"), "hashtags": post.get("hashtags"),
+                "platforms": post.get("platform"), "media": media_urls,
+                "published_at": datetime.now().isoformat(timespec="seconds")}
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return post_id
+
+PLATFORM_CLIENTS = {"local": LocalPlatformClient}
+
+def get_platform_client(name: str) -> PlatformClient:
+    try:
+        return PLATFORM_CLIENTS[(name or "local").lower()]()
+    except KeyError:
+        raise ValueError(f"Unbekannter Plattform-Client '{name}' (erlaubt: {', '.join(PLATFORM_CLIENTS)})")
+
+# -----------------------------
+# Hilfen
+# -----------------------------
+def _due_ts(value: str | None) -> float | None:
+    """Notion-Datum → Epoch-Sekunden; naive Zeitpunkte gelten in REGION_TZ."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(REGION_TZ))
+    return dt.timestamp()
+
+def _file_ids(props: dict) -> list[str]:
+    """Primary Image zuerst, dann Karussell-Dateien (Reihenfolge bleibt, keine Duplikate)."""
+    ids = []
+    for raw in (props.get("primary_id"), props.get("carousel_ids")):
+        for fid in (raw or "").replace(",", " ").split():
+            if fid not in ids:
+                ids.append(fid)
+    return ids
+
+def _lazy_drive_service():
+    try:
+        from .google_drive import get_drive_service
+        return get_drive_service()
+    except Exception as e:
+        print(f"⚠️ Drive deaktiviert (Posts ohne Medien-Links): {e}")
+        return None
+
+# -----------------------------
+# Worker
+# -----------------------------
+class AutoPoster:
+    def __init__(self, client: PlatformClient, drive_service=None, history=None,
+                 refresh_interval: float = 900, dry_run: bool = False, verbose: bool = False,
+                 ledger_path=AUTOPOST_LEDGER_FILE):
+        self.client = client
+        self.drive = drive_service
+        self.history = history
+        self.refresh_interval = max(30.0, float(refresh_interval))
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self._heap: list[tuple[float, int, str]] = []
+        self._pages: dict[str, tuple[int, dict]] = {}   # page_id → (Version, Props); Heap-Einträge anderer Versionen sind veraltet
+        self._seq = 0
+        self._cursor: str | None = None
+        self._next_refresh = 0.0
+        self.published = self.failed = 0
+        self.ledger_path = ledger_path
+        self._ledger: dict[str, dict] = read_json(ledger_path, {}) or {}   # page_id → {post_id, posted_at}
+
+    # ---- Queue ----
+    def _eligible(self, props: dict) -> bool:
+        return bool(props.get("auto")) and props.get("status") in READY_STATUSES and _due_ts(props.get("datetime"))
+
+    def _upsert(self, props: dict):
+        pid = props["id"]
+        if not self._eligible(props):
+            self._pages.pop(pid, None)
+            return
+        self._seq += 1
+        self._pages[pid] = (self._seq, props)
+        heapq.heappush(self._heap, (_due_ts(props["datetime"]), self._seq, pid))
+
+    def _peek(self) -> tuple[float, dict] | None:
+        while self._heap:
+            due, seq, pid = self._heap[0]
+            cur = self._pages.get(pid)
+            if cur and cur[0] == seq:
+                return due, cur[1]
+            heapq.heappop(self._heap)   # veraltet
+        return None
+
+    def __len__(self):
+        return len(self._pages)
+
+    # ---- Notion ----
+    def _filter(self, incremental: bool) -> dict | None:
+        if incremental:
+            # auch Seiten, die nicht (mehr) bereit sind → damit sie aus der Queue fallen
+            return {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": self._cursor}}
+        parts = []
+        if (p := _resolve(PROP_SYNONYMS["auto"])):
+            parts.append({"property": p, "checkbox": {"equals": True}})
+        if (p := _resolve(PROP_SYNONYMS["status"])):
+            parts.append({"or": [{"property": p, "select": {"equals": s}} for s in READY_STATUSES]})
+        return {"and": parts} if parts else None
+
+    def refresh(self):
+        incremental = self._cursor is not None
+        # Startzeit vor der Abfrage merken: beim Voll-Laden ist das der Cursor für den nächsten Refresh
+        started = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+        n = 0
+        for page in query_database(self._filter(incremental)):
+            props = read_page(page)
+            self._upsert(props)
+            edited = props.get("last_edited_time")
+            if incremental and edited and edited > self._cursor:
+                self._cursor = edited
+            n += 1
+        if not incremental:
+            self._cursor = started
+        self._next_refresh = time.time() + self.refresh_interval
+        if self.verbose or not incremental:
+            print(f"📬 Auto-Post-Queue: {len(self)} geplant ({n} Seiten gelesen)")
+
+    # ---- Veröffentlichen ----
+    def publish(self, props: dict):
+        pid = props["id"]
+        title = props.get("title") or pid
+        if self.dry_run:
+            print(f"📝 DRY-RUN: würde veröffentlichen → {title}")
+            return
+        done = self._ledger.get(pid)
+        if done:
+            # schon veröffentlicht, nur das Rückschreiben nach Notion war gescheitert
+            print(f"↩️ bereits veröffentlicht: {title} ({done['post_id']}) – Notion wird nachgezogen")
+            self._mark_posted(pid, done["post_id"], datetime.fromisoformat(done["posted_at"]))
+            return
+        file_ids = _file_ids(props) if self.drive else []
+        opened = []
+        try:
+            from .google_drive import make_file_public, revoke_public
+        except Exception:
+            make_file_public = revoke_public = None
+        try:
+            urls = []
+            for fid in file_ids:
+                urls.append(make_file_public(self.drive, fid))
+                opened.append(fid)
+            post_id = self.client.publish(props, urls)
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ {title}: {e}")
+            update_page_fields(pid, status="Fehlgeschlagen", error=str(e), media_status="failed")
+            self._record(pid, status="failed", error=str(e))
+            return
+        finally:
+            for fid in opened:
+                try:
+                    revoke_public(self.drive, fid)
+                except Exception as e:
+                    print(f"⚠️ Freigabe für {fid} konnte nicht entfernt werden: {e}")
+        now = datetime.now().astimezone()
+        self.published += 1
+        print(f"✅ veröffentlicht: {title} ({post_id})")
+        # vor dem Rückschreiben festhalten → ein Notion-Fehler führt nicht zum Doppel-Post
+        self._ledger[pid] = {"post_id": post_id, "posted_at": now.isoformat(timespec="seconds")}
+        write_json(self.ledger_path, self._ledger, lock=True)
+        self._mark_posted(pid, post_id, now)
+
+    def _mark_posted(self, page_id: str, post_id: str, posted_at: datetime):
+        self._record(page_id, status="posted", external_post_id=post_id, error="",
+                     posted_at=posted_at.isoformat(timespec="seconds"))
+        update_page_fields(page_id, status="Gepostet", posted_at=posted_at, post_id=post_id, error="",
+                           media_status="posted")
+
+    def _record(self, page_id: str, **fields):
+        if self.history is None:
+            return
+        row = self.history.post_by_page(page_id)
+        if row is not None:
+            self.history.update_post(row["id"], **fields)
+
+    # ---- Schleife ----
+    def run(self, stop: threading.Event | None = None, once: bool = False):
+        """
+        Arbeitet fällige Posts ab und schläft bis zum nächsten Zeitpunkt bzw. Refresh.
+        once=True: nur aktuell fällige Posts veröffentlichen und zurückkehren.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            now = time.time()
+            if now >= self._next_refresh:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"⚠️ Notion-Refresh fehlgeschlagen: {e}")
+                    self._next_refresh = now + self.refresh_interval
+            head = self._peek()
+            if head and head[0] <= now:
+                heapq.heappop(self._heap)
+                self._pages.pop(head[1]["id"], None)
+                try:
+                    self.publish(head[1])
+                except Exception as e:
+                    print(f"⚠️ Rückschreiben für {head[1].get('title')} fehlgeschlagen: {e}")
+                continue
+            if once:
+                return
+            wake = self._next_refresh if head is None else min(head[0], self._next_refresh)
+            if self.verbose and head:
+                print(f"💤 nächster Post {datetime.fromtimestamp(head[0]):%Y-%m-%d %H:%M} – {head[1].get('title')}")
+            stop.wait(max(0.0, wake - time.time()))
+
+def run_autopost(client_name="local", refresh_interval=900, once=False, dry_run=False, history=None, verbose=False):
+    drive = None if dry_run else _lazy_drive_service()
+    poster = AutoPoster(get_platform_client(client_name), drive_service=drive, history=history,
+                        refresh_interval=refresh_interval, dry_run=dry_run, verbose=verbose)
+    try:
+        poster.run(once=once)
+    except KeyboardInterrupt:
+        print("⏹️ Auto-Posting beendet.")
+    return poster
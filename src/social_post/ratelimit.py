@@ -0,0 +1,58 @@
+# src/social_post/ratelimit.py
+import threading, time
+
+class RateLimiter:
+    """
+    Prozessweiter Limiter als Context-Manager:
+    max. `concurrency` gleichzeitige Aufrufe + optional Mindestabstand (rpm = Requests/Minute).
+    """
+    def __init__(self, concurrency: int, rpm: float = 0):
+        self.concurrency = max(1, concurrency)
+        self._sem = threading.BoundedSemaphore(self.concurrency)
+        self._interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+        self._waiting = 0
+
+    @property
+    def waiting(self) -> int:
+        """Anzahl Threads, die gerade auf einen Slot warten."""
+        return self._waiting
+
+    def __enter__(self):
+        if not self._sem.acquire(blocking=False):
+            with self._lock:
+                self._waiting += 1
+            try:
+                self._sem.acquire()
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._next_at - now
+                self._next_at = max(now, self._next_at) + self._interval
+            if wait > 0:
+                time.sleep(wait)
+        return self
+
+    def try_acquire(self) -> bool:
+        """Slot nur nehmen, wenn er sofort frei ist (kein Warten auf Semaphore oder rpm-Abstand)."""
+        if not self._sem.acquire(blocking=False):
+            return False
+        if self._interval:
+            with self._lock:
+                now = time.monotonic()
+                if self._next_at > now:
+                    self._sem.release()
+                    return False
+                self._next_at = now + self._interval
+        return True
+
+    def release(self):
+        self._sem.release()
+
+    def __exit__(self, *exc):
+        self._sem.release()
+        return False
@@ -0,0 +1,429 @@
+# src/social_post/rebuild.py
+"""
+Gezielte Neu-Generierung veralteter Posts (--rebuild-stale).
+
+Beim Generieren merkt sich jeder Post im Artefakt-Graph, wovon er abhängt:
+    produkt          → dish:<kategorie>/<gericht>
+    ingredient_fact  → fact:<zutat>, examples:<zutat>
+    anlass           → anlass:<datum>
+    zitat            → nur Prompt-/Vorlagen-Version
+Ändert sich eine Gerichtsbeschreibung, ein Fakt, ein Kalender-Eintrag oder die
+Prompt-Version, werden nur die betroffenen zukünftigen Posts neu erzeugt und in
+Notion/Historie aktualisiert – statt den ganzen Zeitraum neu zu planen.
+Posts ohne Graph-Eintrag (ältere Läufe) werden nicht angefasst.
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from .artifacts import ArtifactGraph, content_hash
+from .constants import CAT_CYCLE, FEED_PATTERN, FEED_PATTERN_CLOSED
+from .menu import get_next_product, find_menu_examples_for_ingredient
+from .ingredients.enrich import ENRICH_PROMPT_VERSION
+from .posts import generate_post_content, build_short_fact, build_placeholder_post, POST_PROMPT_VERSION
+from .templates import best_template_post, supports as template_supports, TEMPLATE_VERSION
+from .carousel import generate_carousel_plan, build_placeholder_carousel
+from .dedupe import post_text
+from .guardrails import guard_batch
+from .schedule import compute_scheduled_datetime
+
+PLACEHOLDER_VERSION = "placeholder"
+DEFAULT_QUOTE = {"author": "Kaspio", "quote": "Gutes Essen. Guter Tag.", "source": "Hauszitat"}
+
+# Status, deren Posts nicht mehr neu erzeugt werden
+_FINAL_STATUS = ("failed", "imported", "posted", "dry_run")
+CLOSED_WEEKDAYS = (1, 2)   # Di, Mi – Ruhetage
+
+@dataclass
+class PlanContext:
+    """Geladene Daten eines Laufs – Grundlage für Inhalte einzelner Posts."""
+    sp: dict
+    gt: dict
+    ds: dict
+    ingredients: list[dict]
+    classifier: object
+    menu_examples_map: dict[str, list[str]]
+    anlass: dict
+    history: object
+    graph: ArtifactGraph
+    quotes: list[dict] = field(default_factory=list)
+    carousel_store: object = None
+    carousel_ingredients: bool = False
+    carousel_slides: int = 6
+    skip_ai: bool = False
+    template_posts: str = "fallback"
+    hashtags: object = None   # hashtags.HashtagBank – füllt obj["hashtags"] nach der Generierung
+
+    def menu(self, category: str) -> dict:
+        return {"speisen": self.sp, "getränke": self.gt, "desserts": self.ds}.get(category) or {}
+
+# -----------------------------
+# Eingangsdaten → Graph
+# -----------------------------
+def ingredient_inputs(sp: dict, gt: dict, ds: dict, auto_payload: dict, classifier, graph: ArtifactGraph):
+    """
+    Freigegebene Zutaten (ohne z. B. Getränke, siehe classifier) und ihre Menü-Beispiele;
+    die Beispiele landen als examples:<zutat> im Graph. Rückgabe: (namen, beispiele).
+    """
+    names = [it["name"] for it in auto_payload.get("ingredients", []) if it.get("approved")]
+    classifier.classify_many(names)   # einmal vorab für die ganze Liste
+    names = classifier.filter_allowed(names)
+    examples = {}
+    for nm in names:
+        key = (nm or "").strip().lower()
+        examples[key] = find_menu_examples_for_ingredient(nm, sp, gt, ds)
+        graph.put(f"examples:{key}", examples[key])
+    return names, examples
+
+def stale_facts(graph: ArtifactGraph, keys) -> set[str]:
+    """Fakten, deren Menü-Beispiele oder Prompt sich seit der Anreicherung geändert haben."""
+    return {k for k in keys if f"fact:{k}" in graph.nodes and graph.is_stale(f"fact:{k}", ENRICH_PROMPT_VERSION)}
+
+def record_facts(graph: ArtifactGraph, ingredients: list[dict], refreshed=()):
+    """refreshed: in diesem Lauf neu angereicherte Schlüssel (run_enrichment_job → "refreshed")."""
+    for ing in ingredients:
+        # neu, Text geändert (Anreicherung/Handpflege) oder frisch angereichert → Eingänge neu
+        # festhalten (auch bei identischem Text, sonst würde er bei jedem Lauf neu angereichert);
+        # sonst bleibt ein veralteter Fakt veraltet, bis er neu angereichert wurde
+        key = ing["name"].strip().lower()
+        fact = build_short_fact(ing, max_chars=420)
+        if key in refreshed or graph.hash_of(f"fact:{key}") != content_hash(fact):
+            graph.put(f"fact:{key}", fact, inputs=[f"examples:{key}"], version=ENRICH_PROMPT_VERSION)
+
+def record_occasions(graph: ArtifactGraph, anlass, first_year: int, last_year: int):
+    keep = set()
+    for d, ev in anlass.items():
+        keep.add(f"anlass:{d}")
+        graph.put(f"anlass:{d}", ev)
+    for year in range(first_year, last_year + 1):
+        graph.prune(f"anlass:{year}-", keep)
+
+# -----------------------------
+# Inhalte pro Thema
+# -----------------------------
+def pick_quote(history, quotes):
+    """Zitat, das am längsten nicht verwendet wurde (Historie statt Laufzähler)."""
+    ref = history.least_recent("zitat", [q["quote"] for q in quotes])
+    return next(q for q in quotes if q["quote"] == ref)
+
+def pick_ingredient(history, ingredients):
+    ref = history.least_recent("ingredient_fact", [ing["name"] for ing in ingredients])
+    return next(ing for ing in ingredients if ing["name"] == ref)
+
+def _quote_content(q: dict) -> dict:
+    return {"gericht": q["author"], "ref": q["quote"], "category": "",
+            "beschreibung": f'{q["quote"]} — {q["source"]}',
+            "extras": {"quote": q["quote"], "author": q["author"], "source": q["source"]}}
+
+def _ingredient_content(ctx: "PlanContext", ing: dict) -> dict:
+    extras, example = ingredient_extras(ctx, ing["name"])
+    return {"gericht": ing["name"], "ref": ing["name"], "category": "",
+            "beschreibung": build_short_fact(ing, max_chars=420), "extras": extras, "example": example}
+
+def plan_subject(ctx: "PlanContext", dt, post_type: str) -> dict:
+    """
+    Thema für einen (neu) geplanten Tag über die Rotationen der Historie:
+    {"gericht", "ref", "category", "beschreibung", "extras"[, "example"]}
+    """
+    if post_type == "produkt":
+        cat_name = CAT_CYCLE[dt.day % 3]
+        menu = ctx.menu(cat_name)
+        gericht = get_next_product(ctx.history, menu, cat_name)
+        return {"gericht": gericht, "ref": gericht, "category": cat_name,
+                "beschreibung": (menu.get(gericht, "") or "").strip(), "extras": {}}
+    if post_type == "zitat":
+        return _quote_content(pick_quote(ctx.history, ctx.quotes or [DEFAULT_QUOTE]))
+    if ctx.ingredients:
+        return _ingredient_content(ctx, pick_ingredient(ctx.history, ctx.ingredients))
+    return {"gericht": "Frische Zutat", "ref": "", "category": "",
+            "beschreibung": "Kurz & knackig zubereitet schmeckt’s am besten.", "extras": {}}
+
+def occasion_extras(ev) -> tuple[str, str, dict]:
+    """Kalender-Eintrag → (Anlass-Name, Kategorie, extras für posts/templates)."""
+    if isinstance(ev, dict):
+        name = (ev.get("beschreibung") or ev.get("titel") or "").strip()
+        cat = (ev.get("kategorie") or "").strip()
+        extras = {
+            "anlass_name": name,
+            "anlass_cat": cat,
+            "hashtags_override": (ev.get("hashtags") or "").strip(),
+            "image_idea_override": (ev.get("image_idea") or "").strip(),
+            "cta_override": (ev.get("cta") or "").strip(),
+        }
+    else:
+        name, cat = str(ev).strip(), ""
+        extras = {"anlass_name": name, "anlass_cat": "", "hashtags_override": "",
+                  "image_idea_override": "", "cta_override": ""}
+    return name, cat, extras
+
+def ingredient_extras(ctx: PlanContext, name: str) -> tuple[dict, str]:
+    c = ctx.classifier.classify(name)
+    ex = ctx.menu_examples_map.get(name.strip().lower()) or []
+    example = ex[0] if ex else ""
+    return {"menu_example": example, "category": c.get("category"), "cookable": c.get("cookable", True),
+            "allergens": c.get("allergens") or []}, example
+
+def subject_content(ctx: PlanContext, date_str: str, post_type: str, subject: str, ref: str = "",
+                    category: str = "") -> dict | None:
+    """
+    Eingaben für einen Post zu einem bereits gewählten Thema (aus der Historie).
+    None, wenn das Thema nicht mehr existiert (Gericht gestrichen, Anlass entfernt …).
+    """
+    if post_type == "produkt":
+        menu = ctx.menu(category)
+        if subject not in menu:
+            return None
+        return {"gericht": subject, "category": category, "beschreibung": (menu.get(subject) or "").strip(),
+                "extras": {}}
+    if post_type == "anlass":
+        ev = ctx.anlass.get(date_str)
+        if ev is None:
+            return None
+        name, _, extras = occasion_extras(ev)
+        name = name or "Besonderer Anlass"
+        return {"gericht": name, "beschreibung": f"Heute ist ein besonderer Tag: {name}", "extras": extras}
+    if post_type == "zitat":
+        q = next((q for q in ctx.quotes or [DEFAULT_QUOTE] if q["quote"] == ref), None)
+        return _quote_content(q) if q else None
+    ing = next((i for i in ctx.ingredients if i["name"].strip().lower() == subject.strip().lower()), None)
+    return _ingredient_content(ctx, ing) if ing else None
+
+def post_inputs(post_type: str, subject: str, category: str, date_str: str) -> list[str]:
+    if post_type == "produkt":
+        return [f"dish:{category}/{subject}"]
+    if post_type == "ingredient_fact":
+        key = subject.strip().lower()
+        return [f"fact:{key}", f"examples:{key}"]
+    if post_type == "anlass":
+        return [f"anlass:{date_str}"]
+    return []
+
+def record_post_node(graph: ArtifactGraph, date_str: str, post_type: str, obj: dict, subject: str,
+                     category: str, history_id: int | None, version: str):
+    graph.put(f"post:{date_str}:{post_type}", post_text(obj),
+              inputs=post_inputs(post_type, subject, category, date_str), version=version,
+              data={"subject": subject, "category": category, "history_id": history_id})
+
+def current_versions(ctx: PlanContext) -> tuple:
+    """Versionen, mit denen ein Post als aktuell gilt."""
+    versions = (POST_PROMPT_VERSION, TEMPLATE_VERSION)
+    return versions + ((PLACEHOLDER_VERSION,) if ctx.skip_ai else ())
+
+# -----------------------------
+# Generierung
+# -----------------------------
+def generate_obj(ctx: PlanContext, dt, content: dict, post_type: str) -> tuple[dict, str]:
+    """Post für content (subject_content) erzeugen → (obj, version). Ohne Dedupe/Kandidaten."""
+    obj, version = _generate_obj(ctx, dt, content, post_type)
+    if ctx.hashtags is not None:
+        ctx.hashtags.apply(obj, post_type, dt.strftime("%Y-%m-%d"), content["gericht"],
+                           content.get("category", ""), content["extras"])
+    return obj, version
+
+def _generate_obj(ctx: PlanContext, dt, content: dict, post_type: str) -> tuple[dict, str]:
+    gericht, beschreibung, extras = content["gericht"], content["beschreibung"], content["extras"]
+    use_template = template_supports(post_type) and (
+        ctx.template_posts == "always" or (ctx.skip_ai and ctx.template_posts == "fallback"))
+    obj = best_template_post(dt, gericht, beschreibung, post_type, extras) if use_template else None
+    if obj is not None:
+        return obj, TEMPLATE_VERSION
+    if ctx.skip_ai:
+        return build_placeholder_post(dt, gericht, beschreibung, post_type), PLACEHOLDER_VERSION
+    try:
+        return generate_post_content(dt, gericht, beschreibung, post_type, extras=extras), POST_PROMPT_VERSION
+    except Exception:
+        if ctx.template_posts == "off" or not template_supports(post_type):
+            raise
+        obj = best_template_post(dt, gericht, beschreibung, post_type, extras)
+        if obj is None:
+            raise
+        return obj, TEMPLATE_VERSION
+
+def guard_item(dt, post_type: str, content: dict, obj: dict, version: str) -> dict:
+    """Eintrag für guardrails.guard_batch (obj wird dort in place korrigiert)."""
+    return {"obj": obj, "post_type": post_type, "extras": content["extras"], "dt": dt, "content": content,
+            "llm": version == POST_PROMPT_VERSION, "fallback": content["beschreibung"],
+            "title": content["gericht"], "label": f"{dt:%Y-%m-%d} {post_type}", "version": version}
+
+def guard_posts(ctx: PlanContext, items: list[dict], *, workers: int = 4, verbose=False) -> dict:
+    """Guardrail-Pass über mehrere Posts; Verstöße → nur diese neu generieren (nicht bei --skip-ai)."""
+    def _regen(item, hint):
+        content = item["content"]
+        obj = generate_post_content(item["dt"], content["gericht"], content["beschreibung"], item["post_type"],
+                                    extras={**content["extras"], "guard_feedback": hint})
+        if ctx.hashtags is not None:
+            ctx.hashtags.apply(obj, item["post_type"], f"{item['dt']:%Y-%m-%d}", content["gericht"],
+                               content.get("category", ""), content["extras"])
+        return obj
+    return guard_batch(items, None if ctx.skip_ai else _regen, workers=workers, verbose=verbose)
+
+def generate_checked(ctx: PlanContext, dt, content: dict, post_type: str, verbose=False) -> tuple[dict, str]:
+    """generate_obj + Guardrails für einen einzelnen Post."""
+    obj, version = generate_obj(ctx, dt, content, post_type)
+    guard_posts(ctx, [guard_item(dt, post_type, content, obj, version)], workers=1, verbose=verbose)
+    return obj, version
+
+def carousel_for(ctx: PlanContext, content: dict) -> dict | None:
+    if not ctx.carousel_ingredients or "example" not in content:
+        return None
+    gericht, beschreibung, example = content["gericht"], content["beschreibung"], content["example"]
+    if ctx.skip_ai:
+        return build_placeholder_carousel(gericht, beschreibung, example, num_slides=ctx.carousel_slides)
+    plan = ctx.carousel_store.get_plan(
+        gericht, beschreibung, example, ctx.carousel_slides,
+        lambda: generate_carousel_plan(gericht, beschreibung, example, num_slides=ctx.carousel_slides),
+    )
+    if plan and not plan.get("hashtags") and ctx.hashtags is not None:
+        plan = {**plan, "hashtags": ctx.hashtags.pick("ingredient_fact", subject=gericht, extras=content["extras"])}
+    return plan
+
+# -----------------------------
+# Veraltete Posts finden & neu erzeugen
+# -----------------------------
+def find_stale_posts(ctx: PlanContext, since: str, until: str = "9999-12-31") -> dict:
+    """
+    {"stale": [(row, key, geänderte Eingänge)], "fresh": n, "unknown": n}
+    Pro Tag zählt nur der jüngste Post aus der Historie.
+    """
+    latest = latest_posts(ctx, since, until)
+    versions = current_versions(ctx)
+    out = {"stale": [], "fresh": 0, "unknown": 0}
+    for date_str, row in sorted(latest.items()):
+        key = f"post:{date_str}:{row['post_type']}"
+        if key not in ctx.graph.nodes:
+            out["unknown"] += 1
+        elif ctx.graph.is_stale(key, versions):
+            reasons = ctx.graph.stale_inputs(key) or ["version"]
+            out["stale"].append((row, key, reasons))
+        else:
+            out["fresh"] += 1
+    return out
+
+def rebuild_stale_posts(ctx: PlanContext, since: str, until: str = "9999-12-31", *, workers: int = 4,
+                        dry_run=False, verbose=False, on_update=None) -> dict:
+    """
+    Erzeugt veraltete Posts neu (parallel; Historie/Graph/Notion im Hauptthread).
+    Alle neuen Posts laufen danach gemeinsam durch die Guardrails (guard_posts).
+    on_update(row, obj) wird nach jeder erfolgreichen Neu-Generierung aufgerufen
+    (z. B. Notion-Update); ohne on_update bleibt es bei Historie + Graph.
+    """
+    found = find_stale_posts(ctx, since, until)
+    stats = {"stale": len(found["stale"]), "fresh": found["fresh"], "unknown": found["unknown"],
+             "rebuilt": 0, "gone": 0, "failed": 0}
+
+    def _work(row):
+        content = subject_content(ctx, row["date"], row["post_type"], row["subject"], row["ref"], row["category"])
+        if content is None:
+            return None, None, None
+        dt = datetime.datetime.strptime(row["date"], "%Y-%m-%d")
+        obj, version = generate_obj(ctx, dt, content, row["post_type"])
+        return content, obj, version
+
+    jobs = [(row, key, reasons) for row, key, reasons in found["stale"]]
+    if verbose:
+        for row, key, reasons in jobs:
+            print(f"♻️ {row['date']} {row['post_type']} ({row['subject']}) veraltet: {', '.join(reasons)}")
+    if not jobs:
+        return stats
+
+    done = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futs = {pool.submit(_work, row): row for row, _, _ in jobs}
+        for fut in as_completed(futs):
+            row = futs[fut]
+            try:
+                content, obj, version = fut.result()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ {row['date']} {row['post_type']}: {e}")
+                continue
+            if content is None:
+                stats["gone"] += 1
+                print(f"⚠️ {row['date']} {row['post_type']}: Thema „{row['subject']}“ existiert nicht mehr – bitte neu planen.")
+                continue
+            done.append((row, content, obj, version))
+
+    items = [guard_item(datetime.datetime.strptime(row["date"], "%Y-%m-%d"), row["post_type"], content, obj, version)
+             for row, content, obj, version in done]
+    stats["guard"] = guard_posts(ctx, items, workers=workers, verbose=verbose)
+
+    for row, content, obj, version in sorted(done, key=lambda d: d[0]["date"]):
+        try:
+            plan = carousel_for(ctx, content)
+            if plan:
+                obj["carousel_plan"] = plan
+            if on_update and not dry_run:
+                on_update(row, obj)
+            ctx.history.update_post(row["id"], title=obj.get("title"), text=obj.get("text"),
+                                    hashtags=obj.get("hashtags"), carousel=plan)
+            record_post_node(ctx.graph, row["date"], row["post_type"], obj, row["subject"],
+                             row["category"], row["id"], version)
+            stats["rebuilt"] += 1
+            if verbose:
+                print(f"✅ {row['date']} {row['post_type']}: {obj.get('title')}")
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"❌ {row['date']} {row['post_type']}: {e}")
+    ctx.graph.save()
+    return stats
+
+# -----------------------------
+# Tage neu planen (Anlass hinzugekommen / entfallen)
+# -----------------------------
+def latest_posts(ctx: PlanContext, since: str, until: str) -> dict[str, object]:
+    """{datum: jüngster nicht-finaler Post} – ein Post pro Tag."""
+    out = {}
+    for row in ctx.history.posts_between(since, until):
+        if row["status"] not in _FINAL_STATUS:
+            out[row["date"]] = row
+    return out
+
+def _replan_type(dt, neighbours: set) -> str:
+    pool = FEED_PATTERN_CLOSED if dt.weekday() in CLOSED_WEEKDAYS else FEED_PATTERN
+    return next((t for t in pool if t not in neighbours), pool[0])
+
+def replan_days(ctx: PlanContext, since: str, until: str, *, dry_run=False, verbose=False, on_replan=None) -> dict:
+    """
+    Gleicht den Post-Typ geplanter Tage mit dem Anlass-Kalender ab:
+    neuer Anlass → Post wird zum Anlass-Post; Anlass entfallen → Typ/Thema per Rotation
+    neu wählen (anders als Vor- und Folgetag). Die bestehende Zeile/Notion-Seite wird
+    überschrieben. on_replan(row, obj, post_type, scheduled_dt) z. B. für Notion.
+    """
+    posts = latest_posts(ctx, since, until)
+    stats = {"replanned": 0, "failed": 0}
+    for date_str, row in sorted(posts.items()):
+        has_anlass = date_str in ctx.anlass
+        if has_anlass == (row["post_type"] == "anlass"):
+            continue
+        dt = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+        try:
+            if has_anlass:
+                post_type = "anlass"
+                content = subject_content(ctx, date_str, "anlass", "")
+                content.update(ref=content["gericht"], category=content["extras"].get("anlass_cat", ""))
+            else:
+                near = {(dt + datetime.timedelta(days=d)).strftime("%Y-%m-%d") for d in (-1, 1)}
+                post_type = _replan_type(dt, {posts[d]["post_type"] for d in near if d in posts})
+                content = plan_subject(ctx, dt, post_type)
+            obj, version = generate_checked(ctx, dt, content, post_type, verbose=verbose)
+            plan = carousel_for(ctx, content)
+            if plan:
+                obj["carousel_plan"] = plan
+            scheduled_dt = compute_scheduled_datetime(dt, post_type)
+            if on_replan and not dry_run:
+                on_replan(row, obj, post_type, scheduled_dt)
+            ctx.history.update_post(row["id"], post_type=post_type, subject=content["gericht"], ref=content["ref"],
+                                    category=content["category"], title=obj.get("title"), text=obj.get("text"),
+                                    hashtags=obj.get("hashtags"), carousel=plan,
+                                    scheduled_at=scheduled_dt.isoformat(timespec="seconds"))
+            ctx.graph.remove(f"post:{date_str}:{row['post_type']}")
+            record_post_node(ctx.graph, date_str, post_type, obj, content["gericht"], content["category"],
+                             row["id"], version)
+            stats["replanned"] += 1
+            if verbose:
+                print(f"🗓️ {date_str}: {row['post_type']} → {post_type} ({content['gericht']})")
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"❌ {date_str} neu planen: {e}")
+    ctx.graph.save()
+    return stats
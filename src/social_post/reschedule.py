@@ -0,0 +1,139 @@
+# src/social_post/reschedule.py
+"""
+Bestehende Notion-Entwürfe neu terminieren (--reschedule), ohne Posts neu zu erzeugen.
+
+1) Seiten mit "Geplanter Zeitpunkt" im Zeitraum abfragen, die noch nicht
+   gepostet/fehlgeschlagen sind (eine paginierte Query)
+2) neuen Zeitpunkt berechnen: compute_scheduled_datetime(Tag + Verschiebung, Post-Typ)
+   bzw. eine feste Uhrzeit (--reschedule-time)
+3) nur Seiten mit abweichendem Zeitpunkt ändern – PATCH ausschließlich des
+   Datumsfelds, parallel unter NOTION_LIMITER; Historie (scheduled_at, bei
+   Verschiebung auch date) und Artefakt-Graph ziehen mit
+--dry-run zeigt nur die Differenz. Keine LLM-Aufrufe.
+
+Verschiebung (--reschedule-shift N): Anlass-Posts bleiben an ihrem Tag; ist der
+Zieltag schon mit einem anderen Entwurf belegt, wird der Post übersprungen.
+"""
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .notion_client import PROP_SYNONYMS, NOTION_LIMITER, _resolve, query_database, read_page, update_page_fields
+from .schedule import compute_scheduled_datetime
+
+# Diese Notion-Status werden nicht mehr verschoben
+FINAL_STATUSES = ("Gepostet", "Fehlgeschlagen")
+_WEEKDAYS = ("Mo", "Di", "Mi", "Do", "Fr", "Sa", "So")
+
+def parse_when(value) -> datetime.datetime | None:
+    """Notion-Datum ("2025-03-01T11:52:00.000+01:00" oder "2025-03-01") → naive Ortszeit."""
+    if not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=None, microsecond=0)
+
+def fixed_time(hhmm: str):
+    """Strategie "immer HH:MM" (z. B. für eine Aktionswoche)."""
+    h, m = (int(x) for x in hhmm.split(":", 1))
+    datetime.time(h, m)   # ValueError bei ungültiger Uhrzeit
+    return lambda day, post_type: day.replace(hour=h, minute=m, second=0, microsecond=0)
+
+def draft_pages(since: datetime.date, until: datetime.date):
+    """Nicht finale Seiten mit Zeitpunkt in [since, until], aufsteigend."""
+    date_prop = _resolve(PROP_SYNONYMS["datetime"])
+    if not date_prop:
+        raise RuntimeError("Notion-Property 'Geplanter Zeitpunkt' fehlt (--setup-notion-fields).")
+    conds = [{"property": date_prop, "date": {"on_or_after": since.isoformat()}},
+             {"property": date_prop, "date": {"before": (until + datetime.timedelta(days=1)).isoformat()}}]
+    status_prop = _resolve(PROP_SYNONYMS["status"])
+    if status_prop:
+        conds += [{"property": status_prop, "select": {"does_not_equal": s}} for s in FINAL_STATUSES]
+    for page in query_database({"and": conds}, sorts=[{"property": date_prop, "direction": "ascending"}]):
+        yield read_page(page)
+
+def plan_moves(pages: list[dict], since: datetime.date, until: datetime.date, history=None, *,
+               shift_days: int = 0, strategy=compute_scheduled_datetime) -> tuple[list[tuple], list[tuple], int]:
+    """
+    → (moves, skipped, unchanged); moves: [(props, history_row, alt, neu, post_type)],
+    skipped: [(props, grund)]. Seiten außerhalb [since, until] belegen nur Zieltage.
+    """
+    moves, skipped, unchanged = [], [], 0
+    rows = {p["id"]: history.post_by_page(p["id"]) if history is not None else None for p in pages}
+    current = [(p, parse_when(p.get("datetime"))) for p in pages]
+    inside = [(p, old) for p, old in current if old and since <= old.date() <= until]
+    occupied = {old.date() for p, old in current if old and not since <= old.date() <= until}
+    shift = datetime.timedelta(days=shift_days)
+    # in Verschiebungsrichtung von hinten: ob ein Zieltag frei wird, steht dann schon fest
+    for props, old in sorted(inside, key=lambda x: x[1], reverse=shift_days > 0):
+        row = rows[props["id"]]
+        post_type = (props.get("post_type") or (row["post_type"] if row else "") or "").lower()
+        day = old.replace(hour=0, minute=0, second=0)
+        if shift and post_type == "anlass":
+            occupied.add(day.date())
+            skipped.append((props, "Anlass bleibt am Tag"))
+            continue
+        target = day + shift
+        if shift and target.date() in occupied:
+            occupied.add(day.date())
+            skipped.append((props, f"{target:%Y-%m-%d} schon belegt"))
+            continue
+        occupied.add(target.date())
+        new = strategy(target, post_type)
+        if new == old:
+            unchanged += 1
+        else:
+            moves.append((props, row, old, new, post_type))
+    moves.sort(key=lambda m: m[2])
+    return moves, skipped, unchanged
+
+def _fmt(dt: datetime.datetime) -> str:
+    return f"{_WEEKDAYS[dt.weekday()]} {dt:%d.%m. %H:%M:%S}"
+
+def reschedule(since: datetime.date, until: datetime.date, history=None, graph=None, *, shift_days: int = 0,
+               strategy=None, dry_run=False, verbose=False) -> dict:
+    """Zeitpunkte aller Entwürfe in [since, until] neu berechnen und nur Abweichungen patchen."""
+    strategy = strategy or compute_scheduled_datetime
+    shift = datetime.timedelta(days=shift_days)
+    pages = list(draft_pages(min(since, since + shift), max(until, until + shift)))
+    moves, skipped, unchanged = plan_moves(pages, since, until, history, shift_days=shift_days, strategy=strategy)
+    stats = {"pages": len(moves) + len(skipped) + unchanged, "changed": len(moves), "unchanged": unchanged,
+             "skipped": len(skipped), "updated": 0, "failed": 0}
+    for props, reason in skipped:
+        print(f"⏭️ {props.get('title') or props['id']}: {reason}")
+    if dry_run or verbose:
+        for props, _, old, new, post_type in moves:
+            prefix = "📝 DRY-RUN " if dry_run else "🕒 "
+            print(f"{prefix}{post_type or '?'} {props.get('title') or props['id']}: {_fmt(old)} → {_fmt(new)}")
+    if dry_run or not moves:
+        return stats
+
+    def _apply(move):
+        props, _, _, new, _ = move
+        update_page_fields(props["id"], datetime=new)
+
+    renames = []
+    with ThreadPoolExecutor(max_workers=max(1, NOTION_LIMITER.concurrency)) as ex:
+        for move, fut in [(m, ex.submit(_apply, m)) for m in moves]:
+            props, row, old, new, post_type = move
+            try:
+                fut.result()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"❌ {props.get('title') or props['id']}: {e}")
+                continue
+            stats["updated"] += 1
+            if row is None:
+                continue
+            fields = {"scheduled_at": new.isoformat(timespec="seconds")}
+            if new.date() != old.date():
+                fields["date"] = new.strftime("%Y-%m-%d")
+                renames.append((row["date"], fields["date"], row["post_type"]))
+            history.update_post(row["id"], **fields)
+    if graph is not None and renames:
+        # vom Ende der Verschiebung her umbenennen, damit kein Knoten einen anderen überschreibt
+        for old_day, new_day, post_type in sorted(renames, reverse=shift_days > 0):
+            graph.rename(f"post:{old_day}:{post_type}", f"post:{new_day}:{post_type}")
+        graph.save()
+    return stats
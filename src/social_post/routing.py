@@ -0,0 +1,122 @@
+# src/social_post/routing.py
+"""
+Modell-Routing pro Post-Typ bzw. Stufe.
+
+Jede Route legt Modell, Temperatur und Output-Limit (max_tokens) fest. Kurze Posts
+(Zitat, Anlass) und die Zutaten-Anreicherung laufen auf dem schnellen Modell;
+nur wenn dessen Ausgabe die Validierung nicht besteht (kein gültiges JSON, leerer
+Text, zu wenige Slides …), wird einmal auf das starke Modell eskaliert.
+
+Überschreiben per data/model_routes.json (optional):
+    {"routes": {"carousel": {"model": "gpt-4o", "max_tokens": 1800}},
+     "prices": {"gpt-4o-mini": 0.3}}          # USD pro 1 Mio. Tokens (Schätzung)
+
+Pro (Route, Modell) werden Aufrufe, Eskalationen, Latenz, Tokens und geschätzte
+Kosten gezählt (route_stats_summary()).
+"""
+import threading, time
+from dataclasses import dataclass, replace
+
+from .config import OPENAI_MODEL, OPENAI_MODEL_FAST, OPENAI_MODEL_STRONG
+from .constants import MODEL_ROUTES_FILE
+from .io_utils import read_json
+from .openai_client import call_openai_candidates, get_usage
+
+@dataclass(frozen=True)
+class Route:
+    model: str
+    temperature: float
+    max_tokens: int
+    escalate_to: str | None = OPENAI_MODEL_STRONG
+
+DEFAULT_ROUTES: dict[str, Route] = {
+    "zitat":           Route(OPENAI_MODEL_FAST, 0.8, 350),
+    "anlass":          Route(OPENAI_MODEL_FAST, 0.8, 400),
+    "produkt":         Route(OPENAI_MODEL, 0.8, 450),
+    "ingredient_fact": Route(OPENAI_MODEL, 0.7, 450),
+    "carousel":        Route(OPENAI_MODEL, 0.4, 1500),
+    "enrichment":      Route(OPENAI_MODEL_FAST, 0.5, 350),
+}
+
+# grobe Mischpreise (Input/Output) in USD pro 1 Mio. Tokens – nur für die Statistik
+DEFAULT_PRICES = {"gpt-4o-mini": 0.3, "gpt-4o": 5.0, "gpt-4.1-mini": 0.8, "gpt-4.1": 4.0}
+
+_routes: dict[str, Route] | None = None
+_prices: dict[str, float] | None = None
+
+def load_routes(path=MODEL_ROUTES_FILE) -> dict[str, Route]:
+    global _routes, _prices
+    cfg = read_json(path, {}) or {}
+    routes = dict(DEFAULT_ROUTES)
+    for name, over in (cfg.get("routes") or {}).items():
+        base = routes.get(name, routes["produkt"])
+        routes[name] = replace(base, **{k: v for k, v in over.items() if k in Route.__dataclass_fields__})
+    _routes = routes
+    _prices = {**DEFAULT_PRICES, **(cfg.get("prices") or {})}
+    return routes
+
+def get_route(name: str) -> Route:
+    routes = _routes or load_routes()
+    return routes.get(name) or routes["produkt"]
+
+# -----------------------------
+# Statistik
+# -----------------------------
+_stats: dict[tuple[str, str], dict] = {}
+_stats_lock = threading.Lock()
+
+def _record(route: str, model: str, latency_s: float, tokens: int, valid: bool, escalated: bool):
+    with _stats_lock:
+        s = _stats.setdefault((route, model), {"calls": 0, "invalid": 0, "escalations": 0,
+                                               "latency_ms": 0.0, "tokens": 0})
+        s["calls"] += 1
+        s["invalid"] += int(not valid)
+        s["escalations"] += int(escalated)
+        s["latency_ms"] += latency_s * 1000
+        s["tokens"] += int(tokens or 0)
+
+def route_stats() -> dict[str, dict]:
+    """{"route@model": {calls, invalid, escalations, avg_ms, tokens, cost_usd}}"""
+    prices = _prices or DEFAULT_PRICES
+    with _stats_lock:
+        items = list(_stats.items())
+    out = {}
+    for (route, model), s in sorted(items):
+        out[f"{route}@{model}"] = {
+            "calls": s["calls"], "invalid": s["invalid"], "escalations": s["escalations"],
+            "avg_ms": round(s["latency_ms"] / max(1, s["calls"]), 1), "tokens": s["tokens"],
+            "cost_usd": round(s["tokens"] / 1e6 * prices.get(model, 0.0), 4),
+        }
+    return out
+
+def route_stats_summary() -> str:
+    lines = [f"{'Route@Modell':34} {'Calls':>6} {'ungültig':>8} {'eskaliert':>9} {'Ø ms':>8} {'Tokens':>8} {'≈ USD':>8}"]
+    for key, s in route_stats().items():
+        lines.append(f"{key[:34]:34} {s['calls']:6d} {s['invalid']:8d} {s['escalations']:9d} "
+                     f"{s['avg_ms']:8.0f} {s['tokens']:8d} {s['cost_usd']:8.4f}")
+    return "\n".join(lines)
+
+# -----------------------------
+# Aufruf
+# -----------------------------
+def _attempt(route_name: str, model: str, messages, n, temperature, max_tokens, validate, escalated=False):
+    before = get_usage()["tokens"]
+    t0 = time.monotonic()
+    texts = call_openai_candidates(messages, n=n, temperature=temperature, model=model, max_tokens=max_tokens)
+    valid = validate is None or any(validate(t) for t in texts)
+    _record(route_name, model, time.monotonic() - t0, get_usage()["tokens"] - before, valid, escalated)
+    return texts, valid
+
+def call_route(route_name: str, messages, *, n: int = 1, temperature: float | None = None,
+               validate=None) -> list[str]:
+    """
+    Ruft das Modell der Route auf. validate(text) -> bool; besteht keine der n
+    Antworten, wird (falls konfiguriert) einmal mit escalate_to wiederholt.
+    """
+    r = get_route(route_name)
+    temp = r.temperature if temperature is None else temperature
+    texts, valid = _attempt(route_name, r.model, messages, n, temp, r.max_tokens, validate)
+    if valid or not r.escalate_to or r.escalate_to == r.model:
+        return texts
+    esc, esc_valid = _attempt(route_name, r.escalate_to, messages, n, temp, r.max_tokens, validate, escalated=True)
+    return esc if esc_valid else texts
@@ -1,5 +1,5 @@
 # src/social_post/schedule.py
-import random
+import random, zlib
 from datetime import datetime, timedelta
 from .config import POST_TIME_HOUR, REGION_TZ, AUTO_POST_TIME, POST_JITTER_MINUTES
 
@@ -36,17 +36,21 @@ def _base_time(dt: datetime, post_type: str):
         h, m = POST_TIME_HOUR, 0
     return h, m
 
+def _stable_hash(value) -> int:
+    """Wie hash(), aber gleich in jedem Prozess (hash() für str ist pro Prozess zufällig)."""
+    return zlib.crc32(str(value).encode("utf-8"))
+
 def _stable_jitter_minutes(dt: datetime, post_type: str, span: int) -> int:
     """
     deterministischer Jitter in Minuten im Bereich [-span, +span]
     abhängig von Datum & Post-Typ → reproduzierbar, aber nicht „immer gleich rund“.
     """
-    seed = int(dt.strftime("%Y%m%d")) ^ hash(post_type)
+    seed = int(dt.strftime("%Y%m%d")) ^ _stable_hash(post_type)
     rnd = random.Random(seed)
     return rnd.randint(-span, span)
 
 def _stable_seconds(dt: datetime, post_type: str) -> int:
-    seed = (int(dt.strftime("%Y%m%d")) << 1) ^ hash("sec:" + str(post_type))
+    seed = (int(dt.strftime("%Y%m%d")) << 1) ^ _stable_hash("sec:" + str(post_type))
     rnd = random.Random(seed)
     return rnd.randint(0, 59)
 
@@ -0,0 +1,357 @@
+# src/social_post/service.py
+"""
+Lokaler HTTP-Dienst (--serve [HOST:]PORT) für interne Tools und das Dashboard.
+
+Statt pro Aktion social_post_generator.py zu starten (Python-Start, dotenv,
+Notion-Verbindungstest, Schema-GET, Menü/Zutaten laden …) bleibt ein Prozess mit
+geladenem PlanContext warm. Geänderte Daten-Dateien werden vor jeder Anfrage
+erkannt (wie --watch) und aus den Caches nachgeladen.
+
+    GET  /health
+    GET  /plan?start=YYYY-MM-DD&days=14        Plan/Status je Tag – 0 LLM-Aufrufe
+    POST /generate-day      {"date": "...", "post_type": "produkt"?}
+    POST /regenerate-post   {"date": "..."} oder {"id": 123}   – ein LLM-Aufruf
+    POST /enrich-ingredient {"name": "Mango"}                  – ein LLM-Aufruf
+
+Antworten sind JSON. LLM-Endpunkte laufen höchstens max_concurrency-fach parallel;
+ist der Dienst ausgelastet, kommt nach kurzer Wartezeit 429. Historie und
+Artefakt-Graph werden nur unter einer Sperre geschrieben.
+"""
+import datetime, json, threading, time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from .notion_client import update_notion_post
+from .sinks import PostRecord
+from .constants import FEED_PATTERN, FEED_PATTERN_CLOSED
+from .schedule import compute_scheduled_datetime
+from .ingredients.overrides import load_ingredients_overrides, save_ingredients_overrides
+from .ingredients.enrich import enrich_ingredient_with_ai, is_too_short
+from .rebuild import (PlanContext, CLOSED_WEEKDAYS, latest_posts, find_stale_posts, plan_subject,
+                      subject_content, generate_checked, carousel_for, record_post_node, record_occasions,
+                      _replan_type)
+from .occasions import load_occasions
+from .watch import WATCH_FILES, snapshot, reload_context
+
+POST_TYPES = set(FEED_PATTERN) | set(FEED_PATTERN_CLOSED) | {"anlass"}
+
+class ServiceError(Exception):
+    """Fehler mit HTTP-Status (400 ungültige Anfrage, 404 unbekannt, 429 ausgelastet)."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _parse_date(value) -> datetime.datetime:
+    try:
+        return datetime.datetime.strptime(str(value or ""), "%Y-%m-%d")
+    except ValueError:
+        raise ServiceError(400, f"Ungültiges Datum: {value!r} (erwartet YYYY-MM-DD)")
+
+def _row_json(row) -> dict:
+    return {k: row[k] for k in ("id", "date", "post_type", "subject", "status", "title", "text",
+                                "hashtags", "scheduled_at", "notion_page_id")}
+
+class PlanService:
+    def __init__(self, ctx: PlanContext, sinks=None, *, max_concurrency: int = 4, dry_run=False, verbose=False,
+                 push=False, years: tuple[int, int] | None = None):
+        self.ctx = ctx
+        self.sinks = sinks or []
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.push = push
+        today = datetime.date.today()
+        self.years = years or (today.year, today.year + 1)
+        self._gate = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._write = threading.Lock()
+        self._snap = snapshot(WATCH_FILES)
+        self.started = time.time()
+        self.requests = 0
+        self._count = threading.Lock()
+
+    # -----------------------------
+    # Kontext warm halten
+    # -----------------------------
+    def refresh(self, first_year: int | None = None, last_year: int | None = None):
+        """Lädt geänderte Daten-Dateien nach und erweitert den Anlass-Kalender bei Bedarf."""
+        first = min(self.years[0], first_year or self.years[0])
+        last = max(self.years[1], last_year or self.years[1])
+        with self._write:
+            now = snapshot(WATCH_FILES)
+            if now != self._snap:
+                reload_context(self.ctx, first, last, verbose=self.verbose)
+                self.ctx.graph.save()
+                self._snap = snapshot(WATCH_FILES)   # eigene Schreibzugriffe ignorieren
+                self.years = (first, last)
+                if self.verbose:
+                    print("🔄 Daten neu geladen")
+            elif (first, last) != self.years:
+                self.ctx.anlass = load_occasions(first, last, verbose=self.verbose)
+                record_occasions(self.ctx.graph, self.ctx.anlass, first, last)
+                self.years = (first, last)
+
+    @contextmanager
+    def _llm_slot(self, timeout: float = 30.0):
+        if not self._gate.acquire(timeout=timeout):
+            raise ServiceError(429, "Dienst ausgelastet – bitte später erneut versuchen.")
+        try:
+            yield
+        finally:
+            self._gate.release()
+
+    # -----------------------------
+    # Endpunkte
+    # -----------------------------
+    def health(self) -> dict:
+        return {"ok": True, "uptime_s": round(time.time() - self.started), "requests": self.requests,
+                "ingredients": len(self.ctx.ingredients), "occasions": len(self.ctx.anlass),
+                "years": list(self.years), "dry_run": self.dry_run}
+
+    def plan(self, start: str, days: int = 14) -> dict:
+        """Tage ab start: vorhandener Post (inkl. veraltet ja/nein) oder vorgeschlagener Typ."""
+        dt0 = _parse_date(start)
+        days = max(1, min(int(days), 366))
+        until = (dt0 + datetime.timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        self.refresh(dt0.year, int(until[:4]))
+        since = dt0.strftime("%Y-%m-%d")
+        posts = latest_posts(self.ctx, since, until)
+        stale = {row["date"]: reasons for row, _, reasons in find_stale_posts(self.ctx, since, until)["stale"]}
+        out, prev = [], None
+        for i in range(days):
+            dt = dt0 + datetime.timedelta(days=i)
+            d = dt.strftime("%Y-%m-%d")
+            entry = {"date": d, "closed": dt.weekday() in CLOSED_WEEKDAYS,
+                     "occasion": (self.ctx.anlass.get(d) or {}).get("beschreibung")}
+            row = posts.get(d)
+            if row is not None:
+                entry.update(post=_row_json(row), stale=d in stale, stale_inputs=stale.get(d, []))
+                prev = row["post_type"]
+            else:
+                proposed = "anlass" if entry["occasion"] else _replan_type(dt, {prev} if prev else set())
+                entry.update(post=None, proposed_type=proposed)
+                prev = proposed
+            out.append(entry)
+        return {"start": since, "days": out}
+
+    def generate_day(self, date: str, post_type: str | None = None) -> dict:
+        """
+        Plant und erzeugt den Post eines Tages. Gibt es schon einen offenen Post, wird
+        dessen Zeile/Notion-Seite überschrieben, sonst ein neuer angelegt (Sinks).
+        """
+        dt = _parse_date(date)
+        if post_type is not None and post_type not in POST_TYPES:
+            raise ServiceError(400, f"Unbekannter post_type {post_type!r} (erlaubt: {', '.join(sorted(POST_TYPES))}).")
+        self.refresh(dt.year, dt.year)
+        d = dt.strftime("%Y-%m-%d")
+        # Thema unter der Sperre wählen und sofort in der Historie festhalten – sonst rotieren
+        # parallele Anfragen auf dasselbe Thema (die Historie ändert sich erst nach dem LLM-Aufruf)
+        with self._write:
+            row = latest_posts(self.ctx, d, d).get(d)
+            if d in self.ctx.anlass and post_type in (None, "anlass"):
+                post_type = "anlass"
+                content = subject_content(self.ctx, d, "anlass", "")
+                content.update(ref=content["gericht"], category=content["extras"].get("anlass_cat", ""))
+            else:
+                if post_type is None:
+                    near = latest_posts(self.ctx, (dt - datetime.timedelta(days=1)).strftime("%Y-%m-%d"),
+                                        (dt + datetime.timedelta(days=1)).strftime("%Y-%m-%d"))
+                    post_type = _replan_type(dt, {r["post_type"] for k, r in near.items() if k != d})
+                elif post_type == "anlass":
+                    raise ServiceError(400, f"Kein Anlass am {d}.")
+                content = plan_subject(self.ctx, dt, post_type)
+            scheduled_dt = compute_scheduled_datetime(dt, post_type)
+            planned = dict(post_type=post_type, subject=content["gericht"], ref=content["ref"],
+                           category=content["category"], scheduled_at=scheduled_dt.isoformat(timespec="seconds"))
+            if row is not None:
+                post_id = row["id"]
+                self.ctx.history.update_post(post_id, **planned)
+            else:
+                post_id = self.ctx.history.record_post(date=d, status="dry_run" if self.dry_run else "generated",
+                                                       **planned)
+
+        try:
+            with self._llm_slot():
+                obj, version = generate_checked(self.ctx, dt, content, post_type, verbose=self.verbose)
+                plan = carousel_for(self.ctx, content)
+            if plan:
+                obj["platform_suggestion"] = "Instagram Carousel"
+                obj["carousel_plan"] = plan
+            obj["platform_targets"] = [{"name": "Instagram Carousel" if plan else "Instagram Post"}]
+            fields = dict(title=obj.get("title"), text=obj.get("text"), hashtags=obj.get("hashtags"), carousel=plan)
+            with self._write:
+                if row is not None:
+                    if self.push and row["notion_page_id"] and not self.dry_run:
+                        update_notion_post(row["notion_page_id"], obj, post_type=post_type, datetime=scheduled_dt)
+                    self.ctx.history.update_post(post_id, **fields)
+                    self.ctx.graph.remove(f"post:{d}:{row['post_type']}")
+                    page_id = row["notion_page_id"]
+                else:
+                    self.ctx.history.update_post(post_id, **fields)
+                    page_id = self._write_sinks(PostRecord(date=dt, post_type=post_type, obj=obj,
+                                                           scheduled_dt=scheduled_dt,
+                                                           meta={"history_id": post_id, "subject": content["gericht"]}))
+                record_post_node(self.ctx.graph, d, post_type, obj, content["gericht"], content["category"],
+                                 post_id, version)
+                self.ctx.graph.save()
+        except Exception:
+            # Reservierung zurücknehmen: alte Planung wiederherstellen bzw. neue Zeile als fehlgeschlagen
+            with self._write:
+                if row is not None:
+                    self.ctx.history.update_post(post_id, **{k: row[k] for k in planned})
+                else:
+                    self.ctx.history.update_post(post_id, status="failed")
+            raise
+        return {"id": post_id, "date": d, "post_type": post_type, "subject": content["gericht"],
+                "replaced": row is not None, "notion_page_id": page_id, "post": obj}
+
+    def _write_sinks(self, rec: PostRecord) -> str | None:
+        """Schreibt einen neuen Post synchron in alle Sinks; Status/Page-ID → Historie."""
+        results, error = {}, None
+        for sink in self.sinks:
+            try:
+                res = sink.write_batch([rec])[0]
+                if isinstance(res, Exception):
+                    raise res
+                results[sink.name] = res
+            except Exception as e:
+                error = e
+                print(f"❌ Sink {sink.name}: {e}")
+        page_id = results.get("notion")
+        status = "failed" if error else "dry_run" if self.dry_run else "draft" if page_id else "exported"
+        self.ctx.history.update_post(rec.meta["history_id"], status=status, notion_page_id=page_id)
+        return page_id
+
+    def regenerate_post(self, date: str | None = None, post_id: int | None = None) -> dict:
+        """Gleiches Thema, neuer Text (ein LLM-Aufruf); Historie, Graph und Notion werden aktualisiert."""
+        if post_id is not None:
+            rows = self.ctx.history.query("SELECT * FROM posts WHERE id = ?", (int(post_id),))
+            row = rows[0] if rows else None
+        else:
+            row = self.ctx.history.latest_post_on(_parse_date(date).strftime("%Y-%m-%d"))
+        if row is None:
+            raise ServiceError(404, f"Kein Post für {post_id or date} in der Historie.")
+        dt = _parse_date(row["date"])
+        self.refresh(dt.year, dt.year)
+        content = subject_content(self.ctx, row["date"], row["post_type"], row["subject"], row["ref"],
+                                  row["category"])
+        if content is None:
+            raise ServiceError(404, f"Thema „{row['subject']}“ existiert nicht mehr – /generate-day plant neu.")
+        content["extras"] = {**content["extras"], "avoid_text": row["text"] or ""}
+
+        with self._llm_slot():
+            obj, version = generate_checked(self.ctx, dt, content, row["post_type"], verbose=self.verbose)
+        if row["carousel_json"]:
+            obj["carousel_plan"] = json.loads(row["carousel_json"])
+
+        with self._write:
+            if self.push and row["notion_page_id"] and not self.dry_run:
+                update_notion_post(row["notion_page_id"], obj)
+            self.ctx.history.update_post(row["id"], title=obj.get("title"), text=obj.get("text"),
+                                         hashtags=obj.get("hashtags"))
+            record_post_node(self.ctx.graph, row["date"], row["post_type"], obj, row["subject"],
+                             row["category"], row["id"], version)
+            self.ctx.graph.save()
+        return {"id": row["id"], "date": row["date"], "post_type": row["post_type"],
+                "notion_page_id": row["notion_page_id"], "post": obj}
+
+    def enrich_ingredient(self, name: str) -> dict:
+        """
+        Neuer Fakt für eine Zutat (ein LLM-Aufruf) → ingredients_overrides.json.
+        Rückgabe enthält die geplanten Posts, die dadurch veraltet sind.
+        """
+        name = (name or "").strip()
+        if not name:
+            raise ServiceError(400, "name fehlt.")
+        if self.ctx.skip_ai:
+            raise ServiceError(400, "Anreicherung ist mit --skip-ai deaktiviert.")
+        self.refresh()
+        key = name.lower()
+        with self._llm_slot():
+            fact = enrich_ingredient_with_ai(name, self.ctx.menu_examples_map.get(key, []))
+        if is_too_short(fact, min_chars=60):
+            raise ServiceError(502, f"Antwort zu kurz ({len(fact)} Zeichen).")
+        with self._write:
+            overrides = load_ingredients_overrides()
+            overrides[key] = {"name": (overrides.get(key) or {}).get("name") or name, "fact": fact}
+            save_ingredients_overrides(overrides)
+        self.refresh()
+        today = datetime.date.today().isoformat()
+        stale = [row["date"] for row, _, _ in find_stale_posts(self.ctx, today)["stale"]
+                 if row["post_type"] == "ingredient_fact" and row["subject"].strip().lower() == key]
+        return {"name": name, "fact": fact, "stale_posts": stale}
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+    def handle(self, method: str, path: str, query: dict, body: dict) -> dict:
+        with self._count:   # Handler laufen in eigenen Threads
+            self.requests += 1
+        if method == "GET" and path == "/health":
+            return self.health()
+        if method == "GET" and path == "/plan":
+            return self.plan(query.get("start") or datetime.date.today().isoformat(), int(query.get("days") or 14))
+        if method == "POST" and path == "/generate-day":
+            return self.generate_day(body.get("date"), body.get("post_type"))
+        if method == "POST" and path == "/regenerate-post":
+            return self.regenerate_post(body.get("date"), body.get("id"))
+        if method == "POST" and path == "/enrich-ingredient":
+            return self.enrich_ingredient(body.get("name"))
+        raise ServiceError(404, f"Unbekannter Endpunkt: {method} {path}")
+
+def _handler_for(service: PlanService):
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "social-post/1"
+
+        def _reply(self, status: int, payload: dict):
+            blob = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(blob)))
+            self.end_headers()
+            self.wfile.write(blob)
+
+        def _dispatch(self, method: str):
+            t0 = time.perf_counter()
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                body = {}
+                if method == "POST":
+                    raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                    body = json.loads(raw or b"{}")
+                    if not isinstance(body, dict):
+                        raise ServiceError(400, "JSON-Objekt erwartet.")
+                status, payload = 200, service.handle(method, url.path.rstrip("/") or "/", query, body)
+            except ServiceError as e:
+                status, payload = e.status, {"error": str(e)}
+            except (ValueError, json.JSONDecodeError) as e:
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            self._reply(status, payload)
+            if service.verbose or status >= 500:
+                print(f"🌐 {method} {self.path} → {status} ({(time.perf_counter() - t0) * 1000:.0f} ms)")
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def log_message(self, format, *args):   # Zugriffslog übernimmt _dispatch
+            pass
+
+    return Handler
+
+def serve(service: PlanService, host: str = "127.0.0.1", port: int = 8765):
+    """Blockiert bis Strg+C."""
+    httpd = ThreadingHTTPServer((host, port), _handler_for(service))
+    httpd.daemon_threads = True
+    print(f"🌐 Dienst läuft auf http://{host}:{port} (Endpunkte: /health, /plan, /generate-day, "
+          f"/regenerate-post, /enrich-ingredient) – Strg+C beendet.")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"👋 Dienst beendet ({service.requests} Anfragen).")
+    finally:
+        httpd.server_close()
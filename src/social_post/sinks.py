@@ -0,0 +1,264 @@
+# src/social_post/sinks.py
+"""
+Ausgabeziele für geplante Posts.
+
+Die Tages-Schleife legt fertige Posts (PostRecord) in einen SinkStream. Ein
+Hintergrund-Thread sammelt sie zu Batches und schreibt in alle gewählten Sinks.
+Die Queue ist begrenzt: ist der langsamste Sink (typisch Notion, ~3 req/s) im
+Rückstand, blockiert put() – die Generierung läuft also nie beliebig weit voraus.
+
+    --sink notion            (Standard, redaktioneller Workflow)
+    --sink jsonl,csv         (Bulk-Planung/Analytics ohne Notion-API)
+    --sink sqlite --sink-dir out
+"""
+import csv, io, json, queue, sqlite3, threading, time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from .notion_client import create_notion_entry
+
+@dataclass
+class PostRecord:
+    date: datetime
+    post_type: str
+    obj: dict
+    scheduled_dt: datetime | None = None
+    media_folder_name: str = ""
+    media_link: str = ""
+    meta: dict = field(default_factory=dict)   # z. B. history_id, subject
+
+    def flat(self) -> dict:
+        """Flache Darstellung für JSONL/CSV/SQLite."""
+        o = self.obj or {}
+        return {
+            "date": self.date.strftime("%Y-%m-%d"),
+            "post_type": self.post_type,
+            "subject": self.meta.get("subject", ""),
+            "title": o.get("title", ""),
+            "text": o.get("text", ""),
+            "hashtags": o.get("hashtags", ""),
+            "platforms": ", ".join(t.get("name", "") for t in (o.get("platform_targets") or [])),
+            "media_type": o.get("media_type", ""),
+            "image_idea": o.get("image_idea", ""),
+            "carousel_plan": json.dumps(o["carousel_plan"], ensure_ascii=False) if o.get("carousel_plan") else "",
+            "scheduled_at": self.scheduled_dt.isoformat(timespec="seconds") if self.scheduled_dt else "",
+            "media_folder": self.media_folder_name or "",
+            "media_link": self.media_link or "",
+        }
+
+FLAT_FIELDS = list(PostRecord(datetime.now(), "", {}).flat().keys())
+
+# -----------------------------
+# Sinks
+# -----------------------------
+class Sink:
+    name = "sink"
+
+    def write_batch(self, records: list[PostRecord]) -> list:
+        """
+        Schreibt einen Batch; Rückgabe je Record ein Ergebnis (z. B. Page-ID), None oder
+        die Exception dieses Records. Eine geworfene Exception heißt: nichts geschrieben.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+def _serialize(records: list[PostRecord], fn) -> tuple[list, list]:
+    """fn(record) je Record → (fertige Zeilen, Ergebnisliste mit None/Exception)."""
+    rows, out = [], []
+    for r in records:
+        try:
+            rows.append(fn(r))
+            out.append(None)
+        except Exception as e:
+            out.append(e)
+    return rows, out
+
+class NotionSink(Sink):
+    """Eine Seite pro Post (Notion hat keine Batch-API); das Rate-Limit liegt in notion_client."""
+    name = "notion"
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+
+    def write_batch(self, records):
+        # Seiten nacheinander; ein Fehler betrifft nur seinen Record (bereits angelegte bleiben)
+        out = []
+        for r in records:
+            try:
+                out.append(create_notion_entry(
+                    r.date, r.obj, r.post_type,
+                    dry_run=self.dry_run,
+                    scheduled_dt=r.scheduled_dt,
+                    media_folder_name=r.media_folder_name,
+                    media_link=r.media_link,
+                ))
+            except Exception as e:
+                out.append(e)
+        return out
+
+class JsonlSink(Sink):
+    name = "jsonl"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write_batch(self, records):
+        lines, out = _serialize(records, lambda r: json.dumps(r.flat(), ensure_ascii=False) + "\n")
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("".join(lines))   # ein Schreibaufruf pro Batch
+        return out
+
+class CsvSink(Sink):
+    name = "csv"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._header = not self.path.exists() or self.path.stat().st_size == 0
+
+    def write_batch(self, records):
+        rows, out = _serialize(records, PostRecord.flat)
+        buf = io.StringIO()
+        w = csv.DictWriter(buf, fieldnames=FLAT_FIELDS)
+        if self._header:
+            w.writeheader()
+        w.writerows(rows)
+        with self.path.open("a", encoding="utf-8", newline="") as f:
+            f.write(buf.getvalue())   # ein Schreibaufruf pro Batch
+        self._header = False
+        return out
+
+class SqliteSink(Sink):
+    """Export-Tabelle `posts` (eine Transaktion pro Batch); Datum/Typ indiziert."""
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        cols = ", ".join(f"{c} TEXT" for c in FLAT_FIELDS)
+        self._conn.executescript(
+            f"CREATE TABLE IF NOT EXISTS posts (id INTEGER PRIMARY KEY AUTOINCREMENT, {cols});"
+            "CREATE INDEX IF NOT EXISTS idx_export_date ON posts(date);"
+            "CREATE INDEX IF NOT EXISTS idx_export_type ON posts(post_type);"
+        )
+
+    def write_batch(self, records):
+        sql = f"INSERT INTO posts({', '.join(FLAT_FIELDS)}) VALUES({', '.join('?' for _ in FLAT_FIELDS)})"
+        rows, out = _serialize(records, lambda r: [r.flat()[c] for c in FLAT_FIELDS])
+        with self._conn:   # Transaktion: bei Fehler wird nichts geschrieben
+            self._conn.executemany(sql, rows)
+        return out
+
+    def close(self):
+        self._conn.close()
+
+SINK_TYPES = ("notion", "jsonl", "csv", "sqlite")
+
+def build_sinks(spec: str, out_dir: Path, dry_run=False) -> list[Sink]:
+    """'notion,jsonl' → Sink-Instanzen. Dateien landen in out_dir (posts.jsonl/.csv/.sqlite3)."""
+    sinks = []
+    for name in [s.strip().lower() for s in (spec or "notion").split(",") if s.strip()]:
+        if name == "notion":
+            sinks.append(NotionSink(dry_run=dry_run))
+        elif name == "jsonl":
+            sinks.append(JsonlSink(Path(out_dir) / "posts.jsonl"))
+        elif name == "csv":
+            sinks.append(CsvSink(Path(out_dir) / "posts.csv"))
+        elif name == "sqlite":
+            sinks.append(SqliteSink(Path(out_dir) / "posts.sqlite3"))
+        else:
+            raise ValueError(f"Unbekannter Sink '{name}' (erlaubt: {', '.join(SINK_TYPES)})")
+    return sinks
+
+# -----------------------------
+# Stream mit Batching & Backpressure
+# -----------------------------
+_STOP = object()
+
+class SinkStream:
+    """
+    put(record) blockiert, sobald max_pending Posts auf das Schreiben warten.
+    on_result(record, results, error) wird im Writer-Thread aufgerufen;
+    results = {sink_name: Ergebnis} (z. B. {"notion": page_id}).
+    """
+    def __init__(self, sinks: list[Sink], batch_size=10, max_pending=20, flush_interval=2.0, on_result=None):
+        self.sinks = sinks
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.on_result = on_result
+        self.written = self.failed = 0
+        self._q: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = threading.Thread(target=self._run, name="sink-writer", daemon=True)
+        self._thread.start()
+
+    def put(self, record: PostRecord):
+        self._q.put(record)
+
+    def close(self):
+        self._q.put(_STOP)
+        self._thread.join()
+        for s in self.sinks:
+            try:
+                s.close()
+            except Exception as e:
+                print(f"⚠️ Sink {s.name} konnte nicht geschlossen werden: {e}")
+
+    def _run(self):
+        batch, deadline = [], None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+                deadline = deadline or time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or item is None):
+                self._flush(batch)
+                batch, deadline = [], None
+
+    @staticmethod
+    def _write_one(sink: Sink, record: PostRecord):
+        try:
+            return sink.write_batch([record])[0]
+        except Exception as e:
+            return e
+
+    def _flush(self, batch: list[PostRecord]):
+        if not batch:
+            return
+        results = [{} for _ in batch]
+        errors: list[Exception | None] = [None] * len(batch)
+        for sink in self.sinks:
+            try:
+                res = sink.write_batch(batch)
+            except Exception as e:
+                # write_batch wirft nur, wenn nichts geschrieben wurde → einzeln nachschreiben,
+                # damit nur der defekte Post fehlt
+                res = [e] if len(batch) == 1 else [self._write_one(sink, r) for r in batch]
+            for i, v in enumerate(res):
+                if isinstance(v, Exception):
+                    errors[i] = v
+                    results[i][sink.name] = None
+                    print(batch[i].date.date(), f"❌ {sink.name} Fehler:", v)
+                else:
+                    results[i][sink.name] = v
+        for i, r in enumerate(batch):
+            if errors[i] is None:
+                self.written += 1
+            else:
+                self.failed += 1
+            if self.on_result:
+                try:
+                    self.on_result(r, results[i], errors[i])
+                except Exception as e:
+                    print(f"⚠️ on_result Fehler: {e}")
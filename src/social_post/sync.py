@@ -0,0 +1,83 @@
+# src/social_post/sync.py
+"""
+Rückweg Notion → lokale Historie (--sync).
+
+Gefragt wird nur nach Seiten, deren last_edited_time seit dem letzten Cursor liegt
+(aufsteigend sortiert, paginiert). Pro Tag sind das meist ein bis zwei Requests statt
+eines vollständigen DB-Scans. Status, Texte, Zeitpunkt, Post-ID und Fehler landen in
+`posts`; da die Rotationen auf der Historie basieren, zählen z. B. fehlgeschlagene
+Posts danach nicht mehr als "verwendet".
+
+Notion speichert last_edited_time nur minutengenau – deshalb on_or_after und ein
+Vergleich mit edited_at, damit bereits übernommene Seiten nicht doppelt zählen.
+"""
+from .history import HistoryStore
+from .notion_client import query_database, read_page
+
+CURSOR_KEY = "notion_sync_cursor"
+
+# Notion-Status → lokaler Status
+STATUS_MAP = {
+    "entwurf": "draft",
+    "bereit": "ready",
+    "geplant": "scheduled",
+    "gepostet": "posted",
+    "fehlgeschlagen": "failed",
+}
+
+def _local_fields(props: dict) -> dict:
+    fields = {"edited_at": props.get("last_edited_time")}
+    status = (props.get("status") or "").strip()
+    if status:
+        fields["status"] = STATUS_MAP.get(status.lower(), status.lower())
+    for key, col in (("title", "title"), ("text", "text"), ("hashtags", "hashtags"),
+                     ("post_id", "external_post_id"), ("error", "error")):
+        if key in props:
+            fields[col] = props.get(key) or ""
+    if props.get("datetime"):
+        fields["scheduled_at"] = props["datetime"]
+    if props.get("posted_at"):
+        fields["posted_at"] = props["posted_at"]
+    return fields
+
+def sync_from_notion(history: HistoryStore, since: str | None = None, verbose: bool = True) -> dict:
+    """
+    Übernimmt alle seit dem Cursor (bzw. `since`) geänderten Seiten.
+    Rückgabe: {"seen", "updated", "inserted", "unchanged", "cursor"}.
+    """
+    cursor = since or history.get_meta(CURSOR_KEY)
+    filter_ = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": cursor}} if cursor else None
+    sorts = [{"timestamp": "last_edited_time", "direction": "ascending"}]
+    stats = {"seen": 0, "updated": 0, "inserted": 0, "unchanged": 0, "cursor": cursor}
+
+    for page in query_database(filter_, sorts):
+        props = read_page(page)
+        stats["seen"] += 1
+        edited = props.get("last_edited_time")
+        row = history.post_by_page(props["id"])
+        if row is not None and edited and row["edited_at"] == edited:
+            stats["unchanged"] += 1
+        elif row is not None:
+            history.update_post(row["id"], **_local_fields(props))
+            stats["updated"] += 1
+        else:
+            # Seite wurde in Notion direkt angelegt (oder stammt aus der Zeit vor der Historie)
+            fields = _local_fields(props)
+            fields.setdefault("status", "draft")
+            history.record_post(
+                date=(props.get("datetime") or edited or "")[:10],
+                post_type=props.get("post_type") or "",
+                subject=props.get("title") or "",
+                notion_page_id=props["id"],
+                run_id=None,
+                **fields,
+            )
+            stats["inserted"] += 1
+        if edited and (not stats["cursor"] or edited > stats["cursor"]):
+            stats["cursor"] = edited
+        if verbose and (stats["seen"] % 100 == 0):
+            print(f"   … {stats['seen']} Seiten verarbeitet")
+
+    if stats["cursor"] and stats["cursor"] != cursor:
+        history.set_meta(CURSOR_KEY, stats["cursor"])
+    return stats
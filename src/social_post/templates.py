@@ -0,0 +1,231 @@
+# src/social_post/templates.py
+"""
+Lokaler Template-Generator für formelhafte Posts (Zitat, Anlass).
+
+Statt eines OpenAI-Aufrufs wird der Post aus einer Phrasenbank pro Typ
+zusammengesetzt:
+- Slots: Anlass-Name, Datum/Wochentag, CTA (aus den anlass_kalender.json-Extras),
+  Zitat, Autor, Quelle
+- Auswahl deterministisch pro Datum + Thema (gleicher Tag → gleicher Post),
+  aber mehrere Varianten, damit sich Wochen nicht wiederholen
+- längenbewusster Zusammenbau: Pflichtteile zuerst, optionale Sätze nur,
+  solange der Text unter 300 Zeichen bleibt – nie mitten im Wort gekürzt
+- Hashtags kommen wie bei allen Posts aus hashtags.HashtagBank (nach der Generierung);
+  hier wird nur ein Override aus dem Kalender übernommen
+
+Ergebnis hat dieselbe Form wie generate_post_content() – 0 Tokens, 0 Latenz.
+"""
+import hashlib, json, random, re
+
+from .posts import _sanitize_post_obj, _to_str
+
+MAX_TEXT = 300
+TEMPLATE_TYPES = ("zitat", "anlass")
+
+WOCHENTAGE = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+MONATE = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli",
+          "August", "September", "Oktober", "November", "Dezember"]
+
+# -----------------------------
+# Phrasenbank
+# -----------------------------
+# Platzhalter: {quote} {author} {source} {anlass} {datum} {wochentag}
+PHRASES: dict[str, dict[str, list[str]]] = {
+    "zitat": {
+        "title": [
+            "Gedanke zum {wochentag}",
+            "Zitat des Tages",
+            "Ein Satz für heute",
+            "Worte zum Genießen",
+        ],
+        "intro": [
+            "Unser Gedanke für diesen {wochentag}:",
+            "Heute im Kaspio-Zitatbuch:",
+            "Ein Satz, der uns heute begleitet:",
+            "Zum {datum} ein paar Worte zum Mitnehmen:",
+        ],
+        "body": [
+            "„{quote}“ – {author}.",
+        ],
+        "outro": [
+            "Wir finden: Das passt perfekt zu einem guten Essen.",
+            "Dem ist eigentlich nichts hinzuzufügen.",
+            "Genau unser Motto in der Küche.",
+            "Mit gutem Essen klappt das gleich doppelt so gut.",
+        ],
+        "cta": [
+            "Wir sehen uns im Kaspio!",
+            "Teilt das Zitat mit jemandem, der es heute braucht.",
+            "Welches Zitat begleitet euch gerade? Schreibt es uns!",
+            "Tisch reservieren und den Gedanken bei uns weiterdenken.",
+        ],
+        "image_idea": [
+            "Zitat als Typo-Grafik auf ruhigem Hintergrund, Kaspio-Logo dezent unten rechts.",
+            "Gedeckter Tisch mit Kerzenlicht, Zitat als Text-Overlay.",
+            "Nahaufnahme Espressotasse auf Holztisch, Zitat in heller Schrift darüber.",
+        ],
+    },
+    "anlass": {
+        "title": [
+            "{anlass} – Kaspio",
+            "Heute: {anlass}",
+            "{anlass} im Kaspio",
+        ],
+        "intro": [
+            "Heute ist {anlass}!",
+            "Am {datum} feiern wir {anlass}.",
+            "{wochentag}, {datum}: {anlass}!",
+            "Schon gewusst? Heute ist {anlass}.",
+        ],
+        "context": [
+            "Ein schöner Anlass, um mal wieder zusammenzukommen.",
+            "Für uns ein guter Grund, den Tag ein bisschen besonders zu machen.",
+            "Der perfekte Vorwand für eine kleine Auszeit.",
+            "Wir finden: Jeder Anlass ist ein guter Anlass für gutes Essen.",
+        ],
+        "cta": [
+            "Kommt vorbei – wir freuen uns auf euch!",
+            "Reserviert euch jetzt einen Tisch.",
+            "Feiert mit uns im Kaspio in Stade.",
+            "Wir sehen uns im Kaspio!",
+        ],
+        "image_idea": [
+            "Gedeckter Tisch im Kaspio mit einem Detail passend zu „{anlass}“.",
+            "Team-Foto im Gastraum mit einem kleinen Schild „{anlass}“.",
+            "Stimmungsvolles Bild vom Gastraum, Text-Overlay „{anlass}“.",
+        ],
+    },
+}
+
+# Zusatz-Kontext je Anlass-Kategorie (anlass_kalender.json / anlass_regeln.json)
+CATEGORY_CONTEXT: dict[str, list[str]] = {
+    "feiertag": [
+        "Wir wünschen euch einen entspannten Feiertag.",
+        "Genießt den freien Tag – am besten in guter Gesellschaft.",
+    ],
+    "familie": [
+        "Der perfekte Tag für ein Essen mit der ganzen Familie.",
+        "Zeit für die Menschen, die uns am wichtigsten sind.",
+    ],
+}
+
+# Version der Phrasenbank (Artefakt-Graph: Vorlagen-Posts gelten danach als veraltet)
+TEMPLATE_VERSION = "tpl-" + hashlib.sha1(
+    json.dumps([PHRASES, CATEGORY_CONTEXT], ensure_ascii=False, sort_keys=True).encode("utf-8")
+).hexdigest()[:10]
+
+def supports(post_type) -> bool:
+    return post_type in TEMPLATE_TYPES
+
+def _rng(date, post_type: str, subject: str, variant: int = 0) -> random.Random:
+    seed = f"{date:%Y-%m-%d}|{post_type}|{subject.lower()}|{variant}"
+    return random.Random(int(hashlib.sha1(seed.encode("utf-8")).hexdigest()[:12], 16))
+
+def _fill(template: str, slots: dict) -> str:
+    return re.sub(r"\s+", " ", template.format(**slots)).strip()
+
+def shorten(text: str, limit: int) -> str:
+    """Kürzt an der letzten Wortgrenze und hängt "…" an."""
+    text = re.sub(r"\s+", " ", text or "").strip()
+    if len(text) <= limit:
+        return text
+    cut = text[:max(0, limit - 1)]
+    if " " in cut:
+        cut = cut[:cut.rfind(" ")]
+    return cut.rstrip(" ,;:–-") + "…"
+
+def assemble(parts: list[tuple[str, bool]], limit: int = MAX_TEXT) -> str:
+    """
+    parts: [(satz, pflicht)], in Ausgabereihenfolge. Pflichtteile bleiben immer drin
+    (notfalls an der Wortgrenze gekürzt), optionale nur, wenn sie noch passen.
+    """
+    required = [p for p, req in parts if req and p]
+    budget = limit - (len(" ".join(required)))
+    if budget < 0:
+        return shorten(" ".join(required), limit)
+    chosen = []
+    for text, req in parts:
+        if not text:
+            continue
+        if req:
+            chosen.append(text)
+        elif len(text) + 1 <= budget:
+            chosen.append(text)
+            budget -= len(text) + 1
+    return " ".join(chosen)
+
+# -----------------------------
+# Slots
+# -----------------------------
+def _slots(date, gericht, beschreibung, post_type, extras) -> dict:
+    slots = {
+        "datum": f"{date.day}. {MONATE[date.month - 1]}",
+        "wochentag": WOCHENTAGE[date.weekday()],
+        "anlass": "", "quote": "", "author": "", "source": "",
+    }
+    if post_type == "anlass":
+        slots["anlass"] = (_to_str(extras.get("anlass_name")) or _to_str(gericht) or "Besonderer Anlass").strip()
+    else:
+        quote = _to_str(extras.get("quote")).strip()
+        author = _to_str(extras.get("author")).strip() or _to_str(gericht).strip()
+        if not quote:   # Fallback: "Zitat — Quelle" aus der CLI-Beschreibung
+            quote = _to_str(beschreibung).rsplit(" — ", 1)[0].strip()
+        author = author or "Unbekannt"
+        quote = shorten(quote.strip("„“\"' "), MAX_TEXT - len(author) - 6)   # Anführungszeichen + Autor
+        slots.update(quote=quote, author=author,
+                     source=_to_str(extras.get("source")).strip())
+    return slots
+
+def template_post(date, gericht, beschreibung, post_type, extras=None, variant: int = 0) -> dict | None:
+    """
+    Post aus der Phrasenbank; None für nicht unterstützte Typen oder fehlende Slots.
+    variant>0 liefert eine andere (weiterhin deterministische) Kombination.
+    """
+    if not supports(post_type):
+        return None
+    extras = extras or {}
+    slots = _slots(date, gericht, beschreibung, post_type, extras)
+    if post_type == "zitat" and not slots["quote"]:
+        return None
+    bank = PHRASES[post_type]
+    rng = _rng(date, post_type, slots["anlass"] or slots["quote"], variant)
+    pick = lambda key: _fill(rng.choice(bank[key]), slots)
+
+    title = pick("title")
+    if post_type == "anlass":
+        category = _to_str(extras.get("anlass_cat")).strip()
+        cta = _to_str(extras.get("cta_override")).strip() or pick("cta")
+        context = rng.choice(CATEGORY_CONTEXT.get(category.lower()) or bank["context"])
+        text = assemble([(pick("intro"), True), (context, False), (cta, True)])
+        hashtags = _to_str(extras.get("hashtags_override")).strip()
+        image_idea = _to_str(extras.get("image_idea_override")).strip() or pick("image_idea")
+    else:
+        text = assemble([(pick("intro"), False), (pick("body"), True), (pick("outro"), False), (pick("cta"), False)])
+        hashtags = ""
+        image_idea = pick("image_idea")
+
+    return _sanitize_post_obj({
+        "title": title,
+        "text": text,
+        "hashtags": hashtags,
+        "platform_suggestion": "Instagram Post",
+        "media_type": "Bild",
+        "image_idea": image_idea,
+    })
+
+def best_template_post(date, gericht, beschreibung, post_type, extras=None, sim_index=None,
+                       own_id=None, variants: int = 4) -> dict | None:
+    """Wie template_post; mit sim_index wird die Variante mit der geringsten Ähnlichkeit gewählt."""
+    first = template_post(date, gericht, beschreibung, post_type, extras)
+    if first is None or sim_index is None or variants <= 1:
+        return first
+    from .dedupe import post_text
+    best, best_sim = first, sim_index.query(post_text(first), exclude=own_id)[0]
+    for v in range(1, variants):
+        if best_sim <= 0:
+            break
+        alt = template_post(date, gericht, beschreibung, post_type, extras, variant=v)
+        sim = sim_index.query(post_text(alt), exclude=own_id)[0]
+        if sim < best_sim:
+            best, best_sim = alt, sim
+    return best
@@ -0,0 +1,133 @@
+# src/social_post/watch.py
+"""
+Watch-Modus (--watch): Prozess bleibt warm, Datenänderungen landen in Sekunden
+im Content-Kalender.
+
+Beobachtet werden (Polling über mtime/Größe – keine Zusatzabhängigkeit):
+    menu.json, anlass_kalender.json, kalender_roh.txt, anlass_regeln.json,
+    ingredients_overrides.json, ingredients_auto.json (Freigaben),
+    ingredients_meta.json, quotes.json
+Nach einer Änderung (und einer kurzen Ruhezeit, damit halb gespeicherte Dateien
+nicht gelesen werden) wird der PlanContext neu geladen. Menü, Zutaten,
+Klassifizierer und Anlass-Kalender kommen dabei aus ihren Caches; neu berechnet
+wird nur, was sich geändert hat (Artefakt-Graph). Danach:
+1) replan_days         – Anlass hinzugekommen/entfallen → Post-Typ des Tages wechseln
+2) rebuild_stale_posts – Posts mit geändertem Gericht/Fakt/Anlass neu erzeugen
+Beides nur für den Horizont heute … heute+N Tage; die bestehenden Notion-Seiten
+werden per PATCH aktualisiert.
+"""
+import datetime, threading, time
+from pathlib import Path
+
+from .io_utils import read_json
+from .constants import (MENU_FILE, ANLASS_FILE, ANLASS_RAW_FILE, ANLASS_RULES_FILE, QUOTES_FILE,
+                        ING_OVERRIDES_FILE, ING_AUTO_FILE, ING_META_FILE)
+from .menu import load_menu
+from .posts import load_quotes
+from .occasions import load_occasions
+from .ingredients.auto import ensure_auto_ingredients
+from .ingredients.overrides import load_ingredients_overrides
+from .ingredients.merge import merge_auto_with_overrides
+from .ingredients.classify import get_classifier, load_meta
+from .rebuild import (PlanContext, ingredient_inputs, record_facts, record_occasions,
+                      replan_days, rebuild_stale_posts)
+
+WATCH_FILES = (MENU_FILE, ANLASS_FILE, ANLASS_RAW_FILE, ANLASS_RULES_FILE,
+               ING_OVERRIDES_FILE, ING_AUTO_FILE, ING_META_FILE, QUOTES_FILE)
+
+def snapshot(paths) -> dict[str, tuple | None]:
+    out = {}
+    for p in paths:
+        try:
+            st = Path(p).stat()
+            out[str(p)] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            out[str(p)] = None
+    return out
+
+def reload_context(ctx: PlanContext, first_year: int, last_year: int, verbose=False):
+    """Lädt alle Eingaben neu in ctx (unveränderte Dateien kommen aus den Caches)."""
+    sp, gt, ds = load_menu()
+    auto_payload = ensure_auto_ingredients(sp, gt, ds, verbose=verbose, graph=ctx.graph)
+    classifier = get_classifier(load_meta())   # nur neu gebaut, wenn sich meta geändert hat
+    names, examples = ingredient_inputs(sp, gt, ds, auto_payload, classifier, ctx.graph)
+    ingredients = merge_auto_with_overrides(names, load_ingredients_overrides(), max_items=60)
+    record_facts(ctx.graph, ingredients)
+    anlass = load_occasions(first_year, last_year, verbose=verbose)
+    record_occasions(ctx.graph, anlass, first_year, last_year)
+    ctx.sp, ctx.gt, ctx.ds = sp, gt, ds
+    ctx.ingredients, ctx.classifier, ctx.menu_examples_map = ingredients, classifier, examples
+    ctx.anlass = anlass
+    ctx.quotes = load_quotes(read_json, QUOTES_FILE)
+
+class PlanWatcher:
+    def __init__(self, ctx: PlanContext, days: int = 30, *, interval: float = 2.0, settle: float = 1.0,
+                 workers: int = 4, dry_run=False, verbose=False, on_update=None, on_replan=None,
+                 paths=WATCH_FILES):
+        self.ctx = ctx
+        self.days = max(1, int(days))
+        self.interval = max(0.2, float(interval))
+        self.settle = max(0.0, float(settle))
+        self.workers = workers
+        self.dry_run = dry_run
+        self.verbose = verbose
+        self.on_update = on_update
+        self.on_replan = on_replan
+        self.paths = tuple(paths)
+        self._snap = snapshot(self.paths)
+        self.cycles = 0
+
+    def horizon(self) -> tuple[str, str]:
+        today = datetime.date.today()
+        return today.isoformat(), (today + datetime.timedelta(days=self.days - 1)).isoformat()
+
+    def sync(self) -> dict:
+        """Ein Abgleich: Kontext neu laden, Tage neu planen, veraltete Posts neu erzeugen."""
+        t0 = time.perf_counter()
+        since, until = self.horizon()
+        self.ctx.graph.changed.clear()
+        reload_context(self.ctx, int(since[:4]), int(until[:4]), verbose=self.verbose)
+        replanned = replan_days(self.ctx, since, until, dry_run=self.dry_run, verbose=self.verbose,
+                                on_replan=self.on_replan)
+        rebuilt = rebuild_stale_posts(self.ctx, since, until, workers=self.workers, dry_run=self.dry_run,
+                                      verbose=self.verbose, on_update=self.on_update)
+        self.ctx.graph.save()
+        self._snap = snapshot(self.paths)   # eigene Schreibzugriffe (z. B. ingredients_auto.json) ignorieren
+        self.cycles += 1
+        stats = {**rebuilt, "replanned": replanned["replanned"], "failed": rebuilt["failed"] + replanned["failed"],
+                 "seconds": round(time.perf_counter() - t0, 2)}
+        print(f"👀 {since} … {until}: {stats['replanned']} Tage neu geplant, {stats['rebuilt']} Posts erneuert, "
+              f"{stats['gone']} ohne Thema, {stats['failed']} Fehler ({stats['seconds']}s)")
+        return stats
+
+    def changed_files(self) -> list[str]:
+        now = snapshot(self.paths)
+        return [p for p in self.paths if now[str(p)] != self._snap.get(str(p))]
+
+    def run(self, stop: threading.Event | None = None, once=False):
+        """Erst ein voller Abgleich, danach bei jeder Änderung. stop.set() beendet die Schleife."""
+        stop = stop or threading.Event()
+        self.sync()
+        if once:
+            return
+        print(f"👀 Beobachte {len(self.paths)} Dateien (alle {self.interval:g}s) – Strg+C beendet.")
+        while not stop.wait(self.interval):
+            changed = self.changed_files()
+            if not changed:
+                continue
+            # Ruhezeit: erst abgleichen, wenn die Datei(en) nicht mehr geschrieben werden
+            while self.settle and not stop.wait(self.settle):
+                before = snapshot(self.paths)
+                if not stop.wait(self.settle) and snapshot(self.paths) == before:
+                    break
+            if stop.is_set():
+                return
+            print(f"👀 Geändert: {', '.join(Path(p).name for p in changed)}")
+            try:
+                self.sync()
+            except SystemExit as e:   # z. B. menu.json vorübergehend leer/ungültig
+                print(f"⚠️ {e} – warte auf die nächste Änderung.")
+                self._snap = snapshot(self.paths)
+            except Exception as e:
+                print(f"❌ Abgleich fehlgeschlagen: {e}")
+                self._snap = snapshot(self.paths)
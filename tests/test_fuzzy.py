@@ -0,0 +1,38 @@
+# tests/test_fuzzy.py
+import doctest
+
+import pytest
+
+from social_post.ingredients import fuzzy
+from social_post.ingredients.fuzzy import FuzzyIndex, cluster_tokens, fold_key
+
+def test_doctests():
+    assert doctest.testmod(fuzzy).failed == 0
+
+@pytest.mark.parametrize("known, token", [
+    (["Rind"], "rinde"),
+    (["Rind"], "rinden"),
+    (["Rinde"], "rind"),
+    (["Reis"], "reise"),
+    (["Kohl"], "kohle"),
+    (["Brie"], "bries"),
+    (["Lachs"], "lauch"),
+])
+def test_different_words_are_not_merged(known, token):
+    assert FuzzyIndex(known).match(token) == (token, "none", 0)
+
+@pytest.mark.parametrize("token, expected", [
+    ("tomaten", ("tomate", "fold", 0)),
+    ("walnüsse", ("walnuss", "fold", 0)),
+    ("lachse", ("lachs", "fold", 0)),
+    ("rinds", ("rind", "fold", 0)),
+    ("mozarella", ("mozzarella", "fuzzy", 1)),
+])
+def test_variants_are_merged(token, expected):
+    assert FuzzyIndex(["Tomate", "Walnuss", "Lachs", "Rind", "Mozzarella"]).match(token) == expected
+
+def test_false_plurals_keep_their_own_key():
+    assert fold_key("Rinden") == "rinde"
+    assert fold_key("Rinde") != fold_key("Rind")
+    _, merged = cluster_tokens(["rinde", "rind", "tomate", "tomaten"])
+    assert merged == {"tomaten": "tomate"}